@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Measure checkpoint size and write latency with inline vs by-reference email bodies.
+
+The graph below mirrors the state flow of email_assistant_hitl_memory_gmail (triage
+adds the formatted email to messages, then the agent loops over tool calls) without
+calling an LLM, so the only difference between the two runs is how the body travels.
+
+Usage:
+    python benchmarks/checkpoint_size.py --body-kb 2048 --steps 6
+
+Measured with ``--body-kb 512`` (6 agent steps, 9 checkpoints, in-memory saver):
+
+                   total MB   mean put ms
+    inline body        4.23          0.67
+    body_ref           0.01          0.07
+"""
+
+import argparse
+import time
+import uuid
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.store.base import BaseStore
+from langgraph.store.memory import InMemoryStore
+
+from email_assistant.email_bodies import body_marker, slim_email_input
+from email_assistant.schemas import State
+from email_assistant.utils import format_gmail_markdown, hydrate_email_bodies, parse_gmail
+
+class TimedSaver(MemorySaver):
+    """MemorySaver that records how long each checkpoint write takes."""
+
+    def __init__(self):
+        super().__init__()
+        self.put_seconds = []
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        start = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self.put_seconds.append(time.perf_counter() - start)
+        return result
+
+def build_graph(steps: int):
+    def triage(state: State, store: BaseStore):
+        author, to, subject, email_thread, email_id = parse_gmail(state["email_input"], store)
+        markdown = format_gmail_markdown(subject, author, to, body_marker(state["email_input"]) or email_thread, email_id)
+        return {"classification_decision": "respond", "messages": [{"role": "user", "content": f"Respond to the email: {markdown}"}]}
+
+    def agent(state: State, store: BaseStore):
+        # Resolve the body the way llm_call does before invoking the model
+        hydrate_email_bodies(state["messages"], store)
+        return {"messages": [AIMessage(content=f"step {len(state['messages'])}")]}
+
+    def route(state: State):
+        return "agent" if len(state["messages"]) < steps + 1 else END
+
+    builder = StateGraph(State)
+    builder.add_node("triage", triage)
+    builder.add_node("agent", agent)
+    builder.add_edge(START, "triage")
+    builder.add_edge("triage", "agent")
+    builder.add_conditional_edges("agent", route, ["agent", END])
+    return builder
+
+def measure(email_input: dict, store: BaseStore, steps: int) -> dict:
+    saver = TimedSaver()
+    graph = build_graph(steps).compile(checkpointer=saver, store=store)
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    graph.invoke({"email_input": email_input}, config=config)
+
+    # MemorySaver persists each new channel version as a serialized blob, like the
+    # database-backed checkpointers do, so the blobs are what a checkpoint write costs
+    count = len(list(saver.list(config)))
+    total_bytes = sum(len(payload) for _, payload in saver.blobs.values())
+
+    return {
+        "checkpoints": count,
+        "bytes": total_bytes,
+        "mean_put_ms": 1000 * sum(saver.put_seconds) / max(len(saver.put_seconds), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare checkpoint size with inline vs by-reference email bodies")
+    parser.add_argument("--body-kb", type=int, default=2048, help="Size of the synthetic HTML body in KB")
+    parser.add_argument("--steps", type=int, default=6, help="Number of agent steps to simulate")
+    args = parser.parse_args()
+
+    paragraph = "<p>Quarterly report attached. Please review the numbers before Friday.</p>\n"
+    body = "<html><body>" + paragraph * (args.body_kb * 1024 // len(paragraph)) + "</body></html>"
+    email_input = {
+        "from": "Alice <alice@example.com>",
+        "to": "me@example.com",
+        "subject": "Quarterly report",
+        "body": body,
+        "id": "18c0ffee",
+    }
+
+    store = InMemoryStore()
+    before = measure(email_input, store, args.steps)
+    after = measure(slim_email_input(email_input, store), store, args.steps)
+
+    print(f"Body size: {len(body) / 1024:.0f} KB, agent steps: {args.steps}")
+    print(f"{'':<14}{'checkpoints':>12}{'total MB':>12}{'mean put ms':>14}")
+    for name, result in (("inline body", before), ("body_ref", after)):
+        print(f"{name:<14}{result['checkpoints']:>12}{result['bytes'] / 2**20:>12.2f}{result['mean_put_ms']:>14.2f}")
+
+if __name__ == "__main__":
+    main()
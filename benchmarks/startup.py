@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Measure Gmail tooling startup: import time and time to the first API call.
+
+Each sample runs in a fresh interpreter (like a cron tick or a new worker) and
+compares building clients with ``googleapiclient.discovery.build`` against
+``email_assistant.tools.gmail.discovery.build_service``. The HTTP transport is a
+stub, so the numbers cover imports, discovery parsing and request construction,
+not network latency.
+
+Usage:
+    python benchmarks/startup.py --samples 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ("build", "build_service")
+
+class StubHttp:
+    """httplib2.Http stand-in that answers every request with a canned profile."""
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        import httplib2
+
+        return httplib2.Response({"status": "200"}), b'{"emailAddress": "me@example.com"}'
+
+def child(mode: str) -> None:
+    start = time.perf_counter()
+    import email_assistant.tools.gmail.gmail_tools  # noqa: F401
+    from googleapiclient.discovery import build
+
+    from email_assistant.tools.gmail.discovery import build_service
+
+    imported = time.perf_counter()
+
+    def make(api, version):
+        if mode == "build":
+            return build(api, version, http=StubHttp())
+        return build_service(api, version, http=StubHttp())
+
+    make("gmail", "v1").users().getProfile(userId="me").execute()
+    first_call = time.perf_counter()
+
+    # Before the service pool every tool call built its clients again
+    rebuild_start = time.perf_counter()
+    make("gmail", "v1")
+    make("calendar", "v3")
+    rebuild = time.perf_counter() - rebuild_start
+
+    print(json.dumps({
+        "import_ms": 1000 * (imported - start),
+        "first_call_ms": 1000 * (first_call - start),
+        "rebuild_ms": 1000 * rebuild,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Gmail tooling time-to-first-API-call")
+    parser.add_argument("--samples", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'':<15}{'import ms':>12}{'first call ms':>15}{'rebuild ms':>12}   (median of {args.samples})")
+    for mode in MODES:
+        samples = []
+        for _ in range(args.samples):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        medians = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+        print(f"{mode:<15}{medians['import_ms']:>12.1f}{medians['first_call_ms']:>15.1f}{medians['rebuild_ms']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
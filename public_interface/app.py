@@ -8,7 +8,9 @@ from flask import Flask, jsonify, request
 import json
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from snapshot import DashboardSnapshot, snapshot_etag
 
 app = Flask(__name__)
 
@@ -112,9 +114,29 @@ def fetch_real_agent_inbox_data() -> Dict:
             "error": str(e)
         }
 
-def get_email_dashboard_html():
+def render_email_row(email: Dict) -> str:
+    """Render one email row of the dashboard (also pushed over SSE)"""
+    return f"""
+                <div class="email-item" data-email-id="{email.get('id', '')}">
+                    <div class="email-subject">{email.get('subject', 'No Subject')}</div>
+                    <div class="email-from">From: {email.get('from', 'Unknown')}</div>
+                    <div class="email-status status-{email.get('status', 'unknown')}">
+                        {'✅ Processed' if email.get('status') == 'processed' else '⏳ Waiting Action' if email.get('status') == 'waiting_action' else '❓ Unknown'}
+                    </div>
+                    <div class="tool-info">
+                        <strong>Tool:</strong> {email.get('tool_called', 'None')} | 
+                        <strong>Next Action:</strong> {email.get('next_action', 'None')}
+                    </div>
+                    <div class="timestamp">
+                        📅 {email.get('timestamp', 'Unknown')}
+                    </div>
+                </div>
+                """
+
+def get_email_dashboard_html(data: Optional[Dict] = None):
     """Generate HTML dashboard with real Agent Inbox data"""
-    data = fetch_real_agent_inbox_data()
+    if data is None:
+        data = fetch_real_agent_inbox_data()
     
     return f"""
     <!DOCTYPE html>
@@ -396,7 +418,7 @@ def get_email_dashboard_html():
             }}
         </style>
     </head>
-    <body>
+    <body data-snapshot="{snapshot_etag(data)}">
         <div class="container">
             <div class="header">
                 <h1>📧 My Autonomous Email Inbox</h1>
@@ -404,14 +426,14 @@ def get_email_dashboard_html():
                 <div class="header-buttons">
                     <a href="{data.get('agent_inbox_url', '#')}" target="_blank" class="btn btn-warning">🚀 Open Agent Inbox</a>
                     <button class="btn btn-success" onclick="refreshData()" id="refreshBtn">
-                        🔄 Refresh Data
+                        🔄 Reconnect Live Updates
                         <div class="spinner" id="spinner"></div>
                     </button>
                 </div>
             </div>
             
             <div class="refresh-info">
-                <strong>🔄 Data Refresh:</strong> Click "Refresh Data" to get the latest email statistics and threads from Agent Inbox
+                <strong>🔄 Live Updates:</strong> New statistics and threads from Agent Inbox appear as the server refreshes them; click "Reconnect Live Updates" if the page stops updating
                 <br><strong>Data Source:</strong> <span class="real-data-badge">✅ Real AgentInbox Data</span>
             </div>
             
@@ -420,7 +442,7 @@ def get_email_dashboard_html():
                 <ol>
                     <li><strong>Click "Open Agent Inbox"</strong> to access your emails and manage them</li>
                     <li><strong>In Agent Inbox</strong>, you can accept, ignore, or take action on emails</li>
-                    <li><strong>Click "Refresh Data"</strong> to get current email statistics and threads</li>
+                    <li><strong>Click "Reconnect Live Updates"</strong> if the statistics and threads stop updating</li>
                     <li><strong>Email Ingest</strong> happens automatically in the background via the working script</li>
                 </ol>
                 <p><strong>Note:</strong> Email ingest is handled by the working <code>run_ingest.py</code> script in your development environment.</p>
@@ -428,19 +450,19 @@ def get_email_dashboard_html():
             
             <div class="stats">
                 <div class="stat-card">
-                    <div class="stat-number">{data.get('statistics', {}).get('total_emails', 0)}</div>
+                    <div class="stat-number" data-stat="total_emails">{data.get('statistics', {}).get('total_emails', 0)}</div>
                     <div class="stat-label">Total Emails</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{data.get('statistics', {}).get('processed', 0)}</div>
+                    <div class="stat-number" data-stat="processed">{data.get('statistics', {}).get('processed', 0)}</div>
                     <div class="stat-label">Processed</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{data.get('statistics', {}).get('waiting_action', 0)}</div>
+                    <div class="stat-number" data-stat="waiting_action">{data.get('statistics', {}).get('waiting_action', 0)}</div>
                     <div class="stat-label">Waiting Action</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{data.get('statistics', {}).get('scheduled_meetings', 0)}</div>
+                    <div class="stat-number" data-stat="scheduled_meetings">{data.get('statistics', {}).get('scheduled_meetings', 0)}</div>
                     <div class="stat-label">Scheduled Meetings</div>
                 </div>
             </div>
@@ -449,29 +471,55 @@ def get_email_dashboard_html():
                 <h2>📬 Recent Emails from Agent Inbox</h2>
                 <p style="text-align: center; margin-bottom: 25px; color: #4a5568;">
                     <strong>Source:</strong> {data.get('source', 'Unknown')} | 
-                    <strong>Last Refresh:</strong> {data.get('refresh_timestamp', 'Unknown')}
+                    <strong>Last Refresh:</strong> <span id="lastRefresh">{data.get('refresh_timestamp', 'Unknown')}</span>
                 </p>
                 
-                {''.join([f'''
-                <div class="email-item">
-                    <div class="email-subject">{email.get('subject', 'No Subject')}</div>
-                    <div class="email-from">From: {email.get('from', 'Unknown')}</div>
-                    <div class="email-status status-{email.get('status', 'unknown')}">
-                        {'✅ Processed' if email.get('status') == 'processed' else '⏳ Waiting Action' if email.get('status') == 'waiting_action' else '❓ Unknown'}
-                    </div>
-                    <div class="tool-info">
-                        <strong>Tool:</strong> {email.get('tool_called', 'None')} | 
-                        <strong>Next Action:</strong> {email.get('next_action', 'None')}
-                    </div>
-                    <div class="timestamp">
-                        📅 {email.get('timestamp', 'Unknown')}
-                    </div>
+                <div id="emailList">
+                {''.join(render_email_row(email) for email in data.get('emails', []))}
                 </div>
-                ''' for email in data.get('emails', [])])}
             </div>
         </div>
         
         <script>
+            // Live updates: the server pushes changed rows and statistics over SSE
+            let events = null;
+            let snapshotId = document.body.dataset.snapshot;
+
+            function applyChanges(change, reset) {{
+                Object.entries(change.statistics).forEach(([key, stat]) => {{
+                    const el = document.querySelector(`[data-stat="${{key}}"]`);
+                    if (el) el.textContent = stat.value;
+                }});
+                const list = document.getElementById('emailList');
+                const rows = {{}};
+                list.querySelectorAll('[data-email-id]').forEach(el => {{ rows[el.dataset.emailId] = el; }});
+                if (reset) change.removed = Object.keys(rows).filter(id => !change.order.includes(id));
+                change.removed.forEach(id => {{ if (rows[id]) rows[id].remove(); delete rows[id]; }});
+                change.upserted.forEach(email => {{
+                    const tmp = document.createElement('div');
+                    tmp.innerHTML = email.html.trim();
+                    const row = tmp.firstElementChild;
+                    const id = String(email.id);
+                    if (rows[id]) rows[id].replaceWith(row);
+                    rows[id] = row;
+                }});
+                change.order.forEach(id => {{ if (rows[id]) list.appendChild(rows[id]); }});
+                document.getElementById('lastRefresh').textContent = new Date().toLocaleString();
+            }}
+
+            function connectEvents() {{
+                if (!window.EventSource) return false;
+                if (events) events.close();
+                events = new EventSource('/api/events?since=' + encodeURIComponent(snapshotId));
+                const handle = reset => message => {{
+                    snapshotId = message.lastEventId || snapshotId;
+                    applyChanges(JSON.parse(message.data), reset);
+                }};
+                events.addEventListener('reset', handle(true));
+                events.addEventListener('delta', handle(false));
+                return true;
+            }}
+
             function refreshData() {{
                 const refreshBtn = document.getElementById('refreshBtn');
                 const spinner = document.getElementById('spinner');
@@ -479,22 +527,38 @@ def get_email_dashboard_html():
                 // Show spinner and disable button
                 spinner.style.display = 'inline-block';
                 refreshBtn.disabled = true;
-                refreshBtn.textContent = '🔄 Refreshing...';
+                refreshBtn.textContent = '🔄 Reconnecting...';
                 
-                // Force a page reload to get fresh data
-                setTimeout(() => {{
+                // Reconnect the live stream; fall back to a page reload without SSE support
+                if (!connectEvents()) {{
                     location.reload();
+                    return;
+                }}
+                setTimeout(() => {{
+                    refreshBtn.disabled = false;
+                    refreshBtn.innerHTML = '🔄 Reconnect Live Updates <div class="spinner" id="spinner"></div>';
                 }}, 1000);
             }}
+
+            connectEvents();
         </script>
     </body>
     </html>
     """
 
+# Data and page are rebuilt in the background; requests are served from memory
+dashboard_snapshot = DashboardSnapshot(
+    app,
+    fetch_real_agent_inbox_data,
+    {"index": get_email_dashboard_html},
+    interval=float(os.environ.get("DASHBOARD_REFRESH_INTERVAL", 30)),
+    row_renderer=render_email_row,
+)
+
 @app.route('/')
 def index():
     """Main dashboard page with real Agent Inbox data"""
-    return get_email_dashboard_html()
+    return dashboard_snapshot.page_response("index")
 
 @app.route('/health')
 def health():
@@ -512,8 +576,12 @@ def health():
 @app.route('/api/emails')
 def emails():
     """API endpoint to get real email data from Agent Inbox"""
-    data = fetch_real_agent_inbox_data()
-    return jsonify(data)
+    return dashboard_snapshot.emails_response()
+
+@app.route('/api/events')
+def events():
+    """Server-sent events with the dashboard rows and statistics that changed"""
+    return dashboard_snapshot.event_response()
 
 @app.route('/agent-inbox')
 def agent_inbox_redirect():
@@ -10,6 +10,8 @@ import os
 from datetime import datetime
 from typing import Dict, List
 
+from snapshot import DashboardSnapshot
+
 app = Flask(__name__)
 app.config['APP_NAME'] = "My Autonomous Email Inbox"
 
@@ -115,39 +117,38 @@ def get_real_email_data() -> Dict:
         "connection_status": "connected"
     }
 
+# Data and pages are rebuilt in the background; requests are served from memory
+dashboard_snapshot = DashboardSnapshot(
+    app,
+    get_real_email_data,
+    {
+        "index": lambda data: render_template('index.html', data=data),
+        "dashboard": lambda data: render_template('dashboard.html', data=data),
+        "public": lambda data: render_template('public.html', data=data),
+    },
+    interval=float(os.environ.get("DASHBOARD_REFRESH_INTERVAL", 30)),
+)
+
 @app.route('/')
 def index():
     """Main dashboard page"""
-    try:
-        data = get_real_email_data()
-        return render_template('index.html', data=data)
-    except Exception as e:
-        return render_template('index.html', data=get_real_email_data())
+    return dashboard_snapshot.page_response("index")
 
 @app.route('/dashboard')
 def dashboard():
     """Dashboard route"""
-    try:
-        data = get_real_email_data()
-        return render_template('dashboard.html', data=data)
-    except Exception as e:
-        return render_template('dashboard.html', data=get_real_email_data())
+    return dashboard_snapshot.page_response("dashboard")
 
 @app.route('/public')
 def public():
     """Public dashboard route"""
-    try:
-        data = get_real_email_data()
-        return render_template('public.html', data=data)
-    except Exception as e:
-        return render_template('public.html', data=get_real_email_data())
+    return dashboard_snapshot.page_response("public")
 
 @app.route('/api/emails')
 def api_emails():
     """API endpoint to get email data"""
     try:
-        data = get_real_email_data()
-        return jsonify(data)
+        return dashboard_snapshot.emails_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -155,7 +156,7 @@ def api_emails():
 def api_status():
     """API endpoint to get system status"""
     try:
-        data = get_real_email_data()
+        data = dashboard_snapshot.current().data
         status = {
             "app_name": app.config['APP_NAME'],
             "agent_inbox_status": "active",
@@ -206,11 +207,7 @@ def health_check():
 @app.route('/agent-inbox')
 def agent_inbox():
     """Agent Inbox interface route"""
-    try:
-        data = get_real_email_data()
-        return render_template('dashboard.html', data=data)
-    except Exception as e:
-        return render_template('dashboard.html', data=get_real_email_data())
+    return dashboard_snapshot.page_response("dashboard")
 
 if __name__ == '__main__':
     print(f"🚀 Starting {app.config['APP_NAME']}")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+In-memory index over the dashboard emails for the paginated /api/emails
+
+Emails are kept newest first (timestamp, then id) with a sorted position list
+per status, priority and tool_called value, so a filtered page is read from the
+shortest matching list instead of scanning every email. Pages use keyset
+cursors (the timestamp and id of the last email returned): a cursor stays
+valid when the snapshot is rebuilt, and new mail never shifts later pages.
+
+Timestamps are compared as ISO 8601 strings, so ``since``/``until`` must use the
+same format as the data (e.g. ``2025-08-11T15:25:00Z``).
+"""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+FACETS = ("status", "priority", "tool_called")
+
+# Fields returned when the request does not ask for others
+DEFAULT_FIELDS = ("id", "subject", "from", "status", "priority", "tool_called", "timestamp")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Encode a (timestamp, id) key as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor made by encode_cursor."""
+    try:
+        timestamp, email_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(timestamp), str(email_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+class EmailIndex:
+    """Newest-first email list with per-facet position lists."""
+
+    def __init__(self, emails: Sequence[Dict]):
+        self.emails = sorted(emails, key=self._key, reverse=True)
+        # Ascending keys and timestamps for bisect
+        self._ascending_keys = [self._key(email) for email in reversed(self.emails)]
+        self._ascending_timestamps = [key[0] for key in self._ascending_keys]
+        self._postings: Dict[str, Dict[str, List[int]]] = {facet: defaultdict(list) for facet in FACETS}
+        for position, email in enumerate(self.emails):
+            for facet in FACETS:
+                self._postings[facet][str(email.get(facet, ""))].append(position)
+
+    @staticmethod
+    def _key(email: Dict) -> Tuple[str, str]:
+        return str(email.get("timestamp") or ""), str(email.get("id", ""))
+
+    def _descending_start(self, ascending_count: int) -> int:
+        """Position (newest first) of the first email after the ``ascending_count`` oldest ones."""
+        return len(self.emails) - ascending_count
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Sequence[str]]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        fields: Optional[Sequence[str]] = DEFAULT_FIELDS,
+    ) -> Dict:
+        """Return one page of emails matching the filters, newest first.
+
+        Args:
+            filters: Facet -> accepted values (any of them matches)
+            since: Oldest timestamp to include
+            until: Newest timestamp to include
+            cursor: ``next_cursor`` of the previous page
+            limit: Page size (capped at MAX_LIMIT)
+            fields: Fields to return per email (None = all)
+
+        Returns:
+            ``emails`` and ``next_cursor`` (None on the last page)
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        # Window of positions allowed by the time range and the cursor
+        start = 0
+        end = len(self.emails)
+        if until is not None:
+            start = self._descending_start(bisect_right(self._ascending_timestamps, until))
+        if since is not None:
+            end = self._descending_start(bisect_left(self._ascending_timestamps, since))
+        if cursor:
+            start = max(start, self._descending_start(bisect_left(self._ascending_keys, decode_cursor(cursor))))
+
+        candidates: Optional[List[int]] = None
+        other_sets = []
+        for facet, values in (filters or {}).items():
+            if facet not in FACETS:
+                raise ValueError(f"Unknown filter: {facet}")
+            postings = sorted({p for value in values for p in self._postings[facet].get(value, [])})
+            if candidates is None or len(postings) < len(candidates):
+                if candidates is not None:
+                    other_sets.append(set(candidates))
+                candidates = postings
+            else:
+                other_sets.append(set(postings))
+
+        if candidates is None:
+            positions = range(start, end)
+        else:
+            positions = candidates[bisect_left(candidates, start):bisect_left(candidates, end)]
+
+        page = []
+        for position in positions:
+            if all(position in other for other in other_sets):
+                page.append(position)
+                if len(page) > limit:
+                    break
+
+        has_more = len(page) > limit
+        page = page[:limit]
+        emails = [self.emails[position] for position in page]
+        if fields is not None:
+            emails = [{field: email[field] for field in fields if field in email} for email in emails]
+        return {
+            "emails": emails,
+            "next_cursor": encode_cursor(self._key(self.emails[page[-1]])) if has_more else None,
+        }
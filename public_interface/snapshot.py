@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Precomputed dashboard snapshots for the Flask apps
+
+Building the dashboard data and rendering the page used to happen on every
+request. A DashboardSnapshot does it on a background thread every ``interval``
+seconds and keeps the result in memory: the data dict, an EmailIndex over its
+emails (paginated /api/emails, see email_index.py) and each rendered page.
+Requests are answered from the current snapshot with an ETag and Last-Modified
+header, so repeat visits get a 304 without a body, and gzip-compressed when the
+client accepts it.
+
+The ETag only changes when the data does: fields that are just the build time
+(``VOLATILE_KEYS``) are left out of the hash, and an unchanged rebuild keeps the
+previous snapshot and its Last-Modified time.
+
+Open pages can also follow the snapshot over server-sent events (``event_response``):
+each new snapshot is pushed as a ``delta`` event holding the changed statistics and
+only the email rows that were added, changed or removed. The SSE event id is the
+snapshot ETag, so a client that reconnects with an outdated id (or a page built
+from an older snapshot) first receives a full ``reset`` event.
+
+Each stream ends after ``STREAM_LIFETIME`` seconds and tells the browser (SSE
+``retry:``) to reconnect shortly after, with its last event id, so no request holds a
+worker or a serverless invocation open indefinitely. Deltas are only pushed by a
+long-running server where the refresher thread keeps going between requests; on
+Vercel (``@vercel/python``) the thread does not run between invocations, so a
+reconnecting client only catches up with the snapshot built for its own request.
+"""
+
+import gzip
+import hashlib
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+from flask import Flask, Response, request
+
+from email_index import DEFAULT_FIELDS, DEFAULT_LIMIT, FACETS, EmailIndex
+
+# Keys that change on every build without the data changing
+VOLATILE_KEYS = ("last_updated", "refresh_timestamp")
+
+# Smaller bodies are sent uncompressed
+GZIP_MIN_SIZE = 1024
+
+# Seconds between SSE keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+
+# Seconds a single SSE stream stays open before the client is told to reconnect
+STREAM_LIFETIME = 300.0
+
+# Milliseconds the browser waits before reconnecting a closed stream (SSE ``retry:``)
+RECONNECT_DELAY_MS = 3000
+
+# Undelivered events kept per subscriber before it is dropped (it reconnects and resets)
+SUBSCRIBER_BACKLOG = 32
+
+def snapshot_etag(data: Dict) -> str:
+    """Return the ETag of a data dict (its hash without the ``VOLATILE_KEYS``)."""
+    stable = {key: value for key, value in data.items() if key not in VOLATILE_KEYS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode()).hexdigest()
+
+def diff_snapshots(old: Dict, new: Dict) -> Dict:
+    """Return the statistics and email rows that differ between two data dicts.
+
+    Returns:
+        ``statistics`` (key -> {"value", "delta"}), ``upserted`` (changed or new
+        rows), ``removed`` (row ids) and ``order`` (row ids of the new data)
+    """
+    old_stats, new_stats = old.get("statistics", {}), new.get("statistics", {})
+    statistics = {}
+    for key, value in new_stats.items():
+        previous = old_stats.get(key)
+        if value != previous:
+            numeric = isinstance(value, (int, float)) and isinstance(previous, (int, float))
+            statistics[key] = {"value": value, "delta": value - previous if numeric else None}
+
+    old_rows = {str(email.get("id")): email for email in old.get("emails", [])}
+    new_rows = {str(email.get("id")): email for email in new.get("emails", [])}
+    return {
+        "statistics": statistics,
+        "upserted": [email for row_id, email in new_rows.items() if old_rows.get(row_id) != email],
+        "removed": [row_id for row_id in old_rows if row_id not in new_rows],
+        "order": list(new_rows),
+    }
+
+def format_sse(event: str, data: Dict, event_id: Optional[str] = None) -> str:
+    """Format one server-sent event."""
+    lines = [f"event: {event}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One immutable build of the dashboard."""
+
+    data: Dict
+    index: EmailIndex
+    pages: Dict[str, str]
+    etag: str
+    last_modified: datetime
+    built_at: float
+
+class DashboardSnapshot:
+    """Keep a precomputed dashboard snapshot fresh on a background thread.
+
+    Args:
+        app: Flask app (pages are rendered inside its app context)
+        build_data: Returns the dashboard data dict
+        renderers: Page name -> function rendering the page HTML from the data
+        interval: Seconds between rebuilds
+        row_renderer: Renders one email row; when set, SSE rows carry their HTML
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        build_data: Callable[[], Dict],
+        renderers: Dict[str, Callable[[Dict], str]],
+        interval: float = 30.0,
+        row_renderer: Optional[Callable[[Dict], str]] = None,
+    ):
+        self.app = app
+        self.build_data = build_data
+        self.renderers = renderers
+        self.interval = interval
+        self.row_renderer = row_renderer
+        self._subscribers: List[queue.Queue] = []
+        self._subscribers_lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Snapshot:
+        """Rebuild the snapshot now and return the current one."""
+        with self._build_lock:
+            data = self.build_data()
+            etag = snapshot_etag(data)
+            current = self._snapshot
+            if current is not None and current.etag == etag:
+                # Same data: keep the rendered pages and Last-Modified
+                self._snapshot = Snapshot(current.data, current.index, current.pages, etag, current.last_modified, time.time())
+                return self._snapshot
+
+            with self.app.app_context():
+                pages = {name: render(data) for name, render in self.renderers.items()}
+            previous = current
+            self._snapshot = Snapshot(
+                data=data,
+                index=EmailIndex(data.get("emails", [])),
+                pages=pages,
+                etag=etag,
+                # HTTP dates have second resolution
+                last_modified=datetime.now(timezone.utc).replace(microsecond=0),
+                built_at=time.time(),
+            )
+            if previous is not None:
+                delta = diff_snapshots(previous.data, data)
+                self._publish(format_sse("delta", self._with_row_html(delta), etag))
+            return self._snapshot
+
+    def current(self) -> Snapshot:
+        """Return the current snapshot, building the first one if needed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.start()
+            snapshot = self._snapshot or self.refresh()
+        return snapshot
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                print(f"Error refreshing dashboard snapshot: {e}")
+
+    def start(self) -> None:
+        """Start the refresher thread (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="dashboard-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refresher thread."""
+        self._stop.set()
+
+    def _with_row_html(self, payload: Dict) -> Dict:
+        if self.row_renderer is None:
+            return payload
+        with self.app.app_context():
+            rows = [{**row, "html": self.row_renderer(row)} for row in payload["upserted"]]
+        return {**payload, "upserted": rows}
+
+    def _publish(self, event: str) -> None:
+        with self._subscribers_lock:
+            for subscriber in list(self._subscribers):
+                if subscriber.qsize() >= SUBSCRIBER_BACKLOG:
+                    # Too slow: end its stream, the browser reconnects and gets a reset
+                    self._subscribers.remove(subscriber)
+                    subscriber.put(None)
+                else:
+                    subscriber.put(event)
+
+    def subscribe(self) -> queue.Queue:
+        """Register a queue that receives every delta event."""
+        subscriber: queue.Queue = queue.Queue()
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._subscribers_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def event_stream(
+        self,
+        since: Optional[str] = None,
+        heartbeat: float = HEARTBEAT_INTERVAL,
+        lifetime: float = STREAM_LIFETIME,
+    ) -> Iterator[str]:
+        """Yield SSE messages: a reset if ``since`` is not the current ETag, then deltas.
+
+        Args:
+            since: Snapshot ETag the client already shows
+            heartbeat: Seconds between keep-alive comments
+            lifetime: Seconds before the stream ends (the browser reconnects)
+        """
+        deadline = time.monotonic() + lifetime
+        subscriber = self.subscribe()
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            snapshot = self.current()
+            if since != snapshot.etag:
+                reset = diff_snapshots({}, snapshot.data)
+                yield format_sse("reset", self._with_row_html(reset), snapshot.etag)
+            else:
+                # Still tell the client the stream is live
+                yield ": connected\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = subscriber.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.unsubscribe(subscriber)
+
+    def event_response(self) -> Response:
+        """Serve the snapshot's change stream as ``text/event-stream``."""
+        since = request.headers.get("Last-Event-ID") or request.args.get("since")
+        response = Response(self.event_stream(since), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        # Stop proxies (nginx) from buffering the stream
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    def _conditional(self, body: str, mimetype: str, snapshot: Snapshot, name: str) -> Response:
+        data = body.encode()
+        # One tag per representation of the same data
+        etag = f"{snapshot.etag}-{name}"
+        compress = len(data) >= GZIP_MIN_SIZE and "gzip" in request.accept_encodings
+        if compress:
+            data = gzip.compress(data, compresslevel=6)
+            etag += "-gzip"
+        response = Response(data, mimetype=mimetype)
+        if compress:
+            response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        response.set_etag(etag)
+        response.last_modified = snapshot.last_modified
+        # Let browsers cache, but revalidate every time (cheap 304)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def page_response(self, name: str) -> Response:
+        """Serve a rendered page of the current snapshot."""
+        snapshot = self.current()
+        return self._conditional(snapshot.pages[name], "text/html", snapshot, name)
+
+    def emails_response(self) -> Response:
+        """Serve one page of the snapshot's emails.
+
+        Query parameters: ``status``, ``priority`` and ``tool_called`` (comma
+        separated values), ``since``/``until`` (ISO timestamps), ``cursor``,
+        ``limit`` and ``fields`` (comma separated, ``*`` for all). The other keys
+        of the data dict (statistics, source, ...) are returned unchanged.
+        """
+        snapshot = self.current()
+        args = request.args
+        fields = args.get("fields")
+        try:
+            page = snapshot.index.query(
+                filters={facet: args[facet].split(",") for facet in FACETS if args.get(facet)},
+                since=args.get("since"),
+                until=args.get("until"),
+                cursor=args.get("cursor"),
+                limit=int(args.get("limit", DEFAULT_LIMIT)),
+                fields=None if fields == "*" else fields.split(",") if fields else DEFAULT_FIELDS,
+            )
+        except ValueError as e:
+            return Response(json.dumps({"error": str(e)}), status=400, mimetype="application/json")
+
+        metadata = {key: value for key, value in snapshot.data.items() if key != "emails"}
+        body = json.dumps({**metadata, **page}, separators=(",", ":"), default=str)
+        query = hashlib.sha1(request.query_string).hexdigest()[:12]
+        return self._conditional(body, "application/json", snapshot, f"emails-{query}")
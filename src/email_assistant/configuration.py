@@ -8,7 +8,19 @@ from langchain_core.runnables import RunnableConfig
 
 @dataclass(kw_only=True)
 class Configuration:
-    """Placeholder for configuration."""
+    """Configurable parameters, read from environment variables or the run's configurable.
+
+    Set per assistant (e.g. {"configurable": {"timezone": "Europe/Berlin"}}) to give
+    each user their own calendar settings.
+    """
+
+    # User's time zone for calendar availability
+    timezone: str = "America/Los_Angeles"
+    # Working hours (HH:MM) used to compute free calendar slots
+    work_start: str = "09:00"
+    work_end: str = "17:00"
+    # Working weekdays as comma-separated numbers, Monday=0 ... Sunday=6
+    work_days: str = "0,1,2,3,4"
 
     @classmethod
     def from_runnable_config(
@@ -4,24 +4,39 @@ import asyncio
 from typing import Dict, Any, TypedDict
 from dataclasses import dataclass, field
 from langgraph.graph import StateGraph, START, END
+from email_assistant.lease import LEASE_HELD
+from email_assistant.tools.gmail.mailbox_registry import parse_shard
 from email_assistant.tools.gmail.run_ingest import fetch_and_process_emails
 
 @dataclass(kw_only=True)
 class JobKickoff:
-    """State for the email ingestion cron job"""
-    email: str
+    """State for the email ingestion cron job (set either email or registry)"""
+    email: str = ""
+    registry: str = ""
+    workers: int = 4
+    shard: str = ""
+    max_threads: int = 0
     minutes_since: int = 60
     graph_name: str = "email_assistant_hitl_memory_gmail"
     url: str = "http://127.0.0.1:2024"
     include_read: bool = False
+    include_triaged: bool = False
+    inbox_only: bool = False
+    category: list[str] = field(default_factory=list)
+    exclude_category: list[str] = field(default_factory=list)
+    debounce_seconds: int = 0
     rerun: bool = False
     early: bool = False
     skip_filters: bool = False
 
 async def main(state: JobKickoff):
     """Run the email ingestion process"""
+    if not state.email and not state.registry:
+        print("JobKickoff needs an email or a registry")
+        return {"status": "error", "error": "JobKickoff needs an email or a registry"}
+    
     print(f"Kicking off job to fetch emails from the past {state.minutes_since} minutes")
-    print(f"Email: {state.email}")
+    print(f"Email: {state.email or 'every mailbox in ' + state.registry}")
     print(f"URL: {state.url}")
     print(f"Graph name: {state.graph_name}")
     
@@ -35,10 +50,19 @@ async def main(state: JobKickoff):
         
         args = Args(
             email=state.email,
+            registry=state.registry or None,
+            workers=state.workers,
+            shard=parse_shard(state.shard) if state.shard else None,
+            max_threads=state.max_threads,
             minutes_since=state.minutes_since,
             graph_name=state.graph_name,
             url=state.url,
             include_read=state.include_read,
+            include_triaged=state.include_triaged,
+            inbox_only=state.inbox_only,
+            category=state.category,
+            exclude_category=state.exclude_category,
+            debounce_seconds=state.debounce_seconds,
             rerun=state.rerun,
             early=state.early,
             skip_filters=state.skip_filters
@@ -53,6 +77,10 @@ async def main(state: JobKickoff):
         result = await fetch_and_process_emails(args)
         print(f"fetch_and_process_emails returned: {result}")
         
+        # A previous tick (or the ingest daemon) is still ingesting this mailbox
+        if result == LEASE_HELD:
+            return {"status": "skipped", "exit_code": result}
+        
         # Return the result status
         return {"status": "success" if result == 0 else "error", "exit_code": result}
     except Exception as e:
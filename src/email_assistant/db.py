@@ -0,0 +1,105 @@
+"""Shared SQLite helpers for the durable local stores.
+
+Every local store in the package (long-term memory, outbox, label queue, ...)
+keeps its data in a SQLite file opened through ``connect`` so they all get the
+same concurrency settings: WAL journaling, a busy timeout so writers from other
+processes wait instead of failing, and one connection per thread.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+# Seconds a connection waits on a lock held by another process before failing
+BUSY_TIMEOUT = 30.0
+
+def data_dir() -> Path:
+    """Return the directory holding the local databases, creating it if needed.
+
+    The location can be overridden with the EMAIL_ASSISTANT_DATA_DIR environment variable.
+    """
+    path = Path(os.getenv("EMAIL_ASSISTANT_DATA_DIR", Path.home() / ".email_assistant"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def default_db_path(name: str) -> Path:
+    """Return the default path of the database file called ``name``."""
+    return data_dir() / name
+
+def connect(path: Union[str, Path]) -> sqlite3.Connection:
+    """Open a SQLite connection configured for multi-process access.
+
+    Args:
+        path: Database file path, or ":memory:"
+
+    Returns:
+        A connection in autocommit mode (transactions are opened explicitly)
+    """
+    if str(path) != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        str(path),
+        timeout=BUSY_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+class ThreadLocalConnection:
+    """Hand out one SQLite connection per thread for a single database file."""
+
+    def __init__(self, path: Union[str, Path], schema: Optional[str] = None):
+        self.path = str(path)
+        self.schema = schema
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def get(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        if self.schema is None or self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(self.schema)
+                self._schema_ready = True
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run a block inside a transaction on the calling thread's connection.
+
+        Args:
+            immediate: Take the write lock up front (BEGIN IMMEDIATE) so concurrent
+                writers in other processes serialize instead of deadlocking on upgrade
+        """
+        conn = self.get()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close the calling thread's connection if one is open."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,6 +1,7 @@
 from typing import Literal
 
 from langchain.chat_models import init_chat_model
+from langchain_core.runnables import RunnableConfig
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.store.base import BaseStore
@@ -8,16 +9,19 @@ from langgraph.types import interrupt, Command
 
 from email_assistant.tools import get_tools, get_tools_by_name
 from email_assistant.tools.gmail.prompt_templates import GMAIL_TOOLS_PROMPT
-from email_assistant.tools.gmail.gmail_tools import mark_as_read
+from email_assistant.tools.gmail.gmail_tools import label_triaged, mailbox_config, mark_as_read
+from email_assistant.tools.gmail.message_metadata import remember_email_input
+from email_assistant.tools.gmail.run_counters import GRAPH_SOURCE, get_run_counters
 from email_assistant.prompts import triage_system_prompt, triage_user_prompt, agent_system_prompt_hitl_memory, default_triage_instructions, default_background, default_response_preferences, default_cal_preferences, MEMORY_UPDATE_INSTRUCTIONS, MEMORY_UPDATE_INSTRUCTIONS_REINFORCEMENT
 from email_assistant.schemas import State, RouterSchema, StateInput, UserPreferences
-from email_assistant.utils import parse_gmail, format_for_display, format_gmail_markdown
+from email_assistant.utils import parse_gmail, format_for_display, format_gmail_markdown, hydrate_email_bodies
+from email_assistant.email_bodies import body_marker
 from dotenv import load_dotenv
 
 load_dotenv(".env")
 
 # Get tools with Gmail tools
-tools = get_tools(["send_email_tool", "schedule_meeting_tool", "check_calendar_tool", "Question", "Done"], include_gmail=True)
+tools = get_tools(["send_email_tool", "schedule_meeting_tool", "check_calendar_tool", "find_meeting_slots_tool", "Question", "Done"], include_gmail=True)
 tools_by_name = get_tools_by_name(tools)
 
 # Initialize the LLM for use with router / structured output
@@ -71,13 +75,20 @@ def update_memory(store, namespace, messages):
     result = llm.invoke(
         [
             {"role": "system", "content": MEMORY_UPDATE_INSTRUCTIONS.format(current_profile=user_preferences.value, namespace=namespace)},
-        ] + messages
+        ] + hydrate_email_bodies(messages, store)
     )
     # Save the updated memory to the store
     store.put(namespace, "user_preferences", result.user_preferences)
 
 # Nodes 
-def triage_router(state: State, store: BaseStore) -> Command[Literal["triage_interrupt_handler", "response_agent", "__end__"]]:
+def record_status(email_input: dict, status: str):
+    """Record the email's run status in the dashboard counters (replays are no-ops)."""
+    try:
+        get_run_counters().record(GRAPH_SOURCE, email_input["id"], status)
+    except Exception as e:
+        print(f"Could not record run status: {e}")
+
+def triage_router(state: State, store: BaseStore, config: RunnableConfig) -> Command[Literal["triage_interrupt_handler", "response_agent", "__end__"]]:
     """Analyze email content to decide if we should respond, notify, or ignore.
 
     The triage step prevents the assistant from wasting time on:
@@ -86,14 +97,17 @@ def triage_router(state: State, store: BaseStore) -> Command[Literal["triage_int
     - Messages meant for other teams
     """
     
+    # Record the reply headers so send_email does not have to fetch the original message
+    remember_email_input(state["email_input"])
+
     # Parse the email input
-    author, to, subject, email_thread, email_id = parse_gmail(state["email_input"])
+    author, to, subject, email_thread, email_id = parse_gmail(state["email_input"], store)
     user_prompt = triage_user_prompt.format(
         author=author, to=to, subject=subject, email_thread=email_thread
     )
 
-    # Create email markdown for Agent Inbox in case of notification  
-    email_markdown = format_gmail_markdown(subject, author, to, email_thread, email_id)
+    # Create email markdown for the response agent, keeping a by-reference body out of the persisted messages
+    email_markdown = format_gmail_markdown(subject, author, to, body_marker(state["email_input"]) or email_thread, email_id)
 
     # Search for existing triage_preferences memory
     triage_instructions = get_memory(store, ("email_assistant", "triage_preferences"), default_triage_instructions)
@@ -150,6 +164,16 @@ def triage_router(state: State, store: BaseStore) -> Command[Literal["triage_int
 
     else:
         raise ValueError(f"Invalid classification: {classification}")
+
+    # Label the decision so later polls exclude this email on the Gmail side (in the run's mailbox)
+    try:
+        label_triaged(state["email_input"]["id"], classification, mailbox=mailbox_config(config))
+    except Exception as e:
+        print(f"Could not label email as triaged: {e}")
+
+    # Notify emails are counted as hitl by the interrupt handler
+    if classification != "notify":
+        record_status(state["email_input"], "ignored" if goto == END else "waiting_action")
     
     return Command(goto=goto, update=update)
 
@@ -157,14 +181,15 @@ def triage_interrupt_handler(state: State, store: BaseStore) -> Command[Literal[
     """Handles interrupts from the triage step"""
     
     # Parse the email input
-    author, to, subject, email_thread, email_id = parse_gmail(state["email_input"])
+    author, to, subject, email_thread, email_id = parse_gmail(state["email_input"], store)
 
     # Create email markdown for Agent Inbox in case of notification  
     email_markdown = format_gmail_markdown(subject, author, to, email_thread, email_id)
 
-    # Create messages
+    # Create messages (a by-reference body stays out of the persisted messages)
+    message_markdown = format_gmail_markdown(subject, author, to, body_marker(state["email_input"]) or email_thread, email_id)
     messages = [{"role": "user",
-                "content": f"Email to notify user about: {email_markdown}"
+                "content": f"Email to notify user about: {message_markdown}"
                 }]
 
     # Create interrupt for Agent Inbox
@@ -184,6 +209,7 @@ def triage_interrupt_handler(state: State, store: BaseStore) -> Command[Literal[
     }
 
     # Send to Agent Inbox and wait for response
+    record_status(state["email_input"], "hitl")
     response = interrupt([request])[0]
 
     # If user provides feedback, go to response agent and use feedback to respond to email   
@@ -215,6 +241,8 @@ def triage_interrupt_handler(state: State, store: BaseStore) -> Command[Literal[
     else:
         raise ValueError(f"Invalid response: {response}")
 
+    record_status(state["email_input"], "ignored" if goto == END else "waiting_action")
+
     # Update the state 
     update = {
         "messages": messages,
@@ -242,7 +270,7 @@ def llm_call(state: State, store: BaseStore):
                         cal_preferences=cal_preferences
                     )}
                 ]
-                + state["messages"]
+                + hydrate_email_bodies(state["messages"], store)
             )
         ]
     }
@@ -273,7 +301,7 @@ def interrupt_handler(state: State, store: BaseStore) -> Command[Literal["llm_ca
             
         # Get original email from email_input in state
         email_input = state["email_input"]
-        author, to, subject, email_thread, email_id = parse_gmail(email_input)
+        author, to, subject, email_thread, email_id = parse_gmail(email_input, store)
         original_email_markdown = format_gmail_markdown(subject, author, to, email_thread, email_id)
         
         # Format tool call for display and prepend the original email
@@ -316,6 +344,7 @@ def interrupt_handler(state: State, store: BaseStore) -> Command[Literal["llm_ca
         }
 
         # Send to Agent Inbox and wait for response
+        record_status(state["email_input"], "hitl")
         response = interrupt([request])[0]
 
         # Handle the responses 
@@ -449,6 +478,8 @@ def interrupt_handler(state: State, store: BaseStore) -> Command[Literal["llm_ca
             else:
                 raise ValueError(f"Invalid tool call: {tool_call['name']}")
 
+    record_status(state["email_input"], "ignored" if goto == END else "waiting_action")
+
     # Update the state 
     update = {
         "messages": result,
@@ -469,10 +500,10 @@ def should_continue(state: State, store: BaseStore) -> Literal["interrupt_handle
             else:
                 return "interrupt_handler"
 
-def mark_as_read_node(state: State):
-    email_input = state["email_input"]
-    author, to, subject, email_thread, email_id = parse_gmail(email_input)
-    mark_as_read(email_id)
+def mark_as_read_node(state: State, config: RunnableConfig):
+    # Only the message ID is needed, so the body is never resolved here
+    mark_as_read(state["email_input"]["id"], mailbox=mailbox_config(config))
+    record_status(state["email_input"], "processed")
 
 # Build workflow
 agent_builder = StateGraph(State)
@@ -0,0 +1,121 @@
+"""Content-addressed storage for email bodies.
+
+Raw email bodies (often multi-megabyte HTML) used to travel inside
+``state["email_input"]`` and the formatted markdown in ``messages``, so they were
+written into every checkpoint of every step. Instead, the body is stored once in the
+LangGraph store under its SHA-256 digest and the state only carries the digest:
+
+    email_input = {"from": ..., "to": ..., "subject": ..., "id": ..., "body_ref": "<sha256>",
+                   "preview": "<first words of the body>"}
+
+Nodes resolve the body lazily with ``resolve_body`` when they need it. Readers without
+access to the store (the LangSmith dashboard parser) use the short ``preview``. Inputs
+that still carry a ``body`` field keep working unchanged.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Store namespace holding email bodies, keyed by digest
+BODY_NAMESPACE = ("email_assistant", "email_bodies")
+
+# Placeholder left in message content where the email body belongs
+BODY_MARKER = "[[email_body:{digest}]]"
+BODY_MARKER_RE = re.compile(r"\[\[email_body:([0-9a-f]{64})\]\]")
+
+# Length of the plain-text preview carried next to a body_ref
+PREVIEW_LENGTH = 300
+
+# Bodies are immutable once addressed by digest, so a small process-wide cache is safe
+_CACHE_SIZE = 64
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def body_digest(body: str) -> str:
+    """Return the content address (SHA-256 hex digest) of an email body."""
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+def body_preview(body: str, length: int = PREVIEW_LENGTH) -> str:
+    """Return the first ``length`` characters of a body with whitespace collapsed."""
+    return " ".join(body.split())[:length]
+
+def _remember(digest: str, body: str) -> None:
+    with _cache_lock:
+        _cache[digest] = body
+        _cache.move_to_end(digest)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def put_body(store, body: str) -> str:
+    """Store an email body and return its digest.
+
+    Args:
+        store: LangGraph BaseStore instance
+        body: Raw email body
+
+    Returns:
+        str: SHA-256 digest to carry in state as ``body_ref``
+    """
+    digest = body_digest(body)
+    if store.get(BODY_NAMESPACE, digest) is None:
+        store.put(BODY_NAMESPACE, digest, {"body": body})
+    _remember(digest, body)
+    return digest
+
+def slim_email_input(email_input: dict, store) -> dict:
+    """Replace the ``body`` of an email input with a ``body_ref`` into the store and a preview."""
+    if "body" not in email_input:
+        return email_input
+    slim = {k: v for k, v in email_input.items() if k != "body"}
+    slim["body_ref"] = put_body(store, email_input["body"])
+    slim.setdefault("preview", body_preview(email_input["body"]))
+    return slim
+
+def resolve_body(email_input: dict, store=None) -> str:
+    """Return the body of an email input, loading it from the store if needed.
+
+    Args:
+        email_input: Email input carrying either ``body`` or ``body_ref``
+        store: LangGraph BaseStore instance (required for ``body_ref`` inputs)
+
+    Returns:
+        str: The raw email body
+    """
+    if "body" in email_input:
+        return email_input["body"]
+    return load_body(email_input["body_ref"], store)
+
+def load_body(digest: str, store) -> str:
+    """Load a body by digest, consulting the in-process cache first."""
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+    if store is None:
+        raise ValueError(f"A store is required to resolve email body {digest}")
+    item = store.get(BODY_NAMESPACE, digest)
+    if item is None:
+        raise KeyError(f"Email body {digest} not found in store")
+    body = item.value["body"]
+    _remember(digest, body)
+    return body
+
+def body_marker(email_input: dict) -> Optional[str]:
+    """Return the message placeholder for a by-reference body, or None for inline bodies."""
+    digest = email_input.get("body_ref")
+    return BODY_MARKER.format(digest=digest) if digest else None
+
+def expand_body_markers(text: str, store, render=None) -> str:
+    """Replace body placeholders in ``text`` with the (optionally rendered) bodies."""
+    def replace(match: "re.Match[str]") -> str:
+        body = load_body(match.group(1), store)
+        return render(body) if render else body
+
+    return BODY_MARKER_RE.sub(replace, text)
+
+def has_body_marker(content: Any) -> bool:
+    """Check whether message content contains a body placeholder."""
+    return isinstance(content, str) and BODY_MARKER_RE.search(content) is not None
@@ -0,0 +1,199 @@
+"""
+SQLite leases that keep scheduled ingestion runs from overlapping.
+
+Cron ticks (the ``cron`` graph, the system crontab of setup_cron_agentinbox or
+the resident ingest daemon) could run ingestion for the same mailbox at the same
+time, doubling Gmail quota use and LangGraph runs. A run now has to hold the
+mailbox's lease:
+
+- ``acquire`` takes a free or expired lease in one ``BEGIN IMMEDIATE``
+  transaction, so two processes can never both get it
+- the holder renews it from a heartbeat thread every ``ttl / 3`` seconds; a
+  thread keeps beating while the ingest coroutine blocks the event loop on Gmail
+- a holder that crashed or hung stops renewing, and the lease can be taken over
+  once it has expired. Every acquisition gets a higher ``token``, and a holder
+  whose renewal fails (its lease was taken over) is marked ``lost``
+
+Usage:
+    with hold_lease("ingest:you@example.com") as lease:
+        if lease is None:
+            return  # Another run holds it
+        ...
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+# Seconds a lease stays valid without a heartbeat
+DEFAULT_TTL = 120.0
+
+# Exit code of an ingestion run skipped because the lease is held (EX_TEMPFAIL)
+LEASE_HELD = 75
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    token INTEGER NOT NULL,
+    acquired_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+def default_owner() -> str:
+    """Return a unique owner ID for this process (host, pid and a random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+@dataclass
+class Lease:
+    """A held lease. Use ``start_heartbeat``/``release`` or ``hold_lease``."""
+
+    store: "LeaseStore"
+    name: str
+    owner: str
+    token: int
+    ttl: float
+    _lost: threading.Event = field(default_factory=threading.Event, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, repr=False)
+
+    @property
+    def lost(self) -> bool:
+        """Whether a renewal failed because another owner took the lease over."""
+        return self._lost.is_set()
+
+    def renew(self) -> bool:
+        """Extend the lease by its TTL; marks it lost if it is no longer ours."""
+        if not self.store.renew(self):
+            self._lost.set()
+        return not self.lost
+
+    def _beat(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                if not self.renew():
+                    print(f"Lost lease {self.name}: another run took it over")
+                    return
+            except Exception as e:
+                # Try again on the next beat; the lease only lapses after its TTL
+                print(f"Error renewing lease {self.name}: {str(e)}")
+
+    def start_heartbeat(self, interval: Optional[float] = None) -> None:
+        """Renew the lease from a daemon thread (default: every third of the TTL)."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._beat, args=(interval or self.ttl / 3,), name=f"lease-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def release(self) -> None:
+        """Stop the heartbeat and free the lease if we still hold it."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.store.release(self)
+
+class LeaseStore:
+    """SQLite table of named leases.
+
+    Args:
+        path: Database file. Defaults to ``leases.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("leases.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def acquire(self, name: str, ttl: float = DEFAULT_TTL, owner: Optional[str] = None) -> Optional[Lease]:
+        """Take a lease if it is free or expired.
+
+        Args:
+            name: Lease name, e.g. ``ingest:<email>``
+            ttl: Seconds the lease stays valid without a renewal
+            owner: Owner ID (default: unique per call)
+
+        Returns:
+            The lease, or None if another owner holds it
+        """
+        owner = owner or default_owner()
+        now = time.time()
+        with self._conn.transaction() as conn:
+            row = conn.execute("SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row["expires_at"] > now and row["owner"] != owner:
+                return None
+            if row is not None and row["owner"] != owner:
+                print(f"Taking over lease {name} from {row['owner']} (expired {now - row['expires_at']:.0f}s ago)")
+            token = (row["token"] if row is not None else 0) + 1
+            conn.execute(
+                "INSERT INTO leases (name, owner, token, acquired_at, heartbeat_at, expires_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, token = excluded.token, "
+                "acquired_at = excluded.acquired_at, heartbeat_at = excluded.heartbeat_at, expires_at = excluded.expires_at",
+                (name, owner, token, now, now, now + ttl),
+            )
+        return Lease(self, name, owner, token, ttl)
+
+    def renew(self, lease: Lease) -> bool:
+        """Extend a lease; returns False if it was taken over (or released)."""
+        now = time.time()
+        with self._conn.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE leases SET heartbeat_at = ?, expires_at = ? WHERE name = ? AND owner = ? AND token = ?",
+                (now, now + lease.ttl, lease.name, lease.owner, lease.token),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, lease: Lease) -> None:
+        """Free a lease unless another owner took it over."""
+        with self._conn.transaction() as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ? AND token = ?",
+                (lease.name, lease.owner, lease.token),
+            )
+
+    def holder(self, name: str) -> Optional[Dict]:
+        """Return the current (unexpired) holder of a lease, or None."""
+        row = self._conn.get().execute(
+            "SELECT owner, token, acquired_at, heartbeat_at, expires_at FROM leases WHERE name = ? AND expires_at > ?",
+            (name, time.time()),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+_store: Optional[LeaseStore] = None
+
+def get_lease_store() -> LeaseStore:
+    """Return the process-wide lease store."""
+    global _store
+    if _store is None:
+        _store = LeaseStore()
+    return _store
+
+@contextmanager
+def hold_lease(name: str, ttl: float = DEFAULT_TTL, store: Optional[LeaseStore] = None) -> Iterator[Optional[Lease]]:
+    """Hold a lease with a heartbeat for the duration of a block.
+
+    Yields:
+        The lease, or None if another owner holds it (the block should skip its work)
+    """
+    lease = (store or get_lease_store()).acquire(name, ttl)
+    if lease is None:
+        yield None
+        return
+    lease.start_heartbeat()
+    try:
+        yield lease
+    finally:
+        lease.release()
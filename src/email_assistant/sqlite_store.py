@@ -0,0 +1,283 @@
+"""SQLite-backed long-term memory store.
+
+The memory graphs read and write user preferences through LangGraph's ``BaseStore``.
+``InMemoryStore`` loses everything on restart and cannot be shared between worker
+processes, so self-hosted deployments can compile the graphs with this store instead:
+
+    from email_assistant.sqlite_store import SQLiteStore
+    from email_assistant.email_assistant_hitl_memory import overall_workflow
+
+    store = SQLiteStore("memory.sqlite", ttl_config={"default_ttl": None})
+    graph = overall_workflow.compile(checkpointer=checkpointer, store=store)
+
+Items live in one table keyed by (namespace, key). The database runs in WAL mode and
+every write batch takes the write lock up front, so several processes can run the
+graphs against the same file.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+    TTLConfig,
+)
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    expires_at REAL,
+    ttl_minutes REAL,
+    PRIMARY KEY (prefix, key)
+);
+CREATE INDEX IF NOT EXISTS store_expires_at_idx ON store (expires_at)
+    WHERE expires_at IS NOT NULL;
+"""
+
+# Comparison operators accepted in search filters, matching InMemoryStore
+_FILTER_OPS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+}
+
+def _encode_namespace(namespace: tuple[str, ...]) -> str:
+    # Namespace labels cannot contain periods (BaseStore validates this)
+    return ".".join(namespace)
+
+def _decode_namespace(prefix: str) -> tuple[str, ...]:
+    return tuple(prefix.split("."))
+
+def _matches_filter(value: Any, filter: Optional[dict[str, Any]]) -> bool:
+    if not filter:
+        return True
+    if not isinstance(value, dict):
+        return False
+    for field, expected in filter.items():
+        actual = value.get(field)
+        if isinstance(expected, dict) and expected and all(k in _FILTER_OPS for k in expected):
+            if not all(_FILTER_OPS[op](actual, operand) for op, operand in expected.items()):
+                return False
+        elif actual != expected:
+            return False
+    return True
+
+def _matches_condition(namespace: tuple[str, ...], match_type: str, path: tuple[str, ...]) -> bool:
+    if len(path) > len(namespace):
+        return False
+    labels = namespace[: len(path)] if match_type == "prefix" else namespace[len(namespace) - len(path):]
+    return all(p == "*" or p == label for p, label in zip(path, labels))
+
+class SQLiteStore(BaseStore):
+    """Durable ``BaseStore`` backed by a SQLite file.
+
+    Supports get/put/delete/search/list_namespaces in batches and per-item TTLs.
+    Semantic search is not supported: ``query`` is ignored and results are ordered
+    by most recent update.
+
+    Args:
+        path: Database file. Defaults to ``store.sqlite`` in the data directory.
+        ttl_config: Optional TTL settings (``default_ttl`` and ``refresh_on_read``
+            in minutes, ``sweep_interval_minutes`` for expired-row cleanup).
+    """
+
+    supports_ttl: bool = True
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        ttl_config: Optional[TTLConfig] = None,
+    ) -> None:
+        self.path = str(path or default_db_path("store.sqlite"))
+        self.ttl_config = ttl_config
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+        self._last_sweep = 0.0
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations and return their results in order."""
+        ops = list(ops)
+        self._maybe_sweep()
+        if any(isinstance(op, PutOp) for op in ops):
+            # Writes (and any TTL refreshes) share one transaction holding the write lock
+            with self._conn.transaction(immediate=True) as conn:
+                refresh: list[tuple[str, str]] = []
+                results = [self._apply(conn, op, refresh) for op in ops]
+                self._refresh_ttl(conn, refresh)
+            return results
+
+        # Read-only batches use a deferred transaction for a consistent snapshot and only
+        # take the write lock afterwards if items with a TTL need their expiry extended
+        refresh = []
+        with self._conn.transaction(immediate=False) as conn:
+            results = [self._apply(conn, op, refresh) for op in ops]
+        if refresh:
+            with self._conn.transaction(immediate=True) as conn:
+                self._refresh_ttl(conn, refresh)
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations in a worker thread."""
+        ops = list(ops)
+        return await asyncio.get_running_loop().run_in_executor(None, self.batch, ops)
+
+    def sweep_ttl(self) -> int:
+        """Delete expired items.
+
+        Returns:
+            Number of items removed
+        """
+        with self._conn.transaction(immediate=True) as conn:
+            cursor = conn.execute(
+                "DELETE FROM store WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+        self._last_sweep = time.time()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the calling thread's database connection."""
+        self._conn.close()
+
+    def _maybe_sweep(self) -> None:
+        interval = (self.ttl_config or {}).get("sweep_interval_minutes")
+        if interval and time.time() - self._last_sweep >= interval * 60:
+            self.sweep_ttl()
+
+    def _apply(self, conn, op: Op, refresh: list[tuple[str, str]]) -> Result:
+        if isinstance(op, GetOp):
+            return self._get(conn, op, refresh)
+        if isinstance(op, SearchOp):
+            return self._search(conn, op, refresh)
+        if isinstance(op, ListNamespacesOp):
+            return self._list_namespaces(conn, op)
+        if isinstance(op, PutOp):
+            return self._put(conn, op)
+        raise ValueError(f"Unknown operation type: {type(op)}")
+
+    def _should_refresh(self, op_refresh: bool) -> bool:
+        return op_refresh and (self.ttl_config or {}).get("refresh_on_read", True)
+
+    def _get(self, conn, op: GetOp, refresh: list[tuple[str, str]]) -> Optional[Item]:
+        prefix = _encode_namespace(op.namespace)
+        row = conn.execute(
+            "SELECT * FROM store WHERE prefix = ? AND key = ?"
+            " AND (expires_at IS NULL OR expires_at > ?)",
+            (prefix, op.key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        if row["ttl_minutes"] is not None and self._should_refresh(op.refresh_ttl):
+            refresh.append((prefix, op.key))
+        return self._row_to_item(row, Item)
+
+    def _search(self, conn, op: SearchOp, refresh: list[tuple[str, str]]) -> list[SearchItem]:
+        prefix = _encode_namespace(op.namespace_prefix)
+        if prefix:
+            # Child namespaces sort between "prefix." and "prefix/" ("/" follows "."),
+            # which keeps the lookup on the primary key index
+            sql = "SELECT * FROM store WHERE (prefix = ? OR (prefix >= ? AND prefix < ?))"
+            params: list[Any] = [prefix, f"{prefix}.", f"{prefix}/"]
+        else:
+            sql = "SELECT * FROM store WHERE 1"
+            params = []
+        sql += " AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at DESC"
+        params.append(time.time())
+        if not op.filter:
+            # Without a filter the database can apply the pagination itself
+            sql += " LIMIT ? OFFSET ?"
+            params += [op.limit, op.offset]
+        rows = conn.execute(sql, params).fetchall()
+
+        items = []
+        for row in rows:
+            item = self._row_to_item(row, SearchItem)
+            if _matches_filter(item.value, op.filter):
+                items.append((row, item))
+        if op.filter:
+            items = items[op.offset: op.offset + op.limit]
+
+        if self._should_refresh(op.refresh_ttl):
+            refresh.extend((row["prefix"], row["key"]) for row, _ in items if row["ttl_minutes"] is not None)
+        return [item for _, item in items]
+
+    def _list_namespaces(self, conn, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        rows = conn.execute(
+            "SELECT DISTINCT prefix FROM store WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),),
+        ).fetchall()
+        namespaces = set()
+        for row in rows:
+            namespace = _decode_namespace(row["prefix"])
+            if op.match_conditions and not all(
+                _matches_condition(namespace, condition.match_type, tuple(condition.path))
+                for condition in op.match_conditions
+            ):
+                continue
+            if op.max_depth is not None:
+                namespace = namespace[: op.max_depth]
+            namespaces.add(namespace)
+        return sorted(namespaces)[op.offset: op.offset + op.limit]
+
+    def _put(self, conn, op: PutOp) -> None:
+        prefix = _encode_namespace(op.namespace)
+        if op.value is None:
+            conn.execute("DELETE FROM store WHERE prefix = ? AND key = ?", (prefix, op.key))
+            return None
+
+        now = datetime.now(timezone.utc).isoformat()
+        ttl = getattr(op, "ttl", None)
+        expires_at = time.time() + ttl * 60 if ttl is not None else None
+        conn.execute(
+            """
+            INSERT INTO store (prefix, key, value, created_at, updated_at, expires_at, ttl_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (prefix, key) DO UPDATE SET
+                value = excluded.value,
+                updated_at = excluded.updated_at,
+                expires_at = excluded.expires_at,
+                ttl_minutes = excluded.ttl_minutes
+            """,
+            (prefix, op.key, json.dumps(op.value), now, now, expires_at, ttl),
+        )
+        return None
+
+    def _refresh_ttl(self, conn, refresh: list[tuple[str, str]]) -> None:
+        if not refresh:
+            return
+        conn.executemany(
+            "UPDATE store SET expires_at = ? + ttl_minutes * 60"
+            " WHERE prefix = ? AND key = ? AND ttl_minutes IS NOT NULL",
+            [(time.time(), prefix, key) for prefix, key in refresh],
+        )
+
+    @staticmethod
+    def _row_to_item(row, item_cls):
+        return item_cls(
+            namespace=_decode_namespace(row["prefix"]),
+            key=row["key"],
+            value=json.loads(row["value"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+        )
@@ -31,6 +31,7 @@ def get_tools(tool_names: Optional[List[str]] = None, include_gmail: bool = Fals
                 fetch_emails_tool,
                 send_email_tool,
                 check_calendar_tool,
+                find_meeting_slots_tool,
                 schedule_meeting_tool
             )
             
@@ -38,6 +39,7 @@ def get_tools(tool_names: Optional[List[str]] = None, include_gmail: bool = Fals
                 "fetch_emails_tool": fetch_emails_tool,
                 "send_email_tool": send_email_tool,
                 "check_calendar_tool": check_calendar_tool,
+                "find_meeting_slots_tool": find_meeting_slots_tool,
                 "schedule_meeting_tool": schedule_meeting_tool,
             })
         except ImportError:
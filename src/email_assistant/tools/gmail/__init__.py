@@ -4,6 +4,7 @@ from email_assistant.tools.gmail.gmail_tools import (
     fetch_emails_tool,
     send_email_tool,
     check_calendar_tool,
+    find_meeting_slots_tool,
     schedule_meeting_tool
 )
 
@@ -13,6 +14,7 @@ __all__ = [
     "fetch_emails_tool",
     "send_email_tool",
     "check_calendar_tool",
+    "find_meeting_slots_tool",
     "schedule_meeting_tool",
     "GMAIL_TOOLS_PROMPT"
 ]
\ No newline at end of file
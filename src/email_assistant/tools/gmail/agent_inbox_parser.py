@@ -11,158 +11,151 @@ import requests
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+
+import httpx
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from email_assistant.tools.gmail.dashboard_aggregator import DashboardAggregator, agent_inbox_source
+from email_assistant.tools.gmail.priority import get_priority_scorer
+from email_assistant.tools.gmail.run_counters import STATUS_BUCKETS, RunCounters, get_run_counters, status_statistics
+
 load_dotenv()
 
 class AgentInboxParser:
-    """Parser for Agent Inbox data to populate dashboard statistics."""
+    """Parser for Agent Inbox data to populate dashboard statistics.
     
-    def __init__(self):
+    All dashboard data is derived from a single ``/api/threads`` snapshot that is
+    fetched through the dashboard aggregator (pooled async client, deadline,
+    stale-while-revalidate) and served from memory for ``cache_ttl`` seconds
+    (AGENT_INBOX_CACHE_TTL, default 30). The statistics are counters of the
+    fetched thread statuses: each new snapshot is reconciled into them, so only
+    threads that appeared, changed status or went away are written.
+    """
+    
+    def __init__(
+        self,
+        cache_ttl: Optional[float] = None,
+        timeout: float = 10.0,
+        counters: Optional[RunCounters] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.agent_inbox_url = os.getenv("AGENT_INBOX_URL", "https://dev.agentinbox.ai")
         self.agent_inbox_id = os.getenv("AGENT_INBOX_ID", "email_assistant_hitl_memory_gmail")
         self.api_key = os.getenv("AGENT_INBOX_API_KEY", "")
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("AGENT_INBOX_CACHE_TTL", "30"))
+        self.timeout = timeout
         
         self.headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
+        
+        # Keep-alive connection pool for the health check; thread fetches go through the aggregator
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self.counters = counters or get_run_counters()
+        self.counter_source = f"agent_inbox:{self.agent_inbox_id}"
+        self.aggregator = DashboardAggregator([agent_inbox_source(self)], max_age=self.cache_ttl, transport=transport)
     
-    def get_dashboard_data(self) -> Dict[str, Any]:
-        """Get comprehensive dashboard data from Agent Inbox."""
-        try:
-            # Get basic statistics
-            statistics = self._get_statistics()
-            
-            # Get email threads
-            emails = self._get_email_threads()
-            
-            # Get recent activity
-            recent_activity = self._get_recent_activity()
-            
-            return {
-                "statistics": statistics,
-                "emails": emails,
-                "recent_activity": recent_activity,
-                "last_updated": datetime.now().isoformat(),
-                "source": "agent_inbox"
-            }
+    def get_dashboard_data(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Get comprehensive dashboard data from Agent Inbox.
+        
+        Args:
+            force_refresh: Bypass the snapshot cache
             
-        except Exception as e:
-            print(f"Error fetching dashboard data: {e}")
+        Returns:
+            Dashboard data (statistics, emails, recent activity)
+        """
+        result = self.aggregator.get_source_data("agent_inbox", force_refresh)
+        if result["data"] is None:
+            print(f"Error fetching dashboard data: {result['error']}")
             return self._get_fallback_data()
+        if result["status"] == "stale":
+            # Serve the last good snapshot rather than an empty dashboard
+            return {**result["data"], "stale": True}
+        return result["data"]
     
-    def _get_statistics(self) -> Dict[str, int]:
-        """Get email statistics from Agent Inbox."""
-        try:
-            # Get threads count
-            threads_response = requests.get(
-                f"{self.agent_inbox_url}/api/threads",
-                headers=self.headers
+    @property
+    def threads_url(self) -> str:
+        return f"{self.agent_inbox_url}/api/threads"
+    
+    def build_dashboard_data(self, threads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the dashboard data from fetched threads (the aggregator's agent_inbox source)."""
+        return self._build_snapshot(threads)
+    
+    def _build_snapshot(self, threads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compute the statistics, email list and recent activity from one thread list."""
+        formatted_emails = []
+        self.counters.reconcile(self.counter_source, [
+            (
+                thread.get("thread_id", ""),
+                status if status in STATUS_BUCKETS else "waiting_action",
+                thread.get("timestamp"),
             )
-            
-            if threads_response.status_code == 200:
-                threads_data = threads_response.json()
-                total_threads = len(threads_data.get("threads", []))
-                
-                # Count by status
-                status_counts = {
-                    "processed": 0,
-                    "hitl": 0,
-                    "ignored": 0,
-                    "waiting_action": 0
-                }
-                
-                for thread in threads_data.get("threads", []):
-                    status = thread.get("status", "unknown").lower()
-                    if status in status_counts:
-                        status_counts[status] += 1
-                    else:
-                        status_counts["waiting_action"] += 1
-                
-                return {
-                    "total_emails": total_threads,
-                    "processed": status_counts["processed"],
-                    "hitl": status_counts["hitl"],
-                    "ignored": status_counts["ignored"],
-                    "waiting_action": status_counts["waiting_action"],
-                    "scheduled_meetings": self._count_scheduled_meetings(),
-                    "notifications": self._count_notifications()
-                }
-            
-        except Exception as e:
-            print(f"Error fetching statistics: {e}")
+            for thread in threads
+            for status in [thread.get("status", "unknown").lower()]
+        ])
+        priorities = get_priority_scorer().score_batch(
+            (thread.get("thread_id"), thread.get("subject", ""), thread.get("body", "")) for thread in threads
+        )
+        
+        for thread, priority in zip(threads, priorities):
+            # Format email data for dashboard
+            formatted_emails.append({
+                "id": thread.get("thread_id", ""),
+                "subject": self._format_subject(thread.get("subject", "No Subject")),
+                "from": thread.get("from", "Unknown"),
+                "to": thread.get("to", "Unknown"),
+                "timestamp": thread.get("timestamp", ""),
+                "status": thread.get("status", "unknown"),
+                "priority": priority,
+                "content_preview": self._get_content_preview(thread.get("body", "")),
+                "metadata": thread.get("metadata", {}),
+                "last_updated": thread.get("last_updated", "")
+            })
+        
+        # Sort by timestamp (newest first)
+        formatted_emails.sort(key=lambda x: x["timestamp"], reverse=True)
+        
+        # Most recently updated threads double as the activity feed
+        recent_activity = [
+            {
+                "thread_id": email["id"],
+                "subject": email["subject"],
+                "status": email["status"],
+                "timestamp": email["last_updated"] or email["timestamp"],
+            }
+            for email in sorted(formatted_emails, key=lambda x: x["last_updated"] or x["timestamp"], reverse=True)[:10]
+        ]
         
-        # Return fallback statistics
         return {
-            "total_emails": 0,
-            "processed": 0,
-            "hitl": 0,
-            "ignored": 0,
-            "waiting_action": 0,
-            "scheduled_meetings": 0,
-            "notifications": 0
+            "statistics": {
+                **status_statistics(self.counters.totals(self.counter_source)),
+                "scheduled_meetings": self._count_scheduled_meetings(),
+                "notifications": self._count_notifications()
+            },
+            "emails": formatted_emails[:50],  # Limit to 50 most recent
+            "recent_activity": recent_activity,
+            "last_updated": datetime.now().isoformat(),
+            "source": "agent_inbox"
         }
     
+    def _get_statistics(self) -> Dict[str, int]:
+        """Get email statistics from Agent Inbox."""
+        return self.get_dashboard_data()["statistics"]
+    
     def _get_email_threads(self) -> List[Dict[str, Any]]:
         """Get email threads with formatted data for dashboard."""
-        try:
-            threads_response = requests.get(
-                f"{self.agent_inbox_url}/api/threads",
-                headers=self.headers
-            )
-            
-            if threads_response.status_code == 200:
-                threads_data = threads_response.json()
-                formatted_emails = []
-                
-                for thread in threads_data.get("threads", []):
-                    # Format email data for dashboard
-                    formatted_email = {
-                        "id": thread.get("thread_id", ""),
-                        "subject": self._format_subject(thread.get("subject", "No Subject")),
-                        "from": thread.get("from", "Unknown"),
-                        "to": thread.get("to", "Unknown"),
-                        "timestamp": thread.get("timestamp", ""),
-                        "status": thread.get("status", "unknown"),
-                        "priority": self._determine_priority(thread),
-                        "content_preview": self._get_content_preview(thread.get("body", "")),
-                        "metadata": thread.get("metadata", {}),
-                        "last_updated": thread.get("last_updated", "")
-                    }
-                    
-                    formatted_emails.append(formatted_email)
-                
-                # Sort by timestamp (newest first)
-                formatted_emails.sort(
-                    key=lambda x: x["timestamp"], 
-                    reverse=True
-                )
-                
-                return formatted_emails[:50]  # Limit to 50 most recent
-                
-        except Exception as e:
-            print(f"Error fetching email threads: {e}")
-        
-        return []
+        return self.get_dashboard_data()["emails"]
     
     def _get_recent_activity(self) -> List[Dict[str, Any]]:
         """Get recent activity from Agent Inbox."""
-        try:
-            # Get recent runs or actions
-            activity_response = requests.get(
-                f"{self.agent_inbox_url}/api/activity",
-                headers=self.headers
-            )
-            
-            if activity_response.status_code == 200:
-                activity_data = activity_response.json()
-                return activity_data.get("activities", [])
-                
-        except Exception as e:
-            print(f"Error fetching recent activity: {e}")
-        
-        return []
+        return self.get_dashboard_data()["recent_activity"]
     
     def _format_subject(self, subject: str) -> str:
         """Format email subject for better readability."""
@@ -186,26 +179,7 @@ class AgentInboxParser:
     
     def _determine_priority(self, thread: Dict[str, Any]) -> str:
         """Determine email priority based on content and metadata."""
-        subject = thread.get("subject", "").lower()
-        body = thread.get("body", "").lower()
-        
-        # High priority keywords
-        high_priority = ["urgent", "asap", "emergency", "critical", "important", "deadline"]
-        
-        # Medium priority keywords
-        medium_priority = ["meeting", "call", "schedule", "request", "question"]
-        
-        # Check for high priority
-        for keyword in high_priority:
-            if keyword in subject or keyword in body:
-                return "high"
-        
-        # Check for medium priority
-        for keyword in medium_priority:
-            if keyword in subject or keyword in body:
-                return "medium"
-        
-        return "low"
+        return get_priority_scorer().score(thread.get("subject", ""), thread.get("body", ""), thread.get("thread_id"))
     
     def _get_content_preview(self, content: str, max_length: int = 100) -> str:
         """Get a preview of email content."""
@@ -263,10 +237,9 @@ class AgentInboxParser:
     def test_connection(self) -> Dict[str, Any]:
         """Test connection to Agent Inbox."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.agent_inbox_url}/api/health",
-                headers=self.headers,
-                timeout=10
+                timeout=self.timeout
             )
             
             if response.status_code == 200:
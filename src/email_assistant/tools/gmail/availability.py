@@ -0,0 +1,176 @@
+"""
+Availability engine for Google Calendar data.
+
+Turns calendar events into busy intervals in the user's time zone, merges them in
+O(n log n) and subtracts them from the user's working hours to find free slots.
+Used by check_calendar_tool and the meeting scheduler.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# A half-open [start, end) interval of tz-aware datetimes
+Interval = Tuple[datetime, datetime]
+
+@dataclass(frozen=True)
+class WorkingHours:
+    """A user's working hours in their own time zone."""
+
+    timezone: str = "America/Los_Angeles"
+    start: time = time(9, 0)
+    end: time = time(17, 0)
+    # Working weekdays, Monday=0 ... Sunday=6
+    days: Tuple[int, ...] = (0, 1, 2, 3, 4)
+
+    @property
+    def tzinfo(self) -> ZoneInfo:
+        return ZoneInfo(self.timezone)
+
+    def day_bounds(self, day: date) -> Interval:
+        """Return midnight-to-midnight of ``day`` in the user's time zone."""
+        start = datetime.combine(day, time(0, 0), tzinfo=self.tzinfo)
+        end = datetime.combine(day + timedelta(days=1), time(0, 0), tzinfo=self.tzinfo)
+        return start, end
+
+    def window(self, day: date) -> Optional[Interval]:
+        """Return the working-hours window of ``day``, or None if it is not a working day."""
+        if day.weekday() not in self.days:
+            return None
+        return (
+            datetime.combine(day, self.start, tzinfo=self.tzinfo),
+            datetime.combine(day, self.end, tzinfo=self.tzinfo),
+        )
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "WorkingHours":
+        """Build working hours from a RunnableConfig (see email_assistant.configuration)."""
+        from email_assistant.configuration import Configuration
+
+        configuration = Configuration.from_runnable_config(config)
+        return cls(
+            timezone=configuration.timezone,
+            start=time.fromisoformat(configuration.work_start),
+            end=time.fromisoformat(configuration.work_end),
+            days=tuple(int(d) for d in str(configuration.work_days).split(",") if d.strip()),
+        )
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals.
+
+    Args:
+        intervals: Intervals in any order
+
+    Returns:
+        Sorted, non-overlapping intervals
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_intervals(
+    busy: Iterable[Interval],
+    window_start: datetime,
+    window_end: datetime,
+    min_duration: timedelta = timedelta(0),
+) -> List[Interval]:
+    """Return the gaps between busy intervals inside a window.
+
+    Args:
+        busy: Busy intervals in any order (they are merged first)
+        window_start: Start of the window to search
+        window_end: End of the window to search
+        min_duration: Drop free gaps shorter than this
+
+    Returns:
+        Sorted free intervals
+    """
+    free = []
+    current = window_start
+    for start, end in merge_intervals(busy):
+        if end <= current:
+            continue
+        if start >= window_end:
+            break
+        if start > current:
+            free.append((current, start))
+        current = max(current, end)
+    if current < window_end:
+        free.append((current, window_end))
+    return [(start, end) for start, end in free if end - start >= min_duration and end > start]
+
+def event_interval(event: Dict[str, Any], tz: ZoneInfo) -> Interval:
+    """Convert a Calendar API event into an interval in the given time zone.
+
+    All-day events span midnight-to-midnight of their dates in ``tz``.
+    """
+    start = event["start"].get("dateTime", event["start"].get("date"))
+    end = event["end"].get("dateTime", event["end"].get("date"))
+    if "T" in start:
+        return (
+            datetime.fromisoformat(start.replace("Z", "+00:00")).astimezone(tz),
+            datetime.fromisoformat(end.replace("Z", "+00:00")).astimezone(tz),
+        )
+    return (
+        datetime.combine(date.fromisoformat(start), time(0, 0), tzinfo=tz),
+        datetime.combine(date.fromisoformat(end), time(0, 0), tzinfo=tz),
+    )
+
+def is_all_day(event: Dict[str, Any]) -> bool:
+    """Check whether a Calendar API event is an all-day event."""
+    return "dateTime" not in event["start"]
+
+@dataclass
+class DayAvailability:
+    """Events and free working-hour slots of one day."""
+
+    day: date
+    # (start, end, summary, all_day) for each event overlapping the day
+    events: List[Tuple[datetime, datetime, str, bool]] = field(default_factory=list)
+    busy: List[Interval] = field(default_factory=list)
+    free: List[Interval] = field(default_factory=list)
+    working_day: bool = True
+
+    @property
+    def has_all_day_event(self) -> bool:
+        return any(all_day for _, _, _, all_day in self.events)
+
+def day_availability(
+    events: Iterable[Dict[str, Any]],
+    day: date,
+    hours: WorkingHours,
+    min_duration: timedelta = timedelta(0),
+) -> DayAvailability:
+    """Compute the availability of one day from Calendar API events.
+
+    Args:
+        events: Calendar API events (may include events on other days)
+        day: Day to compute, interpreted in the user's time zone
+        hours: The user's working hours
+        min_duration: Drop free slots shorter than this
+
+    Returns:
+        DayAvailability with the day's events, merged busy intervals and free slots
+    """
+    tz = hours.tzinfo
+    day_start, day_end = hours.day_bounds(day)
+    result = DayAvailability(day=day)
+    for event in events:
+        start, end = event_interval(event, tz)
+        if start < day_end and end > day_start:
+            result.events.append((start, end, event.get("summary", "(No title)"), is_all_day(event)))
+    result.events.sort(key=lambda e: e[0])
+    result.busy = merge_intervals((start, end) for start, end, _, _ in result.events)
+
+    window = hours.window(day)
+    if window is None:
+        result.working_day = False
+        return result
+    result.free = free_intervals(result.busy, window[0], window[1], min_duration)
+    return result
@@ -0,0 +1,177 @@
+"""
+Local Google Calendar event cache kept fresh with incremental sync.
+
+The response agent often checks the same days several times within one run, and
+each check used to be a full ``events.list`` range query. The cache does one full
+sync per calendar and account over a bounded window (a short lookback to a few
+weeks ahead, so recurring events expand to a finite set), keeps the events in memory and
+afterwards only asks the API for changes using the ``nextSyncToken`` from the
+previous sync. Reads are answered from memory as long as the last sync is younger
+than ``max_staleness``; older data triggers an incremental sync first.
+
+If the sync token expires (HTTP 410 Gone) the cache is cleared and a full sync runs.
+Queries outside the synced window return None so the caller can fall back to a
+direct range query; once half of the look-ahead has elapsed, the next sync is a
+full sync of a fresh window.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from email_assistant.tools.gmail.availability import event_interval
+
+logger = logging.getLogger(__name__)
+
+# Serve reads from memory for this long after a sync (seconds)
+DEFAULT_MAX_STALENESS = 60.0
+
+# The full sync starts this far in the past
+DEFAULT_LOOKBACK = timedelta(days=1)
+
+# ... and ends this far in the future
+DEFAULT_LOOKAHEAD = timedelta(days=60)
+
+class CalendarEventCache:
+    """In-memory copy of one calendar's events, synced with sync tokens."""
+
+    def __init__(
+        self,
+        calendar_id: str = "primary",
+        max_staleness: float = DEFAULT_MAX_STALENESS,
+        lookback: timedelta = DEFAULT_LOOKBACK,
+        lookahead: timedelta = DEFAULT_LOOKAHEAD,
+    ):
+        self.calendar_id = calendar_id
+        self.max_staleness = max_staleness
+        self.lookback = lookback
+        self.lookahead = lookahead
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._sync_token: Optional[str] = None
+        self._synced_from: Optional[datetime] = None
+        self._synced_until: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "full_syncs": 0, "incremental_syncs": 0}
+
+    def _list(self, service, **params) -> str:
+        """Page through events.list, apply every item and return the next sync token."""
+        page_token = None
+        while True:
+            response = (
+                service.events()
+                .list(
+                    calendarId=self.calendar_id,
+                    singleEvents=True,
+                    maxResults=2500,
+                    pageToken=page_token,
+                    **params,
+                )
+                .execute()
+            )
+            self._apply(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return response.get("nextSyncToken")
+
+    def _apply(self, items: List[Dict[str, Any]]) -> None:
+        for event in items:
+            if event.get("status") == "cancelled":
+                self._events.pop(event["id"], None)
+            else:
+                self._events[event["id"]] = event
+
+    def _full_sync(self, service) -> None:
+        self._events.clear()
+        now = datetime.now(timezone.utc)
+        synced_from, synced_until = now - self.lookback, now + self.lookahead
+        # Without timeMax, singleEvents expands every recurring series without end.
+        # Incremental syncs may not repeat timeMin/timeMax; changes outside the window are harmless
+        self._sync_token = self._list(service, timeMin=synced_from.isoformat(), timeMax=synced_until.isoformat())
+        self._synced_from = synced_from
+        self._synced_until = synced_until
+        self.stats["full_syncs"] += 1
+
+    def _window_expiring(self) -> bool:
+        return self._synced_until - datetime.now(timezone.utc) < self.lookahead / 2
+
+    def _sync(self, service) -> None:
+        if self._sync_token is None or self._window_expiring():
+            self._full_sync(service)
+        else:
+            try:
+                self._sync_token = self._list(service, syncToken=self._sync_token)
+                self.stats["incremental_syncs"] += 1
+            except Exception as e:
+                # 410 Gone: the sync token expired, start over
+                if getattr(getattr(e, "resp", None), "status", None) != 410:
+                    raise
+                logger.info(f"Sync token for calendar {self.calendar_id} expired, running a full sync")
+                self._full_sync(service)
+        self._synced_at = time.monotonic()
+
+    def refresh(self, service) -> None:
+        """Sync now, regardless of how fresh the cache is."""
+        with self._lock:
+            self._sync(service)
+
+    def events_between(self, service, time_min: datetime, time_max: datetime) -> Optional[List[Dict[str, Any]]]:
+        """Return cached events overlapping [time_min, time_max).
+
+        Args:
+            service: Calendar v3 service, used if the cache has to sync
+            time_min: Start of the range (tz-aware)
+            time_max: End of the range (tz-aware)
+
+        Returns:
+            Events sorted by start time, or None if the range is not inside the
+            synced window and must be queried directly
+        """
+        with self._lock:
+            if self._sync_token is None or time.monotonic() - self._synced_at > self.max_staleness:
+                self._sync(service)
+            else:
+                self.stats["hits"] += 1
+            if time_min < self._synced_from or time_max > self._synced_until:
+                return None
+
+            tz = time_min.tzinfo
+            matches = []
+            for event in self._events.values():
+                start, end = event_interval(event, tz)
+                if start < time_max and end > time_min:
+                    matches.append((start, event))
+            return [event for _, event in sorted(matches, key=lambda match: match[0])]
+
+    def add(self, event: Dict[str, Any]) -> None:
+        """Record an event the assistant just created, ahead of the next sync."""
+        with self._lock:
+            self._apply([event])
+
+    def clear(self) -> None:
+        """Drop all cached events and the sync token."""
+        with self._lock:
+            self._events.clear()
+            self._sync_token = None
+            self._synced_from = None
+            self._synced_until = None
+            self._synced_at = 0.0
+
+_caches: Dict[Tuple[str, str], CalendarEventCache] = {}
+_caches_lock = threading.Lock()
+
+def get_calendar_cache(account: str, calendar_id: str = "primary") -> CalendarEventCache:
+    """Return the process-wide cache for an account's calendar, creating it on first use.
+
+    Args:
+        account: Identifies the credentials the calendar is read with (see
+            service_pool.token_source); "primary" is a different calendar per account
+        calendar_id: Calendar ID
+    """
+    key = (account, calendar_id)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = CalendarEventCache(calendar_id)
+        return _caches[key]
@@ -0,0 +1,286 @@
+"""
+Concurrent dashboard data from LangGraph Platform, LangSmith and Agent Inbox.
+
+Each source used to be queried one after the other, with a 30 second timeout
+each (and LangGraph Platform did a health check before fetching anything). The
+aggregator queries all sources at once, each through its own pooled
+``httpx.AsyncClient``, and waits for each one only until its deadline:
+
+- data younger than ``max_age`` is served from the cache without a request
+- otherwise a refresh is started (one at a time per source) and awaited until
+  the source's deadline
+- a source that misses its deadline or fails is reported with its last good
+  data, marked ``stale``; the refresh keeps running and fills the cache for the
+  next call (stale-while-revalidate)
+
+The parsers still turn the responses into dashboard data; only the HTTP calls
+move here. Their formatting and SQLite work runs in worker threads
+(``asyncio.to_thread``), so one source's parsing never holds up another's
+request. Blocking callers use ``get_dashboard_data`` (every source) or
+``get_source_data`` (one source; the parsers' own ``get_dashboard_data``), which
+run the aggregator on its own event loop thread so background refreshes outlive
+the call.
+
+Usage:
+    python -m email_assistant.tools.gmail.dashboard_aggregator --deadline langsmith=5
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+# Seconds each source may take before its cached data is served instead
+DEFAULT_DEADLINES = {"langgraph_platform": 5.0, "langsmith": 8.0, "agent_inbox": 3.0}
+
+# Cached data younger than this is served without asking the source
+DEFAULT_MAX_AGE = 30.0
+
+# Connection pool of each source's client
+POOL_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+
+# Upper bound of a background refresh request (the deadline only bounds the wait)
+REQUEST_TIMEOUT = 30.0
+
+@dataclass
+class DashboardSource:
+    """One upstream of the dashboard.
+
+    Args:
+        name: Key of the source in the aggregated data
+        fetch: Coroutine turning the source's client into dashboard data
+        deadline: Seconds to wait for fresh data
+        headers: Headers of the source's client
+    """
+
+    name: str
+    fetch: Callable[[httpx.AsyncClient], Awaitable[Dict[str, Any]]]
+    deadline: float
+    headers: Dict[str, str] = field(default_factory=dict)
+
+class DashboardAggregator:
+    """Query dashboard sources concurrently with per-source deadlines.
+
+    Args:
+        sources: Sources to query
+        max_age: Seconds cached data is served without a refresh
+        transport: httpx transport for every client (tests use httpx.MockTransport)
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[DashboardSource],
+        max_age: float = DEFAULT_MAX_AGE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.sources = {source.name: source for source in sources}
+        self.max_age = max_age
+        self.transport = transport
+        # Source name -> (data, UNIX time fetched)
+        self._cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def _client(self, source: DashboardSource) -> httpx.AsyncClient:
+        client = self._clients.get(source.name)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers=source.headers,
+                limits=POOL_LIMITS,
+                timeout=REQUEST_TIMEOUT,
+                transport=self.transport,
+            )
+            self._clients[source.name] = client
+        return client
+
+    async def _refresh(self, source: DashboardSource) -> Dict[str, Any]:
+        data = await source.fetch(self._client(source))
+        self._cache[source.name] = (data, time.time())
+        return data
+
+    def _revalidate(self, source: DashboardSource) -> asyncio.Task:
+        """Return the source's running refresh, starting one if none is running."""
+        task = self._inflight.get(source.name)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._refresh(source))
+            task.add_done_callback(lambda done: self._refresh_finished(source, done))
+            self._inflight[source.name] = task
+        return task
+
+    @staticmethod
+    def _refresh_finished(source: DashboardSource, task: asyncio.Task) -> None:
+        # Retrieve the exception so late failures are reported, not logged as unretrieved
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error refreshing {source.name}: {task.exception()}")
+
+    async def _collect_source(self, source: DashboardSource, force_refresh: bool = False) -> Dict[str, Any]:
+        cached = self._cache.get(source.name)
+        if not force_refresh and cached is not None and time.time() - cached[1] < self.max_age:
+            return {"status": "cached", "data": cached[0], "age": round(time.time() - cached[1], 3)}
+
+        started = time.monotonic()
+        task = self._revalidate(source)
+        # asyncio.wait does not cancel the task: a late refresh still fills the cache
+        done, _ = await asyncio.wait({task}, timeout=source.deadline)
+        if task in done and task.exception() is None:
+            return {"status": "fresh", "data": task.result(), "age": 0.0, "elapsed": round(time.monotonic() - started, 3)}
+
+        if task in done:
+            error = str(task.exception()) or type(task.exception()).__name__
+        else:
+            error = f"missed its {source.deadline:g}s deadline"
+        cached = self._cache.get(source.name)
+        if cached is not None:
+            return {"status": "stale", "data": cached[0], "age": round(time.time() - cached[1], 3), "error": error}
+        return {"status": "unavailable", "data": None, "error": error}
+
+    async def collect(self) -> Dict[str, Any]:
+        """Query every source concurrently and return what arrived within the deadlines.
+
+        Returns:
+            ``sources`` (name -> status, data, age, error) and ``last_updated``
+        """
+        names = list(self.sources)
+        results = await asyncio.gather(*(self._collect_source(self.sources[name]) for name in names))
+        return {"sources": dict(zip(names, results)), "last_updated": datetime.now().isoformat()}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="dashboard-aggregator", daemon=True).start()
+            return self._loop
+
+    def get_dashboard_data(self) -> Dict[str, Any]:
+        """Blocking version of ``collect``, run on the aggregator's event loop thread."""
+        return asyncio.run_coroutine_threadsafe(self.collect(), self._ensure_loop()).result()
+
+    def get_source_data(self, name: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """Return one source's status, data, age and error (blocking).
+
+        Args:
+            name: Source name
+            force_refresh: Refresh even if the cached data is younger than ``max_age``
+        """
+        coroutine = self._collect_source(self.sources[name], force_refresh)
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def close(self) -> None:
+        """Close the clients and stop the event loop thread."""
+        if self._loop is None:
+            return
+
+        async def close_clients():
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+
+        asyncio.run_coroutine_threadsafe(close_clients(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+def agent_inbox_source(parser=None, deadline: float = DEFAULT_DEADLINES["agent_inbox"]) -> DashboardSource:
+    """Agent Inbox threads, formatted by AgentInboxParser."""
+    from email_assistant.tools.gmail.agent_inbox_parser import AgentInboxParser
+
+    parser = parser or AgentInboxParser()
+
+    async def fetch(client: httpx.AsyncClient) -> Dict[str, Any]:
+        response = await client.get(parser.threads_url)
+        response.raise_for_status()
+        return await asyncio.to_thread(parser.build_dashboard_data, response.json().get("threads", []))
+
+    return DashboardSource("agent_inbox", fetch, deadline, headers=parser.headers)
+
+def langsmith_source(parser=None, deadline: float = DEFAULT_DEADLINES["langsmith"]) -> DashboardSource:
+    """Incremental LangSmith run sync (LangSmithParser.sync_steps) over an async client."""
+    from email_assistant.tools.gmail.langsmith_parser import LangSmithParser
+
+    parser = parser or LangSmithParser()
+
+    def step(steps, page=None) -> Optional[Dict[str, Any]]:
+        # StopIteration cannot cross asyncio.to_thread, so the end of the sync is None
+        try:
+            return next(steps) if page is None else steps.send(page)
+        except StopIteration:
+            return None
+
+    async def fetch(client: httpx.AsyncClient) -> Dict[str, Any]:
+        # Each step stores the previous page in SQLite, so it runs off the event loop
+        steps = parser.sync_steps()
+        body = await asyncio.to_thread(step, steps)
+        while body is not None:
+            response = await client.post(parser.search_url, json=body)
+            response.raise_for_status()
+            body = await asyncio.to_thread(step, steps, response.json())
+        return await asyncio.to_thread(parser.build_dashboard_data)
+
+    return DashboardSource("langsmith", fetch, deadline, headers=parser.headers)
+
+def langgraph_platform_source(fetcher=None, deadline: float = DEFAULT_DEADLINES["langgraph_platform"]) -> DashboardSource:
+    """LangGraph Platform threads, summarized by LangGraphPlatformFetcher."""
+    from email_assistant.tools.gmail.langgraph_platform_fetcher import LangGraphPlatformFetcher
+
+    fetcher = fetcher or LangGraphPlatformFetcher()
+
+    async def fetch(client: httpx.AsyncClient) -> Dict[str, Any]:
+        response = await client.get(fetcher.threads_url)
+        response.raise_for_status()
+        return await asyncio.to_thread(fetcher.build_dashboard_data, response.json().get("threads", []))
+
+    return DashboardSource("langgraph_platform", fetch, deadline, headers=fetcher.request_headers)
+
+def default_sources(deadlines: Optional[Dict[str, float]] = None) -> List[DashboardSource]:
+    """Return the configured sources (LangGraph Platform needs LANGSMITH_API_KEY)."""
+    deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+    sources = [
+        agent_inbox_source(deadline=deadlines["agent_inbox"]),
+        langsmith_source(deadline=deadlines["langsmith"]),
+    ]
+    try:
+        sources.append(langgraph_platform_source(deadline=deadlines["langgraph_platform"]))
+    except ValueError as e:
+        print(f"Skipping LangGraph Platform: {e}")
+    return sources
+
+_aggregator: Optional[DashboardAggregator] = None
+
+def get_dashboard_aggregator() -> DashboardAggregator:
+    """Return the process-wide aggregator over the default sources."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = DashboardAggregator(default_sources())
+    return _aggregator
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the dashboard data from every source concurrently")
+    parser.add_argument("--deadline", action="append", default=[], metavar="SOURCE=SECONDS", help="Override a source's deadline (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the full aggregated data")
+    args = parser.parse_args()
+
+    deadlines = {}
+    for item in args.deadline:
+        name, _, seconds = item.partition("=")
+        deadlines[name] = float(seconds)
+
+    aggregator = DashboardAggregator(default_sources(deadlines))
+    started = time.monotonic()
+    data = aggregator.get_dashboard_data()
+    print(f"Collected in {time.monotonic() - started:.2f}s")
+    for name, result in data["sources"].items():
+        print(f"{name:<20}{result['status']:<13}{result.get('error', '')}")
+    if args.json:
+        print(json.dumps(data, indent=2, default=str))
+    aggregator.close()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,60 @@
+"""
+Build Google API clients from bundled discovery documents.
+
+``googleapiclient.discovery.build`` reads (or, for old library versions and
+``static_discovery=False``, downloads) the API's discovery document and parses the
+JSON on every call. google-api-python-client ships the Gmail v1 and Calendar v3
+documents with the library, so this module loads each one once per process,
+keeps the parsed dict and builds clients with ``build_from_document``. Nothing is
+fetched over the network unless the installed library lacks the document.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+logger = logging.getLogger(__name__)
+
+_documents: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+_documents_lock = threading.Lock()
+
+def discovery_document(api: str, version: str) -> Optional[Dict[str, Any]]:
+    """Return the parsed discovery document bundled with googleapiclient.
+
+    Args:
+        api: API name, e.g. "gmail"
+        version: API version, e.g. "v1"
+
+    Returns:
+        The parsed document, or None if the library does not ship it
+    """
+    key = (api, version)
+    with _documents_lock:
+        if key not in _documents:
+            content = get_static_doc(api, version)
+            _documents[key] = json.loads(content) if content else None
+            if content is None:
+                logger.warning(f"No bundled discovery document for {api} {version}")
+        return _documents[key]
+
+def build_service(api: str, version: str, http=None, credentials=None):
+    """Build an API client from the cached discovery document.
+
+    Args:
+        api: API name, e.g. "gmail" or "calendar"
+        version: API version, e.g. "v1" or "v3"
+        http: Authorized transport (mutually exclusive with credentials)
+        credentials: Google credentials (mutually exclusive with http)
+
+    Returns:
+        googleapiclient Resource
+    """
+    document = discovery_document(api, version)
+    if document is None:
+        # Let googleapiclient download the document
+        return build(api, version, http=http, credentials=credentials, cache_discovery=False)
+    return build_from_document(document, http=http, credentials=credentials)
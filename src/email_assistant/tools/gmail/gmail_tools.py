@@ -9,11 +9,23 @@ import base64
 import email.utils
 import json
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict, Any, Iterator
+import threading
+from datetime import date, datetime
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Tuple
 from pathlib import Path
 from pydantic import Field, BaseModel
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+
+from email_assistant.tools.gmail.availability import WorkingHours, day_availability
+from email_assistant.tools.gmail.calendar_cache import get_calendar_cache
+from email_assistant.tools.gmail.label_queue import LabelFlusher, get_label_queue
+from email_assistant.tools.gmail.mailbox_registry import mailbox_from_config, mailbox_run_config
+from email_assistant.tools.gmail.message_metadata import get_metadata_store
+from email_assistant.tools.gmail.outbox import SENT, OutboxWorker, PermanentSendError, get_outbox
+from email_assistant.tools.gmail.query_planner import IngestQueryConfig, build_gmail_query
+from email_assistant.tools.gmail.slot_finder import find_meeting_slots, format_candidate_slots
+from email_assistant.tools.gmail.triage_labels import resolve_label_ids, triage_label_name
 
 # Setup basic logging
 logging.basicConfig(level=logging.INFO)
@@ -28,12 +40,14 @@ _SECRETS_DIR = _ROOT / ".secrets"
 try:
     import logging
     from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
     from email.mime.text import MIMEText
     from datetime import timedelta
     from dateutil.parser import parse as parse_time
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from google.auth.transport.requests import Request
+    from email_assistant.tools.gmail.service_pool import get_pooled_credentials, get_service, token_source
     
     # Setup logging
     logging.basicConfig(level=logging.INFO)
@@ -153,6 +167,8 @@ def fetch_group_emails(
     gmail_secret: Optional[str] = None,
     include_read: bool = False,
     skip_filters: bool = False,
+    include_triaged: bool = False,
+    query_config: Optional[IngestQueryConfig] = None,
 ) -> Iterator[Dict[str, Any]]:
     """
     Fetch recent emails from Gmail that involve the specified email address.
@@ -168,6 +184,8 @@ def fetch_group_emails(
         gmail_secret: Optional credentials for Gmail API authentication
         include_read: Whether to include already read emails (default: False)
         skip_filters: Skip thread and sender filtering (return all messages, default: False)
+        include_triaged: Include emails the assistant already triaged (default: False)
+        query_config: Full query config (overrides minutes_since, include_read and include_triaged)
         
     Yields:
         Dict objects containing processed email information
@@ -207,7 +225,7 @@ def fetch_group_emails(
     
     try:
         # Get Gmail API credentials from parameters, environment variables, or local files
-        creds = get_credentials(gmail_token, gmail_secret)
+        creds = get_pooled_credentials(gmail_token, gmail_secret)
         
         # Check if credentials are valid
         if not creds or not hasattr(creds, 'authorize'):
@@ -225,32 +243,24 @@ def fetch_group_emails(
             yield mock_email
             return
             
-        service = build("gmail", "v1", credentials=creds)
-        
-        # Calculate timestamp for filtering
-        after = int((datetime.now() - timedelta(minutes=minutes_since)).timestamp())
-        
-        # Construct Gmail search query
-        # This query searches for:
-        # - Emails sent to or from the specified address
-        # - Emails after the specified timestamp
-        # - Including emails from all categories (inbox, updates, promotions, etc.)
+        service = get_service("gmail", "v1", gmail_token, gmail_secret)
         
-        # Base query with time filter
-        query = f"(to:{email_address} OR from:{email_address}) after:{after}"
-        
-        # Only include unread emails unless include_read is True
-        if not include_read:
-            query += " is:unread"
-        else:
+        # Build the search query; filters that can run on Gmail's side go into the query
+        # (e.g. -from:me, so the user's own sent mail is never listed and fetched)
+        config = query_config or IngestQueryConfig(
+            email_address=email_address,
+            minutes_since=minutes_since,
+            include_read=include_read,
+            include_triaged=include_triaged,
+            # With skip_filters the user's own messages are processed too
+            exclude_self=not skip_filters,
+        )
+        query = build_gmail_query(config)
+        if config.include_read:
             logger.info("Including read emails in search")
             
         # Log the final query for debugging
         logger.info(f"Gmail search query: {query}")
-            
-        # Additional filter options (commented out by default)
-        # If you want to include emails from specific categories, use:
-        # query += " category:(primary OR updates OR promotions)"
         
         # Retrieve all matching messages (handling pagination)
         messages = []
@@ -504,12 +514,97 @@ class SendEmailInput(BaseModel):
         description="Optional additional recipients to include"
     )
 
+def _build_reply_body(
+    service,
+    email_id: str,
+    response_text: str,
+    email_address: str,
+    addn_receipients: Optional[List[str]] = None,
+    message_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the users.messages.send body for a reply (or a new email if email_id is unknown).
+    
+    Raises:
+        HttpError: If the original message could not be fetched for any reason other
+            than Gmail not knowing email_id (e.g. a transient 5xx or rate limit)
+    """
+    try:
+        # Headers recorded at ingest time; only a metadata fetch on a miss
+        original = get_metadata_store().reply_metadata(service, email_id)
+    except HttpError as e:
+        # 404: no such message; 400: email_id is not a message ID (e.g. "NEW_EMAIL")
+        if e.resp.status not in (400, 404):
+            raise
+        logger.warning(f"Original message {email_id} not found, sending a new email. Error: {str(e)}")
+        # Without the original message, create a new message with minimal info
+        subject = "Response"
+        original_from = "recipient@example.com"  # Will be overridden by user input
+        thread_id = None
+    else:
+        # Extract subject with Re: prefix if not already present
+        subject = original["subject"]
+        if not subject.startswith("Re:"):
+            subject = f"Re: {subject}"
+            
+        # Create a reply message
+        original_from = original["from_email"]
+        
+        # Get thread ID from message
+        thread_id = original["thread_id"]
+        
+    # Create a message object
+    msg = MIMEText(response_text)
+    msg["to"] = original_from
+    msg["from"] = email_address
+    msg["subject"] = subject
+    if message_id:
+        msg["Message-ID"] = message_id
+    
+    # Add additional recipients if specified
+    if addn_receipients:
+        msg["cc"] = ", ".join(addn_receipients)
+        
+    # Encode the message
+    raw = base64.urlsafe_b64encode(msg.as_bytes()).decode("utf-8")
+    
+    # Prepare message body
+    body = {"raw": raw}
+    # Only add threadId if it exists
+    if thread_id:
+        body["threadId"] = thread_id
+    return body
+
+def mailbox_token(config: Optional[RunnableConfig] = None) -> Optional[str]:
+    """
+    Return the token of the mailbox a run belongs to.
+    
+    Runs ingested from a mailbox registry name their mailbox and its token source
+    in the run config (see mailbox_registry.mailbox_run_config).
+    
+    Returns:
+        The mailbox's token JSON, or None to use GMAIL_TOKEN / the local token file
+    """
+    mailbox = mailbox_from_config(config)
+    return mailbox.token() if mailbox is not None else None
+
+def mailbox_config(config: Optional[RunnableConfig] = None) -> Optional[Dict[str, str]]:
+    """
+    Return the run config naming the mailbox a run belongs to, to keep with queued work.
+    
+    Returns:
+        The mailbox's ``gmail_account`` and token source (see mailbox_registry.mailbox_run_config),
+        or None for the default mailbox
+    """
+    mailbox = mailbox_from_config(config)
+    return mailbox_run_config(mailbox) if mailbox is not None else None
+
 # Helper function for sending emails
 def send_email(
     email_id: str,
     response_text: str,
     email_address: str,
-    addn_receipients: Optional[List[str]] = None
+    addn_receipients: Optional[List[str]] = None,
+    gmail_token: Optional[str] = None
 ) -> bool:
     """
     Send a reply to an existing email thread or create a new email.
@@ -520,6 +615,7 @@ def send_email(
         response_text: Content of the reply or new email
         email_address: Current user's email address (the sender)
         addn_receipients: Optional additional recipients
+        gmail_token: Optional token of the sending mailbox (default: GMAIL_TOKEN / local token)
         
     Returns:
         Success flag (True if email was sent)
@@ -530,53 +626,9 @@ def send_email(
         return True
         
     try:
-        # Get Gmail API credentials from environment variables or local files
-        creds = get_credentials(
-            gmail_token=os.getenv("GMAIL_TOKEN"),
-            gmail_secret=os.getenv("GMAIL_SECRET")
-        )
-        service = build("gmail", "v1", credentials=creds)
-        
-        try:
-            # Try to get the original message to extract headers
-            message = service.users().messages().get(userId="me", id=email_id).execute()
-            headers = message["payload"]["headers"]
-            
-            # Extract subject with Re: prefix if not already present
-            subject = next(header["value"] for header in headers if header["name"] == "Subject")
-            if not subject.startswith("Re:"):
-                subject = f"Re: {subject}"
-                
-            # Create a reply message
-            original_from = next(header["value"] for header in headers if header["name"] == "From")
-            
-            # Get thread ID from message
-            thread_id = message["threadId"]
-        except Exception as e:
-            logger.warning(f"Could not retrieve original message with ID {email_id}. Error: {str(e)}")
-            # If we can't get the original message, create a new message with minimal info
-            subject = "Response"
-            original_from = "recipient@example.com"  # Will be overridden by user input
-            thread_id = None
-            
-        # Create a message object
-        msg = MIMEText(response_text)
-        msg["to"] = original_from
-        msg["from"] = email_address
-        msg["subject"] = subject
-        
-        # Add additional recipients if specified
-        if addn_receipients:
-            msg["cc"] = ", ".join(addn_receipients)
-            
-        # Encode the message
-        raw = base64.urlsafe_b64encode(msg.as_bytes()).decode("utf-8")
-        
-        # Prepare message body
-        body = {"raw": raw}
-        # Only add threadId if it exists
-        if thread_id:
-            body["threadId"] = thread_id
+        # Reuse the pooled client of the run's mailbox (default: GMAIL_TOKEN / local token)
+        service = get_service("gmail", "v1", gmail_token or os.getenv("GMAIL_TOKEN"), os.getenv("GMAIL_SECRET"))
+        body = _build_reply_body(service, email_id, response_text, email_address, addn_receipients)
             
         # Send the message
         sent_message = (
@@ -596,11 +648,70 @@ def send_email(
         logger.error(f"Error sending email: {str(e)}")
         return False
 
+def deliver_outbox_message(row: Dict[str, Any]) -> Optional[str]:
+    """
+    Send one claimed outbox row (the OutboxWorker's send callable).
+    
+    Args:
+        row: Outbox row with email_id, response_text, email_address, cc, message_id, attempts
+            and mailbox (the run config naming the sending mailbox)
+        
+    Returns:
+        Gmail ID of the sent message
+        
+    Raises:
+        PermanentSendError: If Gmail rejected the message for a reason retrying will not fix
+    """
+    if not GMAIL_API_AVAILABLE:
+        logger.info("Gmail API not available, simulating email send")
+        logger.info(f"Would send: {row['response_text'][:100]}...")
+        return None
+    
+    gmail_token = mailbox_token({"configurable": row["mailbox"]})
+    service = get_service("gmail", "v1", gmail_token or os.getenv("GMAIL_TOKEN"), os.getenv("GMAIL_SECRET"))
+    try:
+        if row["attempts"] > 1:
+            # An earlier attempt may have been delivered before failing or crashing
+            existing = service.users().messages().list(
+                userId="me", q=f"rfc822msgid:{row['message_id']}", maxResults=1
+            ).execute().get("messages", [])
+            if existing:
+                logger.info(f"Outbox message {row['message_id']} was already delivered")
+                return existing[0]["id"]
+        
+        body = _build_reply_body(
+            service, row["email_id"], row["response_text"], row["email_address"], row["cc"], row["message_id"]
+        )
+        return service.users().messages().send(userId="me", body=body).execute()["id"]
+    except HttpError as e:
+        # Other 4xx errors (bad recipient, invalid message) will fail the same way again
+        if 400 <= e.resp.status < 500 and e.resp.status not in (408, 429):
+            raise PermanentSendError(str(e)) from e
+        raise
+
+_outbox_worker: Optional[OutboxWorker] = None
+_outbox_worker_lock = threading.Lock()
+
+def ensure_outbox_worker() -> None:
+    """Start the in-process outbox worker, unless sending is left to `outbox worker`.
+    
+    Set EMAIL_ASSISTANT_OUTBOX_WORKER=external when a separate
+    `python -m email_assistant.tools.gmail.outbox worker` process drains the outbox.
+    """
+    global _outbox_worker
+    if os.getenv("EMAIL_ASSISTANT_OUTBOX_WORKER", "inline") == "external":
+        return
+    with _outbox_worker_lock:
+        if _outbox_worker is None:
+            _outbox_worker = OutboxWorker(get_outbox(), deliver_outbox_message)
+        _outbox_worker.start()
+
 @tool(args_schema=SendEmailInput)
 def send_email_tool(
     email_id: str,
     response_text: str,
     email_address: str,
+    config: RunnableConfig,
     additional_recipients: Optional[List[str]] = None
 ) -> str:
     """
@@ -617,18 +728,20 @@ def send_email_tool(
         Confirmation message
     """
     try:
-        success = send_email(
+        # Queue the draft; the outbox worker sends it with retries from the run's mailbox
+        row = get_outbox().enqueue(
             email_id,
             response_text,
             email_address,
-            addn_receipients=additional_recipients
+            cc=additional_recipients,
+            mailbox=mailbox_config(config)
         )
-        if success:
-            return f"Email reply sent successfully to message ID: {email_id}"
-        else:
-            return "Failed to send email due to an API error"
+        ensure_outbox_worker()
+        if row["status"] == SENT:
+            return f"Email reply to message ID {email_id} was already sent (outbox ID: {row['id'][:12]})"
+        return f"Email reply to message ID {email_id} queued for sending (outbox ID: {row['id'][:12]}, status: {row['status']})"
     except Exception as e:
-        return f"Failed to send email: {str(e)}"
+        return f"Failed to queue email: {str(e)}"
 
 class CheckCalendarInput(BaseModel):
     """
@@ -638,12 +751,47 @@ class CheckCalendarInput(BaseModel):
         description="List of dates to check in DD-MM-YYYY format"
     )
 
-def get_calendar_events(dates: List[str]) -> str:
+def _list_events(service, time_min: str, time_max: str) -> List[Dict[str, Any]]:
+    """List all primary-calendar events overlapping [time_min, time_max], following pagination."""
+    events = []
+    page_token = None
+    while True:
+        events_result = (
+            service.events()
+            .list(
+                calendarId="primary",
+                timeMin=time_min,
+                timeMax=time_max,
+                singleEvents=True,
+                orderBy="startTime",
+                maxResults=2500,
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        events.extend(events_result.get("items", []))
+        page_token = events_result.get("nextPageToken")
+        if not page_token:
+            return events
+
+def _format_event_time(moment: datetime, day: date) -> str:
+    """Format an event boundary, with its date when it falls on another day (multi-day events)."""
+    if moment.date() == day:
+        return moment.strftime('%I:%M %p')
+    return moment.strftime('%b %d %I:%M %p')
+
+def get_calendar_events(
+    dates: List[str],
+    working_hours: Optional[WorkingHours] = None,
+    gmail_token: Optional[str] = None
+) -> str:
     """
     Check Google Calendar for events on specified dates.
     
     Args:
         dates: List of dates to check in DD-MM-YYYY format
+        working_hours: The user's working hours and time zone (default: from configuration)
+        gmail_token: Optional token of the user's account (default: GMAIL_TOKEN / local token)
         
     Returns:
         Formatted calendar events for the specified dates
@@ -653,123 +801,65 @@ def get_calendar_events(dates: List[str]) -> str:
         # Fallback: Return mock calendar data for demo/testing purposes
         # In production, this should use the real Google Calendar API
         result = "Calendar events:\n\n"
-        for date in dates:
-            result += f"Events for {date}:\n"
+        for date_str in dates:
+            result += f"Events for {date_str}:\n"
             result += "  - 9:00 AM - 10:00 AM: Team Meeting\n"
             result += "  - 2:00 PM - 3:00 PM: Project Review\n"
             result += "Available slots: 10:00 AM - 2:00 PM, after 3:00 PM\n\n"
         return result
         
     try:
-        # Get Gmail API credentials from environment variables or local files
-        creds = get_credentials(
-            gmail_token=os.getenv("GMAIL_TOKEN"),
-            gmail_secret=os.getenv("GMAIL_SECRET")
-        )
-        service = build("calendar", "v3", credentials=creds)
+        # Reuse the pooled client of the run's mailbox (default: GMAIL_TOKEN / local token)
+        service = get_service("calendar", "v3", gmail_token or os.getenv("GMAIL_TOKEN"), os.getenv("GMAIL_SECRET"))
+        hours = working_hours or WorkingHours.from_config()
         
         result = "Calendar events:\n\n"
+        if not dates:
+            return result
         
+        # Parse date strings (DD-MM-YYYY)
+        requested_days = []
         for date_str in dates:
-            # Parse date string (DD-MM-YYYY)
             day, month, year = date_str.split("-")
-            
-            # Format start and end times for the API
-            start_time = f"{year}-{month}-{day}T00:00:00Z"
-            end_time = f"{year}-{month}-{day}T23:59:59Z"
-            
-            # Call the Calendar API
-            events_result = (
-                service.events()
-                .list(
-                    calendarId="primary",
-                    timeMin=start_time,
-                    timeMax=end_time,
-                    singleEvents=True,
-                    orderBy="startTime",
-                )
-                .execute()
-            )
-            
-            events = events_result.get("items", [])
+            requested_days.append(date(int(year), int(month), int(day)))
+        
+        # Answer from the event cache; ranges before its synced window go to the API directly
+        range_start, _ = hours.day_bounds(min(requested_days))
+        _, range_end = hours.day_bounds(max(requested_days))
+        range_events = get_calendar_cache(token_source(gmail_token or os.getenv("GMAIL_TOKEN"))).events_between(service, range_start, range_end)
+        if range_events is None:
+            range_events = _list_events(service, range_start.isoformat(), range_end.isoformat())
+        
+        for date_str, requested_day in zip(dates, requested_days):
+            availability = day_availability(range_events, requested_day, hours)
             
             result += f"Events for {date_str}:\n"
             
-            if not events:
+            if not availability.events:
                 result += "  No events found for this day\n"
                 result += "  Available all day\n\n"
                 continue
                 
-            # Process events
-            busy_slots = []
-            for event in events:
-                start = event["start"].get("dateTime", event["start"].get("date"))
-                end = event["end"].get("dateTime", event["end"].get("date"))
-                
-                # Convert to datetime objects
-                if "T" in start:  # dateTime format
-                    start_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
-                    end_dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
-                    
-                    # Format for display
-                    start_display = start_dt.strftime("%I:%M %p")
-                    end_display = end_dt.strftime("%I:%M %p")
-                    
-                    result += f"  - {start_display} - {end_display}: {event['summary']}\n"
-                    busy_slots.append((start_dt, end_dt))
-                else:  # all-day event
-                    result += f"  - All day: {event['summary']}\n"
-                    busy_slots.append(("all-day", "all-day"))
+            # List events in the user's time zone
+            for start_dt, end_dt, summary, all_day in availability.events:
+                if all_day:
+                    result += f"  - All day: {summary}\n"
+                else:
+                    result += f"  - {_format_event_time(start_dt, requested_day)} - {_format_event_time(end_dt, requested_day)}: {summary}\n"
             
-            # Calculate available slots
-            if "all-day" in [slot[0] for slot in busy_slots]:
+            # Report free slots within working hours
+            if availability.has_all_day_event:
                 result += "  Available: No availability (all-day events)\n\n"
-            else:
-                # Sort busy slots by start time
-                busy_slots.sort(key=lambda x: x[0])
-                
-                # Define working hours (9 AM to 5 PM)
-                # Note: Working hours are currently hardcoded for simplicity
-                # In production, this could be made configurable per user/organization
-                work_start = datetime(
-                    year=int(year), 
-                    month=int(month), 
-                    day=int(day), 
-                    hour=9, 
-                    minute=0
-                )
-                work_end = datetime(
-                    year=int(year), 
-                    month=int(month), 
-                    day=int(day), 
-                    hour=17, 
-                    minute=0
+            elif not availability.working_day:
+                result += "  Available: Not a working day\n\n"
+            elif availability.free:
+                slots = ", ".join(
+                    f"{start.strftime('%I:%M %p')} - {end.strftime('%I:%M %p')}"
+                    for start, end in availability.free
                 )
-                
-                # Calculate available slots
-                available_slots = []
-                current = work_start
-                
-                for start, end in busy_slots:
-                    if current < start:
-                        available_slots.append((current, start))
-                    current = max(current, end)
-                
-                if current < work_end:
-                    available_slots.append((current, work_end))
-                
-                # Format available slots
-                if available_slots:
-                    result += "  Available: "
-                    for i, (start, end) in enumerate(available_slots):
-                        start_display = start.strftime("%I:%M %p")
-                        end_display = end.strftime("%I:%M %p")
-                        result += f"{start_display} - {end_display}"
-                        if i < len(available_slots) - 1:
-                            result += ", "
-                    result += "\n\n"
-                else:
-                    result += "  Available: No availability during working hours\n\n"
+                result += f"  Available: {slots}\n\n"
+            else:
+                result += "  Available: No availability during working hours\n\n"
         
         return result
         
@@ -777,15 +867,15 @@ def get_calendar_events(dates: List[str]) -> str:
         logger.error(f"Error checking calendar: {str(e)}")
         # Return mock data in case of error
         result = "Calendar events (mock due to error):\n\n"
-        for date in dates:
-            result += f"Events for {date}:\n"
+        for date_str in dates:
+            result += f"Events for {date_str}:\n"
             result += "  - 9:00 AM - 10:00 AM: Team Meeting\n"
             result += "  - 2:00 PM - 3:00 PM: Project Review\n"
             result += "Available slots: 10:00 AM - 2:00 PM, after 3:00 PM\n\n"
         return result
 
 @tool(args_schema=CheckCalendarInput)
-def check_calendar_tool(dates: List[str]) -> str:
+def check_calendar_tool(dates: List[str], config: RunnableConfig) -> str:
     """
     Check Google Calendar for events on specified dates.
     
@@ -796,11 +886,91 @@ def check_calendar_tool(dates: List[str]) -> str:
         Formatted calendar events for the specified dates
     """
     try:
-        events = get_calendar_events(dates)
+        # Working hours and time zone come from the assistant's configuration
+        events = get_calendar_events(dates, WorkingHours.from_config(config), mailbox_token(config))
         return events
     except Exception as e:
         return f"Failed to check calendar: {str(e)}"
 
+class FindMeetingSlotsInput(BaseModel):
+    """
+    Input schema for the find_meeting_slots_tool.
+    """
+    attendees: List[str] = Field(
+        description="Email addresses of meeting attendees"
+    )
+    dates: List[str] = Field(
+        description="List of dates to search in DD-MM-YYYY format"
+    )
+    duration_minutes: int = Field(
+        default=30,
+        description="Meeting length in minutes"
+    )
+
+def get_meeting_slots(
+    attendees: List[str],
+    dates: List[str],
+    duration_minutes: int = 30,
+    working_hours: Optional[WorkingHours] = None,
+    gmail_token: Optional[str] = None
+) -> str:
+    """
+    Find meeting slots that are free for all attendees on the given dates.
+    
+    Args:
+        attendees: Email addresses of meeting attendees
+        dates: List of dates to search in DD-MM-YYYY format
+        duration_minutes: Meeting length in minutes
+        working_hours: The organizer's working hours and time zone (default: from configuration)
+        gmail_token: Optional token of the organizer's account (default: GMAIL_TOKEN / local token)
+        
+    Returns:
+        Formatted list of ranked candidate slots
+    """
+    if not GMAIL_API_AVAILABLE:
+        logger.info("Gmail API not available, simulating slot search")
+        return "Candidate meeting slots (best first):\n1. 10:00 AM - 10:30 AM on the first requested date\n"
+    
+    try:
+        service = get_service("calendar", "v3", gmail_token or os.getenv("GMAIL_TOKEN"), os.getenv("GMAIL_SECRET"))
+        hours = working_hours or WorkingHours.from_config()
+        
+        # Parse date strings (DD-MM-YYYY)
+        days = []
+        for date_str in dates:
+            day, month, year = date_str.split("-")
+            days.append(date(int(year), int(month), int(day)))
+        if not days:
+            return "No dates given to search."
+        
+        # One freebusy query covers every attendee and the whole date range
+        slots, errors = find_meeting_slots(service, attendees, days, duration_minutes, hours)
+        return format_candidate_slots(slots, errors)
+        
+    except Exception as e:
+        logger.error(f"Error finding meeting slots: {str(e)}")
+        return f"Failed to find meeting slots: {str(e)}"
+
+@tool(args_schema=FindMeetingSlotsInput)
+def find_meeting_slots_tool(
+    attendees: List[str],
+    dates: List[str],
+    config: RunnableConfig,
+    duration_minutes: int = 30
+) -> str:
+    """
+    Find meeting slots that work for all attendees, using their Google Calendar free/busy.
+    
+    Args:
+        attendees: Email addresses of meeting attendees
+        dates: List of dates to search in DD-MM-YYYY format
+        duration_minutes: Meeting length in minutes (default: 30)
+        
+    Returns:
+        Ranked candidate slots with start_time/end_time to pass to schedule_meeting_tool
+    """
+    return get_meeting_slots(attendees, dates, duration_minutes, WorkingHours.from_config(config), mailbox_token(config))
+
 class ScheduleMeetingInput(BaseModel):
     """
     Input schema for the schedule_meeting_tool.
@@ -820,9 +990,9 @@ class ScheduleMeetingInput(BaseModel):
     organizer_email: str = Field(
         description="Email address of the meeting organizer"
     )
-    timezone: str = Field(
-        default="America/Los_Angeles",
-        description="Timezone for the meeting"
+    timezone: Optional[str] = Field(
+        default=None,
+        description="Timezone for the meeting (defaults to the user's configured timezone)"
     )
 
 def send_calendar_invite(
@@ -831,7 +1001,8 @@ def send_calendar_invite(
     start_time: str,
     end_time: str,
     organizer_email: str,
-    timezone: str = "America/Los_Angeles"
+    timezone: str = "America/Los_Angeles",
+    gmail_token: Optional[str] = None
 ) -> bool:
     """
     Schedule a meeting with Google Calendar and send invites.
@@ -843,6 +1014,7 @@ def send_calendar_invite(
         end_time: Meeting end time in ISO format (YYYY-MM-DDTHH:MM:SS)
         organizer_email: Email address of the meeting organizer
         timezone: Timezone for the meeting
+        gmail_token: Optional token of the organizer's account (default: GMAIL_TOKEN / local token)
         
     Returns:
         Success flag (True if meeting was scheduled)
@@ -854,12 +1026,12 @@ def send_calendar_invite(
         return True
         
     try:
-        # Get Gmail API credentials from environment variables or local files
-        creds = get_credentials(
-            gmail_token=os.getenv("GMAIL_TOKEN"),
-            gmail_secret=os.getenv("GMAIL_SECRET")
-        )
-        service = build("calendar", "v3", credentials=creds)
+        # Reuse the pooled client of the run's mailbox (default: GMAIL_TOKEN / local token)
+        service = get_service("calendar", "v3", gmail_token or os.getenv("GMAIL_TOKEN"), os.getenv("GMAIL_SECRET"))
+        
+        # Bring the event cache up to date before changing the calendar
+        cache = get_calendar_cache(token_source(gmail_token or os.getenv("GMAIL_TOKEN")))
+        cache.refresh(service)
         
         # Create event details
         event = {
@@ -885,6 +1057,7 @@ def send_calendar_invite(
         
         # Create the event
         event = service.events().insert(calendarId="primary", body=event).execute()
+        cache.add(event)
         
         logger.info(f"Meeting created: {event.get('htmlLink')}")
         return True
@@ -900,7 +1073,8 @@ def schedule_meeting_tool(
     start_time: str,
     end_time: str,
     organizer_email: str,
-    timezone: str = "America/Los_Angeles"
+    config: RunnableConfig,
+    timezone: Optional[str] = None
 ) -> str:
     """
     Schedule a meeting with Google Calendar and send invites.
@@ -911,7 +1085,7 @@ def schedule_meeting_tool(
         start_time: Meeting start time in ISO format (YYYY-MM-DDTHH:MM:SS)
         end_time: Meeting end time in ISO format (YYYY-MM-DDTHH:MM:SS)
         organizer_email: Email address of the meeting organizer
-        timezone: Timezone for the meeting (default: America/Los_Angeles)
+        timezone: Timezone for the meeting (default: the user's configured timezone)
         
     Returns:
         Success or failure message
@@ -923,7 +1097,8 @@ def schedule_meeting_tool(
             start_time,
             end_time,
             organizer_email,
-            timezone
+            timezone or WorkingHours.from_config(config).timezone,
+            mailbox_token(config)
         )
         
         if success:
@@ -933,14 +1108,108 @@ def schedule_meeting_tool(
     except Exception as e:
         return f"Error scheduling meeting: {str(e)}"
     
+_label_flusher: Optional[LabelFlusher] = None
+_label_flusher_lock = threading.Lock()
+# Credentials of every account that queued label changes in this process, by token source
+_label_credentials: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+def label_queue_service(account: str):
+    """
+    Return the Gmail service of a label queue account, None if this process has no credentials for it.
+    
+    Accounts queued in this process use the credentials they were queued with. Others
+    (queued by another process or before a restart) load the token from the mailbox
+    config kept with their rows, or are the default mailbox (GMAIL_TOKEN / token file).
+    """
+    credentials = _label_credentials.get(account)
+    if credentials is not None:
+        return get_service("gmail", "v1", *credentials)
+    mailbox = get_label_queue().mailbox(account)
+    gmail_token = mailbox_token({"configurable": mailbox}) if mailbox else None
+    if token_source(gmail_token) != account:
+        # The token changed since the rows were queued (or the default one is not this account)
+        return None
+    return get_service("gmail", "v1", gmail_token)
+
+def queue_label_update(
+    message_ids: List[str],
+    add: Sequence[str] = (),
+    remove: Sequence[str] = (),
+    gmail_token: str | None = None,
+    gmail_secret: str | None = None,
+    mailbox: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Queue a label change; it is applied later with batchModify by the label flusher.
+    
+    Args:
+        message_ids: Gmail message IDs
+        add: Label IDs to add
+        remove: Label IDs to remove
+        gmail_token: Optional token of the messages' mailbox (default: the token of ``mailbox``)
+        gmail_secret: Optional credentials for the flusher
+        mailbox: Run config naming the messages' mailbox (see mailbox_config), kept with
+            the queued rows so any process can flush them
+    """
+    global _label_flusher
+    if not GMAIL_API_AVAILABLE:
+        logger.info(f"Gmail API not available, not queueing label changes for {len(message_ids)} messages")
+        return
+    if gmail_token is None and mailbox:
+        gmail_token = mailbox_token({"configurable": mailbox})
+    account = token_source(gmail_token)
+    if account == "none" and not gmail_secret:
+        # No token anywhere: the tools run on mock data, so there is nothing to label
+        logger.info(f"No Gmail credentials, not queueing label changes for {len(message_ids)} messages")
+        return
+    queue = get_label_queue()
+    _label_credentials[account] = (gmail_token, gmail_secret)
+    pending = queue.enqueue(message_ids, add=add, remove=remove, account=account, mailbox=mailbox)
+    with _label_flusher_lock:
+        if _label_flusher is None:
+            _label_flusher = LabelFlusher(queue, label_queue_service)
+        _label_flusher.start()
+    if pending >= queue.flush_size:
+        _label_flusher.poke()
+
+def label_triaged(
+    message_id: str,
+    decision: str,
+    gmail_token: str | None = None,
+    gmail_secret: str | None = None,
+    mailbox: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Queue the assistant/triaged-<decision> label for a message.
+    
+    Args:
+        message_id: Gmail message ID
+        decision: Triage decision (ignore, notify or respond)
+        gmail_token: Optional token for Gmail API authentication (default: the token of ``mailbox``)
+        gmail_secret: Optional credentials for Gmail API authentication
+        mailbox: Run config naming the message's mailbox (see mailbox_config)
+    """
+    if not GMAIL_API_AVAILABLE:
+        logger.info(f"Gmail API not available, not labelling {message_id} as {decision}")
+        return
+    if gmail_token is None and mailbox:
+        gmail_token = mailbox_token({"configurable": mailbox})
+    name = triage_label_name(decision)
+    # Label IDs are resolved (and created) once per process and mailbox
+    label_ids = resolve_label_ids(
+        get_service("gmail", "v1", gmail_token, gmail_secret), [name], account=token_source(gmail_token)
+    )
+    queue_label_update(
+        [message_id], add=[label_ids[name]], gmail_token=gmail_token, gmail_secret=gmail_secret, mailbox=mailbox
+    )
+
 def mark_as_read(
     message_id,
     gmail_token: str | None = None,
     gmail_secret: str | None = None,
+    mailbox: Optional[Dict[str, str]] = None,
 ):
-    creds = get_credentials(gmail_token, gmail_secret)
-
-    service = build("gmail", "v1", credentials=creds)
-    service.users().messages().modify(
-        userId="me", id=message_id, body={"removeLabelIds": ["UNREAD"]}
-    ).execute()
\ No newline at end of file
+    # Batched with other label changes instead of one modify call per message
+    queue_label_update(
+        [message_id], remove=["UNREAD"], gmail_token=gmail_token, gmail_secret=gmail_secret, mailbox=mailbox
+    )
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+Resident Gmail ingestion daemon with adaptive polling.
+
+The cron setups start ``run_ingest`` as a fresh process (or a cron graph run)
+every few minutes, and every run pays for imports, credential loading and
+discovery parsing again. The daemon stays up and keeps its clients warm: one
+pooled Gmail service (credentials refreshed proactively, see service_pool.py)
+and one LangGraph SDK client.
+
+The polling interval adapts to the mailbox:
+
+- a poll that finds new mail (emails without a run yet) drops the interval to
+  ``min_interval``
+- each idle (or failed) poll multiplies it by ``backoff``, up to ``max_interval``
+
+Each poll searches back to the previous successful poll (at least
+``--minutes-since``), so a long idle interval does not miss mail. The daemon
+polls only while it holds the mailbox's ingest lease (see lease.py): cron ticks
+skip while it runs, and a second daemon waits on standby and takes over once the
+leader's lease expires. The daemon writes its status to ``ingest_daemon.json``
+in the data directory after every poll and can also serve it over HTTP
+(``--status-port``).
+
+Usage:
+    python -m email_assistant.tools.gmail.ingest_daemon run --email you@example.com --min-interval 30
+    python -m email_assistant.tools.gmail.ingest_daemon status
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import math
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from email_assistant.db import data_dir
+from email_assistant.lease import DEFAULT_TTL, Lease, LeaseStore, get_lease_store
+from email_assistant.tools.gmail.run_ingest import build_arg_parser, ingest_lease_name, ingest_new_emails
+
+DEFAULT_MIN_INTERVAL = 30.0
+DEFAULT_MAX_INTERVAL = 900.0
+DEFAULT_BACKOFF = 2.0
+
+def default_status_path() -> Path:
+    """Return the status file of the daemon in the data directory."""
+    return data_dir() / "ingest_daemon.json"
+
+def _isoformat(at: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(at, timezone.utc).isoformat() if at else None
+
+def catch_up_args(args, last_success: Optional[float], now: float):
+    """Return a copy of ``args`` whose search reaches back to the last successful poll.
+
+    Args:
+        args: Ingestion arguments (``minutes_since`` is the shortest window)
+        last_success: UNIX time of the last successful poll (None on the first one)
+        now: UNIX time of this poll
+    """
+    args = copy.copy(args)
+    if last_success is not None:
+        # One extra minute covers Gmail's minute-granular after: and clock skew
+        gap_minutes = math.ceil((now - last_success) / 60) + 1
+        args.minutes_since = max(args.minutes_since, gap_minutes)
+    return args
+
+class AdaptiveInterval:
+    """Polling interval that shortens while mail arrives and backs off when idle.
+
+    Args:
+        min_interval: Seconds between polls while mail is arriving
+        max_interval: Upper bound of the idle interval
+        backoff: Factor applied to the interval after each idle poll
+    """
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval")
+        if backoff < 1:
+            raise ValueError("backoff must be at least 1")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.current = min_interval
+
+    def update(self, found: int) -> float:
+        """Return the delay before the next poll, given how many new emails this one found."""
+        if found:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        return self.current
+
+class IngestDaemon:
+    """Poll Gmail with warm clients and submit new mail to LangGraph.
+
+    Args:
+        args: Ingestion arguments (see run_ingest.parse_args)
+        interval: Adaptive polling interval
+        status_path: Status file, None to keep the status in memory only
+        service: Gmail v1 service (default: the pooled client)
+        client: LangGraph SDK client (default: one client for ``args.url``)
+        leases: Lease store (default: the process-wide store)
+        lease_ttl: Seconds the ingest lease outlives a stalled heartbeat
+    """
+
+    def __init__(
+        self,
+        args,
+        interval: Optional[AdaptiveInterval] = None,
+        status_path: Optional[Union[str, Path]] = None,
+        service=None,
+        client=None,
+        leases: Optional[LeaseStore] = None,
+        lease_ttl: float = DEFAULT_TTL,
+    ):
+        self.args = args
+        self.interval = interval or AdaptiveInterval()
+        self.status_path = Path(status_path) if status_path else None
+        self.service = service
+        self.client = client
+        self.leases = leases
+        self.lease_ttl = lease_ttl
+        self.lease: Optional[Lease] = None
+        self._last_success: Optional[float] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._status_lock = threading.Lock()
+        self._status: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "email": args.email,
+            "state": "starting",
+            "started_at": _isoformat(time.time()),
+            "polls": 0,
+            "errors": 0,
+            "found_total": 0,
+            "processed_total": 0,
+            "interval": self.interval.current,
+        }
+
+    def _ensure_clients(self) -> None:
+        if self.service is None:
+            from email_assistant.tools.gmail.service_pool import get_service
+
+            self.service = get_service("gmail", "v1")
+        if self.client is None:
+            from langgraph_sdk import get_client
+
+            self.client = get_client(url=self.args.url)
+
+    def poll_args(self, now: float):
+        """Return the arguments of the next poll, searching back to the last successful one."""
+        return catch_up_args(self.args, self._last_success, now)
+
+    def _lead(self) -> bool:
+        """Hold the mailbox's ingest lease, taking it if it is free or expired."""
+        if self.lease is not None and not self.lease.lost:
+            return True
+        self.lease = (self.leases or get_lease_store()).acquire(ingest_lease_name(self.args.email), self.lease_ttl)
+        if self.lease is None:
+            return False
+        self.lease.start_heartbeat()
+        print(f"Ingest daemon is now leading for {self.args.email}")
+        return True
+
+    async def poll_once(self) -> float:
+        """Poll Gmail once and return the delay before the next poll."""
+        if not self._lead():
+            # Another daemon or cron run is ingesting; checking the lease again is one SQLite read
+            holder = (self.leases or get_lease_store()).holder(ingest_lease_name(self.args.email))
+            delay = self.interval.min_interval
+            self._update_status(
+                state="standby",
+                lease_holder=holder["owner"] if holder else None,
+                interval=delay,
+                next_poll_at=_isoformat(time.time() + delay),
+            )
+            return delay
+
+        started = time.time()
+        self._update_status(state="polling", lease_holder=self.lease.owner, last_poll_at=_isoformat(started))
+        try:
+            self._ensure_clients()
+            found, processed = await ingest_new_emails(self.service, self.poll_args(started), self.client, self.lease)
+        except Exception as e:
+            print(f"Error polling Gmail: {str(e)}")
+            delay = self.interval.update(0)
+            with self._status_lock:
+                self._status["errors"] += 1
+                self._status["last_error"] = str(e)
+                self._status["last_error_at"] = _isoformat(time.time())
+        else:
+            self._last_success = started
+            delay = self.interval.update(found)
+            with self._status_lock:
+                self._status["found_total"] += found
+                self._status["processed_total"] += processed
+                self._status.update(last_found=found, last_processed=processed, last_success_at=_isoformat(started))
+
+        with self._status_lock:
+            self._status["polls"] += 1
+            self._status["last_poll_seconds"] = round(time.time() - started, 3)
+        self._update_status(state="sleeping", interval=delay, next_poll_at=_isoformat(time.time() + delay))
+        return delay
+
+    async def run(self) -> None:
+        """Poll until stop() is called."""
+        self._stop = asyncio.Event()
+        print(f"Ingest daemon polling every {self.interval.min_interval:g}-{self.interval.max_interval:g}s for {self.args.email}")
+        try:
+            while not self._stop.is_set():
+                delay = await self.poll_once()
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.lease is not None:
+                self.lease.release()
+                self.lease = None
+            self._update_status(state="stopped", next_poll_at=None)
+
+    def stop(self) -> None:
+        """Finish the current poll and exit run() (call from the daemon's event loop)."""
+        if self._stop is not None:
+            self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Return a copy of the current status."""
+        with self._status_lock:
+            return dict(self._status)
+
+    def _update_status(self, **fields) -> None:
+        with self._status_lock:
+            self._status.update(fields)
+            status = dict(self._status)
+        if self.status_path is not None:
+            try:
+                self.status_path.parent.mkdir(parents=True, exist_ok=True)
+                # Write then rename, so readers never see a partial file
+                tmp_path = self.status_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(status, indent=2))
+                os.replace(tmp_path, self.status_path)
+            except OSError as e:
+                print(f"Error writing daemon status: {str(e)}")
+
+def serve_status(daemon: IngestDaemon, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``GET /status`` (the daemon status as JSON) on a background thread."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(daemon.status()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Keep the daemon's output to ingestion
+            pass
+
+    server = ThreadingHTTPServer((host, port), StatusHandler)
+    threading.Thread(target=server.serve_forever, name="ingest-daemon-status", daemon=True).start()
+    return server
+
+async def run_daemon(args) -> int:
+    """Run the daemon until SIGINT/SIGTERM."""
+    daemon = IngestDaemon(
+        args,
+        interval=AdaptiveInterval(args.min_interval, args.max_interval, args.backoff),
+        status_path=args.status_file,
+    )
+    server = serve_status(daemon, args.status_port) if args.status_port else None
+    if server is not None:
+        print(f"Serving status on http://127.0.0.1:{args.status_port}/status")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except (NotImplementedError, RuntimeError):
+            # Not supported on this platform: Ctrl+C still ends the process
+            pass
+    try:
+        await daemon.run()
+    finally:
+        if server is not None:
+            server.shutdown()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident Gmail ingestion daemon with adaptive polling")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", parents=[build_arg_parser(add_help=False)], help="Run the daemon")
+    run.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL, help="Seconds between polls while mail is arriving")
+    run.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL, help="Longest interval when the mailbox is idle")
+    run.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="Interval multiplier after each idle poll")
+    run.add_argument("--status-port", type=int, help="Serve the status as JSON on this local port")
+    run.add_argument("--status-file", type=Path, default=None, help="Status file (default: ingest_daemon.json in the data directory)")
+
+    status = commands.add_parser("status", help="Print the status of the running daemon")
+    status.add_argument("--status-file", type=Path, default=None, help="Status file to read")
+
+    args = parser.parse_args()
+    if args.command == "run" and (not args.email or args.registry):
+        parser.error("run needs --email; ingest a registry with mailbox_pool instead")
+    args.status_file = args.status_file or default_status_path()
+
+    if args.command == "status":
+        if not args.status_file.exists():
+            print(f"No daemon status at {args.status_file}")
+            return 1
+        print(args.status_file.read_text())
+        return 0
+
+    return asyncio.run(run_daemon(args))
+
+if __name__ == "__main__":
+    exit(main())
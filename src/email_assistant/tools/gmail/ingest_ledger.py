@@ -0,0 +1,74 @@
+"""
+Ledger of the emails ingestion has submitted to LangGraph.
+
+Consecutive polls search overlapping windows (see ingest_daemon.catch_up_args),
+so ``ingest_new_emails`` skips messages that already have a run. A message is
+entered here only once its run was created: if storing the body or creating the
+run fails, the next poll submits the email again. ``--rerun`` ignores the ledger.
+
+The dashboard run counters (run_counters.py) are not used for this: they also
+count emails the graph has seen from other sources, and they are reset with the
+dashboards' data.
+"""
+
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Set, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (
+    account TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    thread_id TEXT NOT NULL,
+    run_id TEXT,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (account, message_id)
+);
+"""
+
+class IngestLedger:
+    """SQLite record of the messages that have a run, per mailbox.
+
+    Args:
+        path: Database file. Defaults to ``ingest_ledger.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("ingest_ledger.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def record(self, account: str, message_id: str, thread_id: str, run_id: Optional[str] = None) -> None:
+        """Record that a message's run was created (a rerun replaces the entry)."""
+        with self._conn.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested (account, message_id, thread_id, run_id, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (account.lower(), message_id, thread_id, run_id, time.time()),
+            )
+
+    def seen(self, account: str, message_ids: Iterable[str]) -> Set[str]:
+        """Return the IDs among ``message_ids`` that already have a run."""
+        message_ids = list(message_ids)
+        if not message_ids:
+            return set()
+        placeholders = ", ".join("?" * len(message_ids))
+        rows = self._conn.get().execute(
+            f"SELECT message_id FROM ingested WHERE account = ? AND message_id IN ({placeholders})",
+            [account.lower(), *message_ids],
+        ).fetchall()
+        return {row["message_id"] for row in rows}
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+_ledger: Optional[IngestLedger] = None
+
+def get_ingest_ledger() -> IngestLedger:
+    """Return the process-wide ingest ledger."""
+    global _ledger
+    if _ledger is None:
+        _ledger = IngestLedger()
+    return _ledger
@@ -0,0 +1,376 @@
+"""
+Durable accumulator for Gmail label changes, flushed with users.messages.batchModify.
+
+Marking a finished email as read used to cost one ``messages().modify`` call per
+message. Label changes are now appended to a local SQLite queue (committed before
+the caller continues, so a crash never loses them) and flushed in batches:
+
+- on a timer (``flush_interval``) or as soon as ``flush_size`` changes are pending
+- per account (the token source the change was queued with, see
+  service_pool.token_source), so every change is applied with its own mailbox's
+  credentials. Each row also keeps the run config naming its mailbox (see
+  mailbox_registry.mailbox_run_config: the token's environment variable or file,
+  never the token), so another process or a restart can still flush it
+- grouped by identical (add, remove) label sets, up to 1000 ids per batchModify call
+- rows are deleted only after Gmail accepted their batch; label changes are
+  idempotent, so replaying a batch after a crash is harmless
+- a batch Gmail rejects as invalid (a 4xx other than 408/429, e.g. one deleted
+  message id) is bisected and the halves resent, so only the ids that fail on their
+  own are backed off and the rest of the batch goes out
+- a failed batch is retried with exponential backoff; rows that fail
+  ``max_attempts`` times are dead-lettered (kept with their last error, but no
+  longer flushed), so one bad message id cannot block its label set forever
+
+Usage:
+    python -m email_assistant.tools.gmail.label_queue status
+    python -m email_assistant.tools.gmail.label_queue flush
+    python -m email_assistant.tools.gmail.label_queue failed
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+logger = logging.getLogger(__name__)
+
+# users.messages.batchModify accepts at most this many ids per call
+BATCH_MODIFY_MAX_IDS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS label_ops (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL DEFAULT '',
+    mailbox TEXT NOT NULL DEFAULT '{}',
+    message_id TEXT NOT NULL,
+    add_labels TEXT NOT NULL,
+    remove_labels TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    claim TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed_at REAL
+);
+"""
+
+def _is_client_error(error: Exception) -> bool:
+    """Whether a Gmail API error rejects the request itself (retrying it unchanged fails again)."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+class LabelQueue:
+    """SQLite queue of pending label changes.
+
+    Args:
+        path: Database file. Defaults to ``label_queue.sqlite`` in the data directory.
+        flush_size: Pending changes that trigger an early flush
+        flush_interval: Seconds between timed flushes
+        claim_timeout: Seconds after which rows claimed by a flush that never
+            finished (crashed process) may be claimed again
+        max_rows_per_flush: Upper bound of rows one flush takes
+        max_attempts: Failed batchModify calls before a row is dead-lettered
+        base_delay: Backoff before retrying a failed row, in seconds (doubles per attempt)
+        max_delay: Upper bound of the backoff, in seconds
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        flush_size: int = 100,
+        flush_interval: float = 10.0,
+        claim_timeout: float = 120.0,
+        max_rows_per_flush: int = 10000,
+        max_attempts: int = 8,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+    ):
+        self.path = str(path or default_db_path("label_queue.sqlite"))
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.claim_timeout = claim_timeout
+        self.max_rows_per_flush = max_rows_per_flush
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def enqueue(
+        self,
+        message_ids: Iterable[str],
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        account: str = "",
+        mailbox: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """Record a label change for some messages.
+
+        Args:
+            message_ids: Gmail message IDs
+            add: Label IDs to add
+            remove: Label IDs to remove
+            account: Mailbox the messages belong to (flushed with its credentials only)
+            mailbox: Run config naming the mailbox and its token source (see mailbox_run_config)
+
+        Returns:
+            Number of pending changes after this one
+        """
+        add_labels, remove_labels = json.dumps(sorted(set(add))), json.dumps(sorted(set(remove)))
+        mailbox_json = json.dumps(mailbox or {}, sort_keys=True)
+        now = time.time()
+        with self._conn.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO label_ops (account, mailbox, message_id, add_labels, remove_labels, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(account, mailbox_json, message_id, add_labels, remove_labels, now) for message_id in message_ids],
+            )
+        return self.pending()
+
+    def pending(self) -> int:
+        """Return the number of label changes not yet flushed (excluding dead-lettered ones)."""
+        return self._conn.get().execute("SELECT COUNT(*) FROM label_ops WHERE failed_at IS NULL").fetchone()[0]
+
+    def accounts(self) -> List[str]:
+        """Return the accounts with label changes not yet flushed."""
+        rows = self._conn.get().execute("SELECT DISTINCT account FROM label_ops WHERE failed_at IS NULL").fetchall()
+        return [row["account"] for row in rows]
+
+    def mailbox(self, account: str) -> Dict[str, str]:
+        """Return the run config last queued for an account, {} for the default mailbox."""
+        row = self._conn.get().execute(
+            "SELECT mailbox FROM label_ops WHERE account = ? AND mailbox != '{}' ORDER BY id DESC LIMIT 1",
+            (account,),
+        ).fetchone()
+        return json.loads(row["mailbox"]) if row else {}
+
+    def dead_lettered(self) -> int:
+        """Return the number of label changes given up after max_attempts."""
+        return self._conn.get().execute("SELECT COUNT(*) FROM label_ops WHERE failed_at IS NOT NULL").fetchone()[0]
+
+    def failed(self, limit: int = 50) -> List[Dict]:
+        """Return the most recently dead-lettered label changes."""
+        rows = self._conn.get().execute(
+            "SELECT message_id, add_labels, remove_labels, attempts, last_error, failed_at FROM label_ops "
+            "WHERE failed_at IS NOT NULL ORDER BY failed_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _claim(self, account: str) -> Tuple[str, list]:
+        claim = uuid.uuid4().hex
+        now = time.time()
+        with self._conn.transaction() as conn:
+            conn.execute(
+                """
+                UPDATE label_ops SET claim = ?, claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM label_ops
+                    WHERE account = ? AND failed_at IS NULL AND next_attempt_at <= ?
+                        AND (claim IS NULL OR claimed_at < ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+                """,
+                (claim, now, account, now, now - self.claim_timeout, self.max_rows_per_flush),
+            )
+            rows = conn.execute(
+                "SELECT id, message_id, add_labels, remove_labels FROM label_ops WHERE claim = ?", (claim,)
+            ).fetchall()
+        return claim, rows
+
+    def _record_failure(self, row_ids: List[int], error: str) -> None:
+        """Schedule a retry of failed rows with backoff, or dead-letter them after max_attempts."""
+        now = time.time()
+        with self._conn.transaction() as conn:
+            # SET expressions see the old attempts: the delay doubles with every failure
+            conn.executemany(
+                """
+                UPDATE label_ops SET
+                    attempts = attempts + 1,
+                    last_error = ?,
+                    next_attempt_at = ? + MIN(?, ? * (1 << attempts)),
+                    failed_at = CASE WHEN attempts + 1 >= ? THEN ? END
+                WHERE id = ?
+                """,
+                [(error, now, self.max_delay, self.base_delay, self.max_attempts, now, row_id) for row_id in row_ids],
+            )
+
+    def flush(self, service, account: str = "") -> int:
+        """Apply an account's pending label changes with batchModify.
+
+        Args:
+            service: Gmail v1 service of the account
+            account: Account whose changes to flush (as passed to enqueue)
+
+        Returns:
+            Number of successful batchModify calls
+
+        Raises:
+            Exception: The first batchModify error, after every other batch was tried
+        """
+        claim, rows = self._claim(account)
+        if not rows:
+            return 0
+
+        # Group by label set; a message appearing twice in a group needs one id
+        groups: Dict[Tuple[str, str], Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        for row in rows:
+            groups[(row["add_labels"], row["remove_labels"])][row["message_id"]].append(row["id"])
+
+        calls = 0
+        error: Optional[Exception] = None
+
+        def send(chunk: List[str], by_message: Dict[str, List[int]], labels: Dict[str, list]) -> None:
+            nonlocal calls, error
+            row_ids = [row_id for message_id in chunk for row_id in by_message[message_id]]
+            try:
+                service.users().messages().batchModify(userId="me", body={"ids": chunk, **labels}).execute()
+            except Exception as e:
+                if len(chunk) > 1 and _is_client_error(e):
+                    # Likely one bad id: bisect so the valid ids still go out
+                    middle = len(chunk) // 2
+                    send(chunk[:middle], by_message, labels)
+                    send(chunk[middle:], by_message, labels)
+                    return
+                # Back off this batch only; the other label sets still go out
+                logger.warning(f"batchModify of {len(chunk)} messages failed: {e}")
+                self._record_failure(row_ids, str(e))
+                error = error or e
+                return
+            calls += 1
+
+            # Forget each batch as soon as Gmail accepted it
+            with self._conn.transaction() as conn:
+                conn.executemany("DELETE FROM label_ops WHERE id = ?", [(row_id,) for row_id in row_ids])
+
+        try:
+            for (add_labels, remove_labels), by_message in groups.items():
+                labels = {}
+                if json.loads(add_labels):
+                    labels["addLabelIds"] = json.loads(add_labels)
+                if json.loads(remove_labels):
+                    labels["removeLabelIds"] = json.loads(remove_labels)
+                message_ids = list(by_message)
+                for offset in range(0, len(message_ids), BATCH_MODIFY_MAX_IDS):
+                    send(message_ids[offset:offset + BATCH_MODIFY_MAX_IDS], by_message, labels)
+        finally:
+            # Hand unflushed rows back for the next flush
+            with self._conn.transaction() as conn:
+                conn.execute("UPDATE label_ops SET claim = NULL, claimed_at = NULL WHERE claim = ?", (claim,))
+        logger.info(f"Flushed {len(rows)} label changes in {calls} batchModify calls")
+        if error is not None:
+            raise error
+        return calls
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+class LabelFlusher:
+    """Background thread that flushes a LabelQueue on a timer or when poked.
+
+    Args:
+        queue: Queue to flush
+        service_factory: Returns the Gmail v1 service of an account for the flusher
+            thread, or None if this process has no credentials for it (its changes
+            stay queued)
+    """
+
+    def __init__(self, queue: LabelQueue, service_factory: Callable[[str], Optional[object]]):
+        self.queue = queue
+        self.service_factory = service_factory
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poke(self) -> None:
+        """Flush now instead of waiting for the timer."""
+        self._wake.set()
+
+    def flush_all(self) -> None:
+        """Flush every account this process has credentials for."""
+        for account in self.queue.accounts():
+            try:
+                service = self.service_factory(account)
+                if service is not None:
+                    self.queue.flush(service, account)
+            except Exception as e:
+                # Rows stay queued and are retried on the next flush
+                logger.error(f"Label flush failed: {e}")
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.queue.flush_interval)
+            self._wake.clear()
+            self.flush_all()
+
+    def start(self) -> None:
+        """Run the flusher in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="label-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the flusher thread (pending rows stay in the queue)."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+_queue: Optional[LabelQueue] = None
+
+def get_label_queue() -> LabelQueue:
+    """Return the process-wide label queue."""
+    global _queue
+    if _queue is None:
+        _queue = LabelQueue()
+    return _queue
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or flush the Gmail label queue")
+    parser.add_argument("command", choices=["status", "flush", "failed"])
+    args = parser.parse_args()
+
+    queue = get_label_queue()
+    if args.command == "status":
+        print(f"{queue.pending()} pending label changes, {queue.dead_lettered()} dead-lettered")
+        return 0
+    if args.command == "failed":
+        for row in queue.failed():
+            print(f"{row['message_id']}  +{row['add_labels']} -{row['remove_labels']}  attempts={row['attempts']}  {row['last_error']}")
+        return 0
+
+    # Imported here: credentials come from the mailbox each change was queued for
+    from email_assistant.tools.gmail.gmail_tools import label_queue_service
+
+    status = 0
+    skipped = 0
+    for account in queue.accounts():
+        service = label_queue_service(account)
+        if service is None:
+            skipped += 1
+            continue
+        while account in queue.accounts():
+            try:
+                if not queue.flush(service, account):
+                    break
+            except Exception as e:
+                # Failed rows are backed off, so the next flush will not pick them up again
+                print(f"Error flushing label changes: {str(e)}")
+                status = 1
+    if skipped:
+        print(f"Not flushing {skipped} accounts: their token is not available to this process")
+    print(f"{queue.pending()} pending label changes")
+    return status
+
+if __name__ == "__main__":
+    exit(main())
@@ -12,14 +12,29 @@ import requests
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+
+import httpx
 from dotenv import load_dotenv
 
+from email_assistant.tools.gmail.dashboard_aggregator import DashboardAggregator, langgraph_platform_source
+from email_assistant.tools.gmail.run_counters import RunCounters, get_run_counters, status_statistics
+
 load_dotenv()
 
+# Thread status -> dashboard counter; other statuses only count towards the total
+STATUS_COUNTERS = {
+    **dict.fromkeys(["processed", "completed", "done"], "processed"),
+    **dict.fromkeys(["hitl", "human_in_the_loop", "waiting_human"], "hitl"),
+    **dict.fromkeys(["ignored", "skipped"], "ignored"),
+    **dict.fromkeys(["waiting", "pending", "in_progress"], "waiting_action"),
+    **dict.fromkeys(["scheduled", "meeting_scheduled"], "scheduled_meetings"),
+    **dict.fromkeys(["notification", "alert"], "notifications"),
+}
+
 class LangGraphPlatformFetcher:
     """Fetcher for LangGraph Platform data to populate dashboard statistics."""
     
-    def __init__(self):
+    def __init__(self, counters: Optional[RunCounters] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
         # Get configuration from environment variables
         self.langgraph_api_key = os.getenv("LANGSMITH_API_KEY")
         self.endpoint = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
@@ -29,6 +44,13 @@ class LangGraphPlatformFetcher:
         if not self.langgraph_api_key:
             raise ValueError("LANGSMITH_API_KEY environment variable is required")
         
+        # The deployment is usually remote, so its graph cannot record our counters: the
+        # fetched thread statuses are reconciled into a counter source of this graph
+        self.counters = counters or get_run_counters()
+        self.counter_source = f"langgraph_platform:{self.graph_id}"
+        # Thread fetches go through the aggregator: pooled async client, deadline, stale-while-revalidate
+        self.aggregator = DashboardAggregator([langgraph_platform_source(self)], transport=transport)
+        
         print(f"Initialized LangGraph Platform Fetcher")
         print(f"Endpoint: {self.endpoint}")
         print(f"Graph ID: {self.graph_id}")
@@ -63,83 +85,87 @@ class LangGraphPlatformFetcher:
                 "timestamp": datetime.now().isoformat()
             }
     
+    @property
+    def threads_url(self) -> str:
+        return f"{self.endpoint}/graphs/{self.graph_id}/threads"
+    
+    @property
+    def request_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.langgraph_api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def fetch_threads(self) -> List[Dict[str, Any]]:
+        """Fetch email threads from LangGraph Platform, raising on failure"""
+        response = requests.get(self.threads_url, headers=self.request_headers, timeout=30)
+        print(f"Threads response status: {response.status_code}")
+        response.raise_for_status()
+        return response.json().get("threads", [])
+    
     def get_email_threads(self) -> List[Dict[str, Any]]:
         """Fetch email threads from LangGraph Platform"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.langgraph_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Try to fetch threads from the graph
-            url = f"{self.endpoint}/graphs/{self.graph_id}/threads"
-            response = requests.get(url, headers=headers, timeout=30)
-            
-            print(f"Threads response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                threads = data.get("threads", [])
-                return threads
-            else:
-                print(f"Failed to fetch threads: {response.status_code} - {response.text}")
-                return []
-                
+            return self.fetch_threads()
         except Exception as e:
             print(f"Error fetching email threads: {e}")
             return []
     
     def get_dashboard_data(self) -> Dict[str, Any]:
         """Get comprehensive dashboard data from LangGraph Platform"""
+        print("=== Starting LangGraph Platform data fetch ===")
+        
+        # No separate health check: a failed thread fetch is the connection failure
+        result = self.aggregator.get_source_data("langgraph_platform")
+        if result["data"] is None:
+            return self.connection_failed_data(result["error"])
+        if result["status"] == "stale":
+            return {**result["data"], "stale": True}
+        return result["data"]
+    
+    def connection_failed_data(self, message: str) -> Dict[str, Any]:
+        """Dashboard data reported when the threads could not be fetched"""
+        return {
+            "error": "Not connected to LangGraph Platform",
+            "connection_status": {
+                "status": "error",
+                "message": f"Connection failed: {message}",
+                "endpoint": self.endpoint,
+                "timestamp": datetime.now().isoformat()
+            },
+            "total_emails": 0,
+            "processed": 0,
+            "hitl": 0,
+            "ignored": 0,
+            "waiting_action": 0,
+            "scheduled_meetings": 0,
+            "notifications": 0,
+            "threads": [],
+            "source": "LangGraph Platform - Connection Failed"
+        }
+    
+    def build_dashboard_data(self, threads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the dashboard data from fetched threads"""
         try:
-            print("=== Starting LangGraph Platform data fetch ===")
-            
-            # Test connection first
-            connection_status = self.test_connection()
-            print(f"Connection test result: {connection_status}")
-            
-            if connection_status.get("status") != "connected":
-                return {
-                    "error": "Not connected to LangGraph Platform",
-                    "connection_status": connection_status,
-                    "total_emails": 0,
-                    "processed": 0,
-                    "hitl": 0,
-                    "ignored": 0,
-                    "waiting_action": 0,
-                    "scheduled_meetings": 0,
-                    "notifications": 0,
-                    "threads": [],
-                    "source": "LangGraph Platform - Connection Failed"
-                }
-            
-            # Fetch email threads
-            threads = self.get_email_threads()
-            
-            # Process threads to extract statistics
-            total_emails = len(threads)
-            processed = 0
-            hitl = 0
-            ignored = 0
-            waiting_action = 0
-            scheduled_meetings = 0
-            notifications = 0
-            
-            # Analyze thread statuses
-            for thread in threads:
-                status = thread.get("status", "unknown").lower()
-                if status in ["processed", "completed", "done"]:
-                    processed += 1
-                elif status in ["hitl", "human_in_the_loop", "waiting_human"]:
-                    hitl += 1
-                elif status in ["ignored", "skipped"]:
-                    ignored += 1
-                elif status in ["waiting", "pending", "in_progress"]:
-                    waiting_action += 1
-                elif status in ["scheduled", "meeting_scheduled"]:
-                    scheduled_meetings += 1
-                elif status in ["notification", "alert"]:
-                    notifications += 1
+            self.counters.reconcile(self.counter_source, [
+                (
+                    thread.get("thread_id", ""),
+                    STATUS_COUNTERS.get(thread.get("status", "unknown").lower(), "other"),
+                    thread.get("created_at"),
+                )
+                for thread in threads
+            ])
+            # Meetings and notifications are thread statuses here, so they read like the other buckets
+            statistics = status_statistics(
+                self.counters.totals(self.counter_source), tags=("scheduled_meetings", "notifications")
+            )
+            total_emails = statistics["total_emails"]
+            processed = statistics["processed"]
+            hitl = statistics["hitl"]
+            ignored = statistics["ignored"]
+            waiting_action = statistics["waiting_action"]
+            scheduled_meetings = statistics["scheduled_meetings"]
+            notifications = statistics["notifications"]
             
             print(f"Total processed: {total_emails}, Waiting HITL: {hitl}, Failed: {ignored}")
             print(f"Returning result with {total_emails} emails")
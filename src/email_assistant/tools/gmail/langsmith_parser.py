@@ -4,47 +4,180 @@ LangSmith Data Parser
 
 This module fetches data from LangSmith and formats it for the dashboard.
 It provides functions to get email statistics, thread information, and status updates.
+
+Runs are synced incrementally into a local SQLite aggregate (``langsmith_runs.sqlite``
+in the data directory): ``/runs/search`` is paged with cursors, only runs started at
+or after the newest run already stored are requested, and runs that were still open
+are re-fetched by id until they finish. Every stored run is also recorded in the
+run counters (run_counters.py), and the statistics are read from their totals.
 """
 
 import os
 import requests
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from pathlib import Path
+from typing import Dict, Generator, List, Optional, Any, Union
+
+import httpx
 from dotenv import load_dotenv
 
+from email_assistant.db import ThreadLocalConnection, default_db_path
+from email_assistant.tools.gmail.dashboard_aggregator import DashboardAggregator, langsmith_source
+from email_assistant.tools.gmail.priority import get_priority_scorer
+from email_assistant.tools.gmail.run_counters import RunCounters, get_run_counters, status_statistics
+
 load_dotenv()
 
+# Runs requested per /runs/search page
+PAGE_SIZE = 100
+
+# LangSmith run statuses that can still change
+OPEN_STATUSES = ("running", "pending")
+
+# Counter source of the synced runs, per project
+COUNTER_SOURCE = "langsmith:{project}"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    run_status TEXT NOT NULL,
+    status TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    is_meeting INTEGER NOT NULL,
+    email TEXT NOT NULL,
+    activity TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_project_start ON runs (project, start_time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    project TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL
+);
+"""
+
+class LangSmithRunStore:
+    """Local aggregate of the runs synced from LangSmith.
+
+    Args:
+        path: Database file. Defaults to ``langsmith_runs.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("langsmith_runs.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def watermark(self, project: str) -> Optional[str]:
+        """Return the start time of the newest run stored for a project."""
+        row = self._conn.get().execute("SELECT watermark FROM sync_state WHERE project = ?", (project,)).fetchone()
+        return row["watermark"] if row else None
+
+    def set_watermark(self, project: str, watermark: str) -> None:
+        with self._conn.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sync_state (project, watermark) VALUES (?, ?) "
+                "ON CONFLICT(project) DO UPDATE SET watermark = MAX(watermark, excluded.watermark)",
+                (project, watermark),
+            )
+
+    def upsert(self, project: str, rows: List[Dict[str, Any]]) -> None:
+        """Insert or replace formatted runs (see LangSmithParser._format_run)."""
+        with self._conn.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO runs (id, project, run_status, status, start_time, is_meeting, email, activity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        row["email"]["id"], project, row["run_status"], row["email"]["status"],
+                        row["email"]["timestamp"], int(row["is_meeting"]),
+                        json.dumps(row["email"]), json.dumps(row["activity"]),
+                    )
+                    for row in rows
+                ],
+            )
+
+    def open_run_ids(self, project: str) -> List[str]:
+        """Return the ids of stored runs that had not finished when last synced."""
+        placeholders = ", ".join("?" for _ in OPEN_STATUSES)
+        rows = self._conn.get().execute(
+            f"SELECT id FROM runs WHERE project = ? AND run_status IN ({placeholders})", (project, *OPEN_STATUSES)
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def count(self, project: str) -> int:
+        """Return how many runs are stored for a project."""
+        return self._conn.get().execute("SELECT COUNT(*) FROM runs WHERE project = ?", (project,)).fetchone()[0]
+
+    def counter_events(self, project: str) -> List[tuple]:
+        """Return a run counter event for every stored run of a project."""
+        rows = self._conn.get().execute(
+            "SELECT id, status, start_time, is_meeting FROM runs WHERE project = ?", (project,)
+        ).fetchall()
+        return [
+            (row["id"], row["status"], row["start_time"], ("scheduled_meetings",) if row["is_meeting"] else ())
+            for row in rows
+        ]
+
+    def recent(self, project: str, limit: int, column: str = "email") -> List[Dict[str, Any]]:
+        """Return the stored ``email`` or ``activity`` records of the newest runs."""
+        if column not in ("email", "activity"):
+            raise ValueError(f"Unknown column: {column}")
+        rows = self._conn.get().execute(
+            f"SELECT {column} FROM runs WHERE project = ? ORDER BY start_time DESC LIMIT ?", (project, limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
 class LangSmithParser:
     """Parser for LangSmith data to populate dashboard statistics."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        store: Optional[LangSmithRunStore] = None,
+        counters: Optional[RunCounters] = None,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.langsmith_api_key = os.getenv("LANGSMITH_API_KEY", "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")
         self.langsmith_endpoint = os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
         self.graph_id = os.getenv("GRAPH_ID", "email_assistant_hitl_memory_gmail")
+        self.timeout = timeout
         
         # LangSmith uses x-api-key header instead of Authorization
         self.headers = {
             'Content-Type': 'application/json',
             'x-api-key': self.langsmith_api_key
         }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.store = store or LangSmithRunStore()
+        self.counters = counters or get_run_counters()
+        self.counter_source = COUNTER_SOURCE.format(project=self.graph_id)
+        self._counters_checked = False
+        # get_dashboard_data syncs through the aggregator (async client, deadline, stale-while-revalidate)
+        self.aggregator = DashboardAggregator([langsmith_source(self)], transport=transport)
     
     def get_dashboard_data(self) -> Dict[str, Any]:
         """Get comprehensive dashboard data from LangSmith."""
+        result = self.aggregator.get_source_data("langsmith")
+        if result["data"] is not None:
+            return {**result["data"], "stale": True} if result["status"] == "stale" else result["data"]
+        print(f"Error syncing LangSmith runs: {result['error']}")
+        if self.store.watermark(self.graph_id) is None:
+            return self._get_fallback_data()
+        # Runs from earlier syncs are still in the local store
+        return self.build_dashboard_data()
+    
+    def build_dashboard_data(self) -> Dict[str, Any]:
+        """Build the dashboard data from the runs synced so far."""
         try:
-            # Get basic statistics
-            statistics = self._get_statistics()
-            
-            # Get email threads
-            emails = self._get_email_threads()
-            
-            # Get recent activity
-            recent_activity = self._get_recent_activity()
-            
             return {
-                "statistics": statistics,
-                "emails": emails,
-                "recent_activity": recent_activity,
+                "statistics": self._get_statistics(),
+                "emails": self._get_email_threads(),
+                "recent_activity": self._get_recent_activity(),
                 "last_updated": datetime.now().isoformat(),
                 "source": "langsmith"
             }
@@ -53,185 +186,163 @@ class LangSmithParser:
             print(f"Error fetching dashboard data: {e}")
             return self._get_fallback_data()
     
-    def _get_statistics(self) -> Dict[str, int]:
-        """Get email statistics from LangSmith."""
+    def sync(self) -> int:
+        """Pull runs newer than the stored watermark, and refresh runs that were still open.
+        
+        Returns:
+            Number of runs written to the local store
+        """
+        steps = self.sync_steps()
         try:
-            # Try to get runs using POST method (LangSmith often requires POST for queries)
-            runs_response = requests.post(
-                f"{self.langsmith_endpoint}/runs/search",
-                headers=self.headers,
-                json={
-                    "project": self.graph_id,
-                    "limit": 100
-                }
+            body = next(steps)
+            while True:
+                response = self.session.post(self.search_url, json=body, timeout=self.timeout)
+                response.raise_for_status()
+                body = steps.send(response.json())
+        except StopIteration as done:
+            return done.value
+    
+    @property
+    def search_url(self) -> str:
+        return f"{self.langsmith_endpoint}/runs/search"
+    
+    def sync_steps(self) -> Generator[Dict[str, Any], Dict[str, Any], int]:
+        """Run one sync without doing any I/O itself.
+        
+        Yields the /runs/search request bodies; the caller POSTs each one and sends
+        back the response JSON. ``sync`` drives it with requests, the dashboard
+        aggregator with an async client.
+        
+        Returns:
+            Number of runs written to the local store
+        """
+        watermark = self.store.watermark(self.graph_id)
+        body: Dict[str, Any] = {"project": self.graph_id}
+        if watermark:
+            # gte: runs sharing the watermark's start time may have arrived after the last sync
+            body["filter"] = f'gte(start_time, "{watermark}")'
+        
+        self._backfill_counters()
+        # Store each page as it arrives
+        timestamps = yield from self._search_runs(body)
+        
+        # Runs still running at the last sync are older than the watermark; fetch them by id
+        open_ids = self.store.open_run_ids(self.graph_id)
+        for offset in range(0, len(open_ids), PAGE_SIZE):
+            yield from self._search_runs({"project": self.graph_id, "id": open_ids[offset:offset + PAGE_SIZE]})
+        
+        # Only advanced once every page was stored, so an interrupted sync is retried in full
+        newest = max(filter(None, timestamps), default=None)
+        if newest and (watermark is None or newest > watermark):
+            self.store.set_watermark(self.graph_id, newest)
+        return len(timestamps)
+    
+    def _store_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Store formatted runs and record their status in the run counters."""
+        self.store.upsert(self.graph_id, rows)
+        self.counters.record_many(self.counter_source, [
+            (
+                row["email"]["id"], row["email"]["status"], row["email"]["timestamp"],
+                ("scheduled_meetings",) if row["is_meeting"] else (),
             )
-            
-            if runs_response.status_code == 200:
-                runs_data = runs_response.json()
-                runs = runs_data.get("runs", [])
-                
-                # Count by status
-                status_counts = {
-                    "processed": 0,
-                    "hitl": 0,
-                    "ignored": 0,
-                    "waiting_action": 0
-                }
-                
-                for run in runs:
-                    status = run.get("status", "unknown").lower()
-                    if status == "completed":
-                        status_counts["processed"] += 1
-                    elif status == "interrupted":
-                        status_counts["hitl"] += 1
-                    elif status == "failed":
-                        status_counts["ignored"] += 1
-                    else:
-                        status_counts["waiting_action"] += 1
-                
-                return {
-                    "total_emails": len(runs),
-                    "processed": status_counts["processed"],
-                    "hitl": status_counts["hitl"],
-                    "ignored": status_counts["ignored"],
-                    "waiting_action": status_counts["waiting_action"],
-                    "scheduled_meetings": self._count_scheduled_meetings(runs),
-                    "notifications": len(runs)
-                }
-            
-        except Exception as e:
-            print(f"Error fetching statistics: {e}")
+            for row in rows
+        ])
+    
+    def _backfill_counters(self) -> None:
+        """Record runs stored before the counters existed (checked once per parser)."""
+        if self._counters_checked:
+            return
+        if self.counters.items(self.counter_source) < self.store.count(self.graph_id):
+            self.counters.record_many(self.counter_source, self.store.counter_events(self.graph_id))
+        self._counters_checked = True
+    
+    def _search_runs(self, body: Dict[str, Any]) -> Generator[Dict[str, Any], Dict[str, Any], List[str]]:
+        """Page through /runs/search results, storing each page.
+        
+        Yields each page's request body and is sent its response JSON, following
+        the response cursors.
+        
+        Returns:
+            Start times of the stored runs
+        """
+        timestamps = []
+        cursor = None
+        while True:
+            page_body = {**body, "limit": PAGE_SIZE}
+            if cursor:
+                page_body["cursor"] = cursor
+            data = yield page_body
+            runs = data.get("runs", [])
+            if runs:
+                rows = [self._format_run(run) for run in runs]
+                self._store_rows(rows)
+                timestamps.extend(row["email"]["timestamp"] for row in rows)
+            cursor = (data.get("cursors") or {}).get("next")
+            if not cursor or not runs:
+                return timestamps
+    
+    def _format_run(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a LangSmith run into the records kept in the local store."""
+        run_input = run.get("inputs") or {}
+        run_output = run.get("outputs") or {}
+        email_input = run_input.get("email_input") or {}
+        
+        # Try to get email content from various possible fields
+        email_content = (
+            email_input.get("body") or
+            email_input.get("preview") or
+            run_input.get("body") or
+            run_input.get("content") or
+            run_output.get("email_content") or
+            "No content available"
+        )
+        subject = email_input.get("subject") or run_input.get("subject") or "No Subject"
+        sender = email_input.get("from") or run_input.get("from") or "Unknown Sender"
+        recipient = email_input.get("to") or run_input.get("to") or "Unknown Recipient"
         
-        # Return fallback statistics
         return {
-            "total_emails": 0,
-            "processed": 0,
-            "hitl": 0,
-            "ignored": 0,
-            "waiting_action": 0,
-            "scheduled_meetings": 0,
-            "notifications": 0
+            "run_status": (run.get("status") or "unknown").lower(),
+            "is_meeting": self._is_meeting(run),
+            "email": {
+                "id": run.get("id", ""),
+                "subject": self._format_subject(subject),
+                "from": sender,
+                "to": recipient,
+                "timestamp": run.get("start_time") or "",
+                "status": self._map_run_status(run.get("status") or "unknown"),
+                "priority": self._determine_priority(subject, email_content, run.get("id")),
+                "content_preview": self._get_content_preview(email_content),
+                "metadata": {
+                    "run_id": run.get("id"),
+                    "graph_id": self.graph_id,
+                    "execution_time": run.get("execution_time"),
+                    "latency": run.get("latency")
+                },
+                "last_updated": run.get("end_time") or run.get("start_time") or ""
+            },
+            "activity": {
+                "id": run.get("id"),
+                "type": "email_processing",
+                "status": run.get("status"),
+                "timestamp": run.get("start_time"),
+                "duration": run.get("execution_time"),
+                "graph_id": self.graph_id
+            },
         }
     
+    def _get_statistics(self) -> Dict[str, int]:
+        """Get email statistics from the run counters."""
+        statistics = status_statistics(self.counters.totals(self.counter_source), tags=("scheduled_meetings",))
+        statistics["notifications"] = statistics["total_emails"]
+        return statistics
+    
     def _get_email_threads(self) -> List[Dict[str, Any]]:
-        """Get email threads with formatted data for dashboard."""
-        try:
-            # Get runs from the graph using POST method
-            runs_response = requests.post(
-                f"{self.langsmith_endpoint}/runs/search",
-                headers=self.headers,
-                json={
-                    "project": self.graph_id,
-                    "limit": 50
-                }
-            )
-            
-            if runs_response.status_code == 200:
-                runs_data = runs_response.json()
-                runs = runs_data.get("runs", [])
-                formatted_emails = []
-                
-                for run in runs:
-                    # Extract email data from run
-                    run_input = run.get("inputs", {})
-                    run_output = run.get("outputs", {})
-                    
-                    # Try to get email content from various possible fields
-                    email_content = (
-                        run_input.get("email_input", {}).get("body") or
-                        run_input.get("body") or
-                        run_input.get("content") or
-                        run_output.get("email_content") or
-                        "No content available"
-                    )
-                    
-                    subject = (
-                        run_input.get("email_input", {}).get("subject") or
-                        run_input.get("subject") or
-                        "No Subject"
-                    )
-                    
-                    sender = (
-                        run_input.get("email_input", {}).get("from") or
-                        run_input.get("from") or
-                        "Unknown Sender"
-                    )
-                    
-                    recipient = (
-                        run_input.get("email_input", {}).get("to") or
-                        run_input.get("to") or
-                        "Unknown Recipient"
-                    )
-                    
-                    # Format email data for dashboard
-                    formatted_email = {
-                        "id": run.get("id", ""),
-                        "subject": self._format_subject(subject),
-                        "from": sender,
-                        "to": recipient,
-                        "timestamp": run.get("start_time", ""),
-                        "status": self._map_run_status(run.get("status", "unknown")),
-                        "priority": self._determine_priority(subject, email_content),
-                        "content_preview": self._get_content_preview(email_content),
-                        "metadata": {
-                            "run_id": run.get("id"),
-                            "graph_id": self.graph_id,
-                            "execution_time": run.get("execution_time"),
-                            "latency": run.get("latency")
-                        },
-                        "last_updated": run.get("end_time", run.get("start_time", ""))
-                    }
-                    
-                    formatted_emails.append(formatted_email)
-                
-                # Sort by timestamp (newest first)
-                formatted_emails.sort(
-                    key=lambda x: x["timestamp"], 
-                    reverse=True
-                )
-                
-                return formatted_emails
-                
-        except Exception as e:
-            print(f"Error fetching email threads: {e}")
-        
-        return []
+        """Get email threads with formatted data for dashboard (newest first)."""
+        return self.store.recent(self.graph_id, 50)
     
     def _get_recent_activity(self) -> List[Dict[str, Any]]:
-        """Get recent activity from LangSmith."""
-        try:
-            # Get recent runs using POST method
-            runs_response = requests.post(
-                f"{self.langsmith_endpoint}/runs/search",
-                headers=self.headers,
-                json={
-                    "project": self.graph_id,
-                    "limit": 20
-                }
-            )
-            
-            if runs_response.status_code == 200:
-                runs_data = runs_response.json()
-                runs = runs_data.get("runs", [])
-                
-                activities = []
-                for run in runs:
-                    activity = {
-                        "id": run.get("id"),
-                        "type": "email_processing",
-                        "status": run.get("status"),
-                        "timestamp": run.get("start_time"),
-                        "duration": run.get("execution_time"),
-                        "graph_id": self.graph_id
-                    }
-                    activities.append(activity)
-                
-                return activities
-                
-        except Exception as e:
-            print(f"Error fetching recent activity: {e}")
-        
-        return []
+        """Get recent activity from the synced runs."""
+        return self.store.recent(self.graph_id, 20, column="activity")
     
     def _format_subject(self, subject: str) -> str:
         """Format email subject for better readability."""
@@ -265,28 +376,9 @@ class LangSmithParser:
         
         return status_mapping.get(run_status.lower(), "waiting_action")
     
-    def _determine_priority(self, subject: str, content: str) -> str:
+    def _determine_priority(self, subject: str, content: str, run_id: Optional[str] = None) -> str:
         """Determine email priority based on content and metadata."""
-        subject_lower = subject.lower()
-        content_lower = content.lower()
-        
-        # High priority keywords
-        high_priority = ["urgent", "asap", "emergency", "critical", "important", "deadline"]
-        
-        # Medium priority keywords
-        medium_priority = ["meeting", "call", "schedule", "request", "question"]
-        
-        # Check for high priority
-        for keyword in high_priority:
-            if keyword in subject_lower or keyword in content_lower:
-                return "high"
-        
-        # Check for medium priority
-        for keyword in medium_priority:
-            if keyword in subject_lower or keyword in content_lower:
-                return "medium"
-        
-        return "low"
+        return get_priority_scorer().score(subject, content, run_id)
     
     def _get_content_preview(self, content: str, max_length: int = 100) -> str:
         """Get a preview of email content."""
@@ -302,22 +394,12 @@ class LangSmithParser:
         
         return content[:max_length] + "..."
     
-    def _count_scheduled_meetings(self, runs: List[Dict]) -> int:
-        """Count scheduled meetings from run data."""
-        try:
-            meeting_count = 0
-            for run in runs:
-                run_input = run.get("inputs", {})
-                subject = run_input.get("email_input", {}).get("subject", "").lower()
-                content = run_input.get("email_input", {}).get("body", "").lower()
-                
-                if "meeting" in subject or "meeting" in content:
-                    meeting_count += 1
-            
-            return meeting_count
-        except Exception as e:
-            print(f"Error counting scheduled meetings: {e}")
-            return 0
+    def _is_meeting(self, run: Dict[str, Any]) -> bool:
+        """Whether a run's email mentions a meeting."""
+        email_input = (run.get("inputs") or {}).get("email_input") or {}
+        subject = (email_input.get("subject") or "").lower()
+        content = (email_input.get("body") or email_input.get("preview") or "").lower()
+        return "meeting" in subject or "meeting" in content
     
     def _get_fallback_data(self) -> Dict[str, Any]:
         """Get fallback data when LangSmith is not accessible."""
@@ -351,9 +433,8 @@ class LangSmithParser:
             
             for endpoint in endpoints_to_try:
                 try:
-                    response = requests.get(
+                    response = self.session.get(
                         endpoint,
-                        headers=self.headers,
                         timeout=10
                     )
                     
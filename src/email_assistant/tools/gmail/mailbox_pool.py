@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+"""
+Multi-mailbox ingestion over a pool of workers.
+
+run_ingest and the ingest daemon handle one ``--email``. The pool ingests every
+mailbox of a registry (see mailbox_registry.py):
+
+- ``workers`` threads each run their own event loop with one LangGraph client;
+  Gmail clients come from the service pool, per mailbox credential and thread
+- mailboxes are scheduled earliest-due first, each with its own adaptive
+  interval (see ingest_daemon.py). A turn submits at most ``--max-threads``
+  threads, so a busy mailbox goes back in the queue behind the others instead of
+  holding a worker
+- each poll holds the mailbox's ingest lease, so a cron run or another pool
+  process never ingests the same mailbox at the same time; several processes
+  split a registry with ``--shard INDEX/COUNT``
+- every poll's Gmail quota units are booked per mailbox, and a mailbox that has
+  used its ``daily_quota_units`` waits for the next UTC day
+
+Usage:
+    python -m email_assistant.tools.gmail.mailbox_pool run --registry mailboxes.json --workers 8
+    python -m email_assistant.tools.gmail.mailbox_pool status
+    python src/email_assistant/tools/gmail/run_ingest.py --registry mailboxes.json  # one pass
+"""
+
+import argparse
+import asyncio
+import copy
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from email_assistant.lease import DEFAULT_TTL, hold_lease
+from email_assistant.tools.gmail.ingest_daemon import (
+    DEFAULT_BACKOFF,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    AdaptiveInterval,
+    catch_up_args,
+)
+from email_assistant.tools.gmail.mailbox_registry import (
+    Mailbox,
+    MailboxQuota,
+    MeteredService,
+    get_mailbox_quota,
+    in_shard,
+    load_registry,
+)
+from email_assistant.tools.gmail.run_ingest import build_arg_parser, ingest_lease_name, ingest_new_emails
+
+DEFAULT_WORKERS = 4
+
+@dataclass
+class MailboxState:
+    """Scheduling state of one mailbox in the pool."""
+
+    mailbox: Mailbox
+    interval: AdaptiveInterval
+    last_success: Optional[float] = None
+    status: Dict[str, Any] = field(default_factory=dict)
+
+class MailboxScheduler:
+    """Thread-safe earliest-due-first queue of mailboxes.
+
+    A mailbox is in the queue at most once: a worker takes it out for its turn
+    and puts it back with its next due time, so two workers never poll the same
+    mailbox. Mailboxes due at the same time are served in the order they were queued.
+
+    Args:
+        states: Mailboxes to schedule, all due now
+        repeat: Put mailboxes back after their turn (False: one pass over each)
+    """
+
+    def __init__(self, states: Sequence[MailboxState], repeat: bool = True):
+        self.repeat = repeat
+        self._order = itertools.count()
+        now = time.monotonic()
+        self._queue: List[Tuple[float, int, MailboxState]] = [(now, next(self._order), state) for state in states]
+        heapq.heapify(self._queue)
+        self._busy = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+
+    def take(self) -> Optional[MailboxState]:
+        """Block until a mailbox is due and return it; None once the pool is done."""
+        with self._condition:
+            while True:
+                if self._stopped or (not self._queue and not (self.repeat and self._busy)):
+                    return None
+                if self._queue:
+                    delay = self._queue[0][0] - time.monotonic()
+                    if delay <= 0:
+                        self._busy += 1
+                        return heapq.heappop(self._queue)[2]
+                else:
+                    delay = None
+                self._condition.wait(delay)
+
+    def done(self, state: MailboxState, delay: float) -> None:
+        """End a mailbox's turn; it is due again after ``delay`` seconds."""
+        with self._condition:
+            self._busy -= 1
+            if self.repeat:
+                heapq.heappush(self._queue, (time.monotonic() + delay, next(self._order), state))
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        """Make every take() return None."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+def _next_utc_day() -> float:
+    """Seconds until the next UTC midnight (when daily quota budgets reset)."""
+    now = datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    return (midnight - now).total_seconds()
+
+class MailboxPool:
+    """Ingest the mailboxes of a registry on a pool of worker threads.
+
+    Args:
+        mailboxes: Registered mailboxes (already filtered to this process's shard)
+        args: Ingestion arguments shared by every mailbox (see run_ingest.parse_args)
+        workers: Worker threads
+        min_interval: Seconds between a mailbox's polls while its mail is arriving
+        max_interval: Longest interval of an idle mailbox
+        backoff: Interval multiplier after each idle poll
+        quota: Quota ledger (default: the process-wide ledger)
+        leases: Lease store (default: the process-wide store)
+        service_factory: Returns the Gmail service of a mailbox (default: the service pool)
+        client_factory: Returns a LangGraph client for a URL, called on each worker's loop
+    """
+
+    def __init__(
+        self,
+        mailboxes: Sequence[Mailbox],
+        args,
+        workers: int = DEFAULT_WORKERS,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+        quota: Optional[MailboxQuota] = None,
+        leases=None,
+        service_factory=None,
+        client_factory=None,
+    ):
+        self.args = args
+        self.workers = max(1, workers)
+        self.states = [
+            MailboxState(mailbox, AdaptiveInterval(min_interval, max_interval, backoff))
+            for mailbox in mailboxes
+        ]
+        self.quota = quota
+        self.leases = leases
+        self.service_factory = service_factory or self._pooled_service
+        self.client_factory = client_factory or self._langgraph_client
+        self._scheduler: Optional[MailboxScheduler] = None
+
+    @staticmethod
+    def _pooled_service(mailbox: Mailbox):
+        from email_assistant.tools.gmail.service_pool import get_service
+
+        return get_service("gmail", "v1", gmail_token=mailbox.token())
+
+    @staticmethod
+    def _langgraph_client(url: str):
+        from langgraph_sdk import get_client
+
+        return get_client(url=url)
+
+    def mailbox_args(self, state: MailboxState, now: float):
+        """Return the ingestion arguments of a mailbox's next poll."""
+        args = copy.copy(self.args)
+        args.email = state.mailbox.email
+        args.mailbox = state.mailbox
+        args.registry = None
+        for option, value in state.mailbox.options.items():
+            setattr(args, option, value)
+        return catch_up_args(args, state.last_success, now)
+
+    async def poll_mailbox(self, state: MailboxState, clients: Dict[str, Any]) -> float:
+        """Give a mailbox one turn and return the delay before its next one."""
+        mailbox = state.mailbox
+        quota = self.quota or get_mailbox_quota()
+        if quota.exhausted(mailbox):
+            state.status.update(state="over_quota", checked_at=time.time())
+            return min(_next_utc_day(), state.interval.max_interval)
+
+        with hold_lease(ingest_lease_name(mailbox.email), DEFAULT_TTL, self.leases) as lease:
+            if lease is None:
+                state.status.update(state="skipped", checked_at=time.time())
+                return state.interval.min_interval
+
+            started = time.time()
+            args = self.mailbox_args(state, started)
+            max_threads = getattr(args, "max_threads", 0)
+            service = None
+            processed = 0
+            try:
+                service = MeteredService(self.service_factory(mailbox))
+                if args.url not in clients:
+                    clients[args.url] = self.client_factory(args.url)
+                found, processed = await ingest_new_emails(service, args, clients[args.url], lease)
+            except Exception as e:
+                print(f"Error ingesting {mailbox.email}: {str(e)}")
+                state.status.update(state="error", error=str(e), checked_at=time.time())
+                delay = state.interval.update(0)
+            else:
+                # A turn cut short leaves older mail behind: keep searching from the previous poll
+                if not (max_threads and processed >= max_threads):
+                    state.last_success = started
+                state.status.update(state="ok", found=found, processed=processed, checked_at=time.time())
+                state.status.pop("error", None)
+                delay = state.interval.update(found)
+            finally:
+                if service is not None:
+                    quota.record(mailbox.email, service.units, service.calls, processed)
+        return delay
+
+    def _work(self) -> None:
+        loop = asyncio.new_event_loop()
+        # One LangGraph client per deployment URL, bound to this worker's loop
+        clients: Dict[str, Any] = {}
+        try:
+            while True:
+                state = self._scheduler.take()
+                if state is None:
+                    return
+                delay = state.interval.max_interval
+                try:
+                    delay = loop.run_until_complete(self.poll_mailbox(state, clients))
+                finally:
+                    self._scheduler.done(state, delay)
+        finally:
+            loop.close()
+
+    def run(self, repeat: bool = True) -> None:
+        """Run the workers until stop() (or, with ``repeat=False``, one turn per mailbox)."""
+        self._scheduler = MailboxScheduler(self.states, repeat=repeat)
+        threads = [
+            threading.Thread(target=self._work, name=f"mailbox-worker-{i}", daemon=True)
+            for i in range(min(self.workers, len(self.states)))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                # A timeout keeps the main thread responsive to Ctrl+C
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        finally:
+            self._scheduler.stop()
+
+    def stop(self) -> None:
+        """Let the workers finish their current turn and exit."""
+        if self._scheduler is not None:
+            self._scheduler.stop()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Return each mailbox's last turn and current interval."""
+        return {
+            state.mailbox.email: {**state.status, "interval": state.interval.current}
+            for state in self.states
+        }
+
+def pool_from_args(args, repeat: bool = True) -> MailboxPool:
+    """Build a pool for the registry, shard and worker arguments of run_ingest."""
+    mailboxes = [mailbox for mailbox in load_registry(args.registry) if in_shard(mailbox.email, args.shard)]
+    print(f"Ingesting {len(mailboxes)} mailboxes from {args.registry} with {args.workers} workers")
+    return MailboxPool(
+        mailboxes,
+        args,
+        workers=args.workers,
+        min_interval=getattr(args, "min_interval", DEFAULT_MIN_INTERVAL),
+        max_interval=getattr(args, "max_interval", DEFAULT_MAX_INTERVAL),
+        backoff=getattr(args, "backoff", DEFAULT_BACKOFF),
+    )
+
+async def ingest_registry(args) -> int:
+    """Give every mailbox of ``args.registry`` one turn (run_ingest --registry, cron)."""
+    try:
+        pool = pool_from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"Error loading mailbox registry: {str(e)}")
+        return 1
+    # The workers run their own event loops, so keep them off the caller's
+    await asyncio.to_thread(pool.run, False)
+    errors = [email for email, status in pool.status().items() if status.get("state") == "error"]
+    if errors:
+        print(f"Ingestion failed for {len(errors)} mailboxes: {', '.join(errors)}")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest every mailbox of a registry on a worker pool")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", parents=[build_arg_parser(add_help=False)], help="Run the pool")
+    run.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL, help="Seconds between a mailbox's polls while mail is arriving")
+    run.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL, help="Longest interval of an idle mailbox")
+    run.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="Interval multiplier after each idle poll")
+
+    status = commands.add_parser("status", help="Show today's Gmail quota use per mailbox")
+    status.add_argument("--day", help="UTC day (YYYY-MM-DD), default today")
+
+    args = parser.parse_args()
+    if args.command == "status":
+        usage = get_mailbox_quota().usage(args.day)
+        if not usage:
+            print("No mailbox polled on that day")
+        for row in usage:
+            print(f"{row['email']:<40}{row['units']:>10} units{row['calls']:>8} calls{row['polls']:>7} polls{row['processed']:>7} processed")
+        return 0
+
+    if not args.registry:
+        parser.error("run needs --registry")
+    pool = pool_from_args(args)
+    try:
+        pool.run()
+    except KeyboardInterrupt:
+        pool.stop()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,298 @@
+"""
+Registry of the mailboxes ingested by the mailbox pool, and their Gmail quota use.
+
+The registry is a JSON file listing each mailbox with its own credentials and
+ingestion options; ``defaults`` apply to every mailbox that does not override them:
+
+    {
+      "defaults": {"minutes_since": 10, "daily_quota_units": 200000},
+      "mailboxes": [
+        {"email": "alice@example.com", "token_file": "secrets/alice.json"},
+        {"email": "bob@example.com", "token_env": "BOB_GMAIL_TOKEN", "include_read": true}
+      ]
+    }
+
+``token_file`` (relative to the registry) or ``token_env`` hold the mailbox's
+token JSON; a mailbox with neither uses the default sources (GMAIL_TOKEN or the
+local token file). The other keys override the run_ingest options of that mailbox.
+
+Each run names its mailbox in its config (``mailbox_run_config``): the address
+and where the token is read, never the token itself. The graph tools resolve the
+Gmail service from it (``mailbox_from_config``), so labels, read marks and replies
+go to the mailbox the email came from. The LangGraph server must therefore see
+the same ``token_env`` variables and ``token_file`` paths as the ingest process.
+
+Gmail quota is charged per API method (see ``GMAIL_QUOTA_UNITS``). The pool
+meters each mailbox's calls through ``MeteredService`` and books them in
+``MailboxQuota``, which also enforces the optional ``daily_quota_units`` budget.
+Only ingestion is metered. Replies sent by the outbox worker and batched label
+changes from the label queue run in other processes (usually the LangGraph
+server) and are not booked, so leave headroom in ``daily_quota_units`` for them.
+"""
+
+import argparse
+import json
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+# run_ingest options a mailbox (or the registry defaults) may set
+MAILBOX_OPTIONS = (
+    "minutes_since",
+    "graph_name",
+    "url",
+    "include_read",
+    "include_triaged",
+    "inbox_only",
+    "category",
+    "exclude_category",
+    "debounce_seconds",
+    "skip_filters",
+)
+
+# Gmail API quota units per method (https://developers.google.com/gmail/api/reference/quota)
+GMAIL_QUOTA_UNITS = {
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "messages.batchModify": 50,
+    "messages.send": 100,
+    "threads.list": 10,
+    "threads.get": 10,
+    "threads.modify": 10,
+    "labels.list": 1,
+    "labels.get": 1,
+    "labels.create": 5,
+    "history.list": 2,
+}
+
+# Units charged for a method missing from GMAIL_QUOTA_UNITS
+DEFAULT_QUOTA_UNITS = 5
+
+@dataclass
+class Mailbox:
+    """One registered mailbox.
+
+    Args:
+        email: Mailbox address (the ingest ``--email``)
+        token_file: File holding the mailbox's token JSON
+        token_env: Environment variable holding the mailbox's token JSON
+        daily_quota_units: Gmail quota units the mailbox may use per UTC day (None = no limit)
+        options: run_ingest options of this mailbox
+    """
+
+    email: str
+    token_file: Optional[Path] = None
+    token_env: Optional[str] = None
+    daily_quota_units: Optional[int] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def token(self) -> Optional[str]:
+        """Return the mailbox's token JSON, or None to use the default token sources."""
+        if self.token_env:
+            token = os.getenv(self.token_env)
+            if not token:
+                raise ValueError(f"{self.token_env} is not set (token of {self.email})")
+            return token
+        if self.token_file:
+            return self.token_file.read_text()
+        return None
+
+def mailbox_run_config(mailbox: Mailbox) -> Dict[str, str]:
+    """Return the run ``configurable`` naming a mailbox and where its token is read."""
+    config = {"gmail_account": mailbox.email}
+    if mailbox.token_env:
+        config["gmail_token_env"] = mailbox.token_env
+    elif mailbox.token_file:
+        # The server may run from another directory
+        config["gmail_token_file"] = str(mailbox.token_file.resolve())
+    return config
+
+def mailbox_from_config(config: Optional[Dict[str, Any]]) -> Optional[Mailbox]:
+    """Return the mailbox a run belongs to (see mailbox_run_config), None if the run names none."""
+    configurable = (config or {}).get("configurable", {})
+    email = configurable.get("gmail_account")
+    if not email:
+        return None
+    token_file = configurable.get("gmail_token_file")
+    return Mailbox(
+        email=email,
+        token_file=Path(token_file) if token_file else None,
+        token_env=configurable.get("gmail_token_env"),
+    )
+
+def load_registry(path: Union[str, Path]) -> List[Mailbox]:
+    """Load the mailboxes of a registry file.
+
+    Raises:
+        ValueError: If the registry is malformed or uses unknown options
+    """
+    path = Path(path)
+    registry = json.loads(path.read_text())
+    defaults = registry.get("defaults", {})
+    mailboxes = []
+    seen = set()
+    for entry in registry.get("mailboxes", []):
+        merged = {**defaults, **entry}
+        email = merged.pop("email", None)
+        if not email:
+            raise ValueError(f"Mailbox without an email in {path}")
+        if email.lower() in seen:
+            raise ValueError(f"Mailbox {email} is registered twice in {path}")
+        seen.add(email.lower())
+
+        token_file = merged.pop("token_file", None)
+        token_env = merged.pop("token_env", None)
+        daily_quota_units = merged.pop("daily_quota_units", None)
+        unknown = set(merged) - set(MAILBOX_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown options for {email}: {', '.join(sorted(unknown))}")
+        mailboxes.append(Mailbox(
+            email=email,
+            token_file=path.parent / token_file if token_file else None,
+            token_env=token_env,
+            daily_quota_units=daily_quota_units,
+            options=merged,
+        ))
+    return mailboxes
+
+def in_shard(email: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """Whether a mailbox belongs to shard ``(index, count)`` (stable across processes)."""
+    if shard is None:
+        return True
+    index, count = shard
+    # Python's hash() is salted per process, so use a fixed checksum
+    return zlib.crc32(email.lower().encode()) % count == index
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse ``INDEX/COUNT`` (e.g. ``0/4``) for argparse."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Expected INDEX/COUNT, e.g. 0/4")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("Expected 0 <= INDEX < COUNT")
+    return index, count
+
+class _MeteredResource:
+    """Wraps a googleapiclient Resource and reports every executed request."""
+
+    def __init__(self, resource, record: Callable[[str], None], path: Tuple[str, ...] = ()):
+        self._resource = resource
+        self._record = record
+        self._path = path
+
+    def __getattr__(self, name):
+        attribute = getattr(self._resource, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            path = self._path + (name,)
+            if hasattr(result, "execute"):
+                return _MeteredRequest(result, self._record, ".".join(p for p in path if p != "users"))
+            return _MeteredResource(result, self._record, path)
+
+        return call
+
+class _MeteredRequest:
+    def __init__(self, request, record: Callable[[str], None], method: str):
+        self._request = request
+        self._record = record
+        self._method = method
+
+    def execute(self, *args, **kwargs):
+        self._record(self._method)
+        return self._request.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
+
+class MeteredService(_MeteredResource):
+    """Gmail service wrapper counting the quota units of the requests it executes."""
+
+    def __init__(self, service):
+        self.units = 0
+        self.calls = 0
+        super().__init__(service, self._charge)
+
+    def _charge(self, method: str) -> None:
+        self.units += GMAIL_QUOTA_UNITS.get(method, DEFAULT_QUOTA_UNITS)
+        self.calls += 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mailbox_usage (
+    email TEXT NOT NULL,
+    day TEXT NOT NULL,
+    units INTEGER NOT NULL DEFAULT 0,
+    calls INTEGER NOT NULL DEFAULT 0,
+    polls INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (email, day)
+);
+"""
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+class MailboxQuota:
+    """SQLite ledger of each mailbox's Gmail quota use per UTC day.
+
+    Args:
+        path: Database file. Defaults to ``mailbox_quota.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("mailbox_quota.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def record(self, email: str, units: int, calls: int, processed: int = 0) -> None:
+        """Book one poll of a mailbox."""
+        with self._conn.transaction() as conn:
+            conn.execute(
+                "INSERT INTO mailbox_usage (email, day, units, calls, polls, processed, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?, ?) ON CONFLICT(email, day) DO UPDATE SET "
+                "units = units + excluded.units, calls = calls + excluded.calls, polls = polls + 1, "
+                "processed = processed + excluded.processed, updated_at = excluded.updated_at",
+                (email.lower(), _today(), units, calls, processed, time.time()),
+            )
+
+    def used(self, email: str, day: Optional[Union[str, date]] = None) -> int:
+        """Return the quota units a mailbox used on a day (default: today, UTC)."""
+        row = self._conn.get().execute(
+            "SELECT units FROM mailbox_usage WHERE email = ? AND day = ?", (email.lower(), str(day or _today()))
+        ).fetchone()
+        return row["units"] if row is not None else 0
+
+    def exhausted(self, mailbox: Mailbox) -> bool:
+        """Whether a mailbox has used its daily budget."""
+        return mailbox.daily_quota_units is not None and self.used(mailbox.email) >= mailbox.daily_quota_units
+
+    def usage(self, day: Optional[Union[str, date]] = None) -> List[Dict]:
+        """Return every mailbox's usage on a day, heaviest first."""
+        rows = self._conn.get().execute(
+            "SELECT email, units, calls, polls, processed FROM mailbox_usage WHERE day = ? ORDER BY units DESC",
+            (str(day or _today()),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+_quota: Optional[MailboxQuota] = None
+
+def get_mailbox_quota() -> MailboxQuota:
+    """Return the process-wide quota ledger."""
+    global _quota
+    if _quota is None:
+        _quota = MailboxQuota()
+    return _quota
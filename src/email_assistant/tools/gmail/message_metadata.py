@@ -0,0 +1,115 @@
+"""
+Local store of reply headers for ingested Gmail messages.
+
+Replying needs the original message's Subject, From and threadId. Ingest already
+has all three, so the graph records them when it starts working on an email and
+``send_email`` looks them up here instead of fetching the original message again.
+On a miss (e.g. a message the assistant never ingested) only the needed headers
+are fetched with ``format="metadata"`` and the result is recorded.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+# Headers needed to build a reply
+REPLY_HEADERS = ["Subject", "From"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS message_metadata (
+    message_id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    subject TEXT,
+    from_email TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+class MessageMetadataStore:
+    """SQLite table of (thread id, subject, sender) per Gmail message id.
+
+    Args:
+        path: Database file. Defaults to ``message_metadata.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("message_metadata.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def remember(
+        self,
+        message_id: str,
+        subject: Optional[str] = None,
+        from_email: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> None:
+        """Record the headers of a message, keeping previously known values for missing fields."""
+        self._conn.get().execute(
+            """
+            INSERT INTO message_metadata (message_id, thread_id, subject, from_email, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(message_id) DO UPDATE SET
+                thread_id = COALESCE(excluded.thread_id, thread_id),
+                subject = COALESCE(excluded.subject, subject),
+                from_email = COALESCE(excluded.from_email, from_email),
+                updated_at = excluded.updated_at
+            """,
+            (message_id, thread_id, subject, from_email, time.time()),
+        )
+
+    def lookup(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded headers of a message, or None if unknown."""
+        row = self._conn.get().execute(
+            "SELECT message_id, thread_id, subject, from_email FROM message_metadata WHERE message_id = ?",
+            (message_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def reply_metadata(self, service, message_id: str) -> Dict[str, Any]:
+        """Return the headers needed to reply to a message.
+
+        Uses the recorded headers when complete, otherwise fetches only the
+        Subject and From headers (``format="metadata"``) and records them.
+
+        Args:
+            service: Gmail v1 service, only used on a miss
+            message_id: Gmail message ID being replied to
+
+        Returns:
+            Dict with message_id, thread_id, subject and from_email
+        """
+        record = self.lookup(message_id)
+        if record and record["thread_id"] and record["subject"] is not None and record["from_email"]:
+            return record
+
+        message = service.users().messages().get(
+            userId="me", id=message_id, format="metadata", metadataHeaders=REPLY_HEADERS
+        ).execute()
+        headers = {header["name"].lower(): header["value"] for header in message["payload"]["headers"]}
+        self.remember(message_id, headers.get("subject", ""), headers["from"], message["threadId"])
+        return self.lookup(message_id)
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+_store: Optional[MessageMetadataStore] = None
+
+def get_metadata_store() -> MessageMetadataStore:
+    """Return the process-wide metadata store."""
+    global _store
+    if _store is None:
+        _store = MessageMetadataStore()
+    return _store
+
+def remember_email_input(email_input: Dict[str, Any]) -> None:
+    """Record the reply headers carried by a graph ``email_input``."""
+    if email_input.get("id"):
+        get_metadata_store().remember(
+            email_input["id"],
+            subject=email_input.get("subject"),
+            from_email=email_input.get("from"),
+            thread_id=email_input.get("thread_id"),
+        )
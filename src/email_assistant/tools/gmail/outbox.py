@@ -0,0 +1,374 @@
+"""
+Durable outbox for outgoing emails.
+
+``send_email_tool`` used to call the Gmail API inside the HITL tool call, report
+failure on any exception and never retry. Accepted drafts are now written to a local
+SQLite queue and sent by a background worker:
+
+- Each draft is keyed by an idempotency key (a hash of the reply target, sender,
+  recipients and text), so re-running a graph step does not queue it twice.
+- The worker retries transient failures with exponential backoff and jitter, and
+  sends through a token bucket so bursts do not trip Gmail's sending limits.
+- Every draft carries a deterministic Message-ID. Before retrying a send whose
+  outcome is unknown (a crash or timeout after the request went out), the worker
+  searches the mailbox for ``rfc822msgid:<id>`` and marks the row as sent if
+  the earlier attempt was delivered.
+- Drafts of a run that names its mailbox (see mailbox_registry.py) keep that
+  mailbox's address and token source, and are sent from it.
+
+Usage:
+    python -m email_assistant.tools.gmail.outbox status [OUTBOX_ID]
+    python -m email_assistant.tools.gmail.outbox worker [--once]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    email_id TEXT NOT NULL,
+    email_address TEXT NOT NULL,
+    response_text TEXT NOT NULL,
+    cc TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    gmail_id TEXT,
+    mailbox TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+class PermanentSendError(Exception):
+    """A send failure that retrying will not fix (e.g. an invalid recipient)."""
+
+def idempotency_key(email_id: str, response_text: str, email_address: str, cc: Optional[List[str]] = None) -> str:
+    """Return the outbox key of a draft: the same draft always maps to the same key."""
+    payload = json.dumps([email_id, email_address, sorted(cc or []), response_text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def message_id_for(key: str) -> str:
+    """Return the deterministic RFC 822 Message-ID header for an outbox entry."""
+    return f"<outbox-{key[:32]}@email-assistant.local>"
+
+class Outbox:
+    """SQLite-backed queue of outgoing emails.
+
+    Args:
+        path: Database file. Defaults to ``outbox.sqlite`` in the data directory.
+        claim_timeout: Seconds after which a row stuck in ``sending`` (worker died
+            mid-send) may be claimed again
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, claim_timeout: float = 300.0):
+        self.path = str(path or default_db_path("outbox.sqlite"))
+        self.claim_timeout = claim_timeout
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def enqueue(
+        self,
+        email_id: str,
+        response_text: str,
+        email_address: str,
+        cc: Optional[List[str]] = None,
+        mailbox: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Queue a draft for sending, unless the same draft is already queued or sent.
+
+        Args:
+            email_id: Gmail message ID being replied to
+            response_text: Reply text
+            email_address: Sender address
+            cc: Additional recipients
+            mailbox: Run config naming the sending mailbox (see mailbox_registry.mailbox_run_config);
+                None sends from the default account
+
+        Returns:
+            The outbox row (new or existing)
+        """
+        key = idempotency_key(email_id, response_text, email_address, cc)
+        now = time.time()
+        with self._conn.transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO outbox
+                    (id, email_id, email_address, response_text, cc, message_id,
+                     status, next_attempt_at, mailbox, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, email_id, email_address, response_text, json.dumps(cc or []),
+                 message_id_for(key), QUEUED, now, json.dumps(mailbox or {}), now, now),
+            )
+            # Re-submitting a failed draft queues it again. attempts stays above 1 so
+            # the next send still checks whether an earlier attempt was delivered
+            conn.execute(
+                """
+                UPDATE outbox SET status = ?, attempts = 1, next_attempt_at = ?, updated_at = ?
+                WHERE id = ? AND status = ?
+                """,
+                (QUEUED, now, now, key, FAILED),
+            )
+        return self.get(key)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return an outbox row by key or unique key prefix."""
+        rows = self._conn.get().execute(
+            "SELECT * FROM outbox WHERE id LIKE ? LIMIT 2", (key + "%",)
+        ).fetchall()
+        return _row(rows[0]) if len(rows) == 1 else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent rows, optionally filtered by status."""
+        query = "SELECT * FROM outbox"
+        params: List[Any] = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return [_row(row) for row in self._conn.get().execute(query, params).fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of rows per status."""
+        rows = self._conn.get().execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the next due row and mark it ``sending``.
+
+        Returns:
+            The claimed row with ``attempts`` already incremented, or None
+        """
+        now = time.time()
+        with self._conn.transaction() as conn:
+            row = conn.execute(
+                """
+                SELECT id FROM outbox
+                WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND claimed_at < ?)
+                ORDER BY next_attempt_at
+                LIMIT 1
+                """,
+                (QUEUED, now, SENDING, now - self.claim_timeout),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE outbox SET status = ?, claimed_at = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (SENDING, now, now, row["id"]),
+            )
+        return self.get(row["id"])
+
+    def _update(self, key: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._conn.transaction() as conn:
+            conn.execute(f"UPDATE outbox SET {assignments} WHERE id = ?", (*fields.values(), key))
+
+    def mark_sent(self, key: str, gmail_id: Optional[str]) -> None:
+        self._update(key, status=SENT, gmail_id=gmail_id, last_error=None)
+
+    def mark_retry(self, key: str, error: str, delay: float) -> None:
+        self._update(key, status=QUEUED, last_error=error, next_attempt_at=time.time() + delay)
+
+    def mark_failed(self, key: str, error: str) -> None:
+        self._update(key, status=FAILED, last_error=error)
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+def _row(row) -> Dict[str, Any]:
+    record = dict(row)
+    record["cc"] = json.loads(record["cc"])
+    record["mailbox"] = json.loads(record["mailbox"])
+    return record
+
+class TokenBucket:
+    """Token-bucket rate limiter: ``rate`` tokens per second, at most ``capacity`` saved up."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class OutboxWorker:
+    """Sends queued emails with retries, backoff and rate limiting.
+
+    Args:
+        outbox: Queue to drain
+        send: Callable taking a claimed row and returning the Gmail message ID. It
+            must check for an earlier delivery (``rfc822msgid``) when
+            ``row["attempts"] > 1``, and raise PermanentSendError for failures that
+            should not be retried
+        max_attempts: Attempts before a row is marked failed
+        base_delay: Backoff before the first retry, in seconds (doubles per attempt)
+        max_delay: Upper bound of the backoff, in seconds
+        rate_per_minute: Sustained sending rate
+        burst: Sends allowed back to back before the rate applies
+        poll_interval: Seconds to wait when the queue is empty
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        send: Callable[[Dict[str, Any]], Optional[str]],
+        max_attempts: int = 8,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        rate_per_minute: float = 20.0,
+        burst: int = 5,
+        poll_interval: float = 5.0,
+    ):
+        self.outbox = outbox
+        self.send = send
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def backoff(self, attempts: int) -> float:
+        """Return the delay before the next attempt, with +/-20% jitter."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def process_one(self) -> bool:
+        """Send the next due email, if any.
+
+        Returns:
+            True if a row was processed
+        """
+        row = self.outbox.claim_next()
+        if row is None:
+            return False
+
+        self.bucket.acquire()
+        try:
+            gmail_id = self.send(row)
+        except PermanentSendError as e:
+            logger.error(f"Outbox {row['id'][:12]} failed permanently: {e}")
+            self.outbox.mark_failed(row["id"], str(e))
+        except Exception as e:
+            if row["attempts"] >= self.max_attempts:
+                logger.error(f"Outbox {row['id'][:12]} failed after {row['attempts']} attempts: {e}")
+                self.outbox.mark_failed(row["id"], str(e))
+            else:
+                delay = self.backoff(row["attempts"])
+                logger.warning(f"Outbox {row['id'][:12]} attempt {row['attempts']} failed, retrying in {delay:.0f}s: {e}")
+                self.outbox.mark_retry(row["id"], str(e), delay)
+        else:
+            logger.info(f"Outbox {row['id'][:12]} sent as Gmail message {gmail_id}")
+            self.outbox.mark_sent(row["id"], gmail_id)
+        return True
+
+    def run(self) -> None:
+        """Process rows until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                if self.process_one():
+                    continue
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Run the worker in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="outbox-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the worker to stop and wait for its thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+_outbox: Optional[Outbox] = None
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox."""
+    global _outbox
+    if _outbox is None:
+        _outbox = Outbox()
+    return _outbox
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the email outbox or run its worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    status_parser = subparsers.add_parser("status", help="Show queued, sent and failed emails")
+    status_parser.add_argument("outbox_id", nargs="?", help="Outbox ID (or unique prefix) to show")
+    worker_parser = subparsers.add_parser("worker", help="Send queued emails")
+    worker_parser.add_argument("--once", action="store_true", help="Drain the due rows and exit")
+    args = parser.parse_args()
+
+    outbox = get_outbox()
+    if args.command == "status":
+        if args.outbox_id:
+            row = outbox.get(args.outbox_id)
+            if row is None:
+                print(f"No unique outbox entry matches {args.outbox_id}")
+                return 1
+            print(json.dumps({k: v for k, v in row.items() if k != "response_text"}, indent=2))
+            return 0
+        print(json.dumps(outbox.counts()))
+        for row in outbox.list():
+            print(f"{row['id'][:12]}  {row['status']:<8} attempts={row['attempts']}  reply-to={row['email_id']}  {row['last_error'] or ''}")
+        return 0
+
+    # Imported here: the sender lives with the other Gmail API helpers
+    from email_assistant.tools.gmail.gmail_tools import deliver_outbox_message
+
+    worker = OutboxWorker(outbox, deliver_outbox_message)
+    if args.once:
+        while worker.process_one():
+            pass
+        return 0
+    print("Outbox worker running, press Ctrl+C to stop")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
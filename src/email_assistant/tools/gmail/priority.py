@@ -0,0 +1,97 @@
+"""
+Keyword-based email priority shared by the dashboard parsers.
+
+The parsers used to lowercase each thread and test every keyword with a separate
+substring scan on every refresh. All keywords are now compiled into one
+case-insensitive regex that is matched in a single pass over the subject and
+body, and results are memoized by (thread id, content hash), so a thread whose
+content did not change is not scanned again.
+
+Matching keeps the parsers' substring semantics ("call" also matches "recall"):
+any high-priority keyword makes an email ``high``, otherwise any medium-priority
+keyword makes it ``medium``, otherwise it is ``low``.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+HIGH_PRIORITY_KEYWORDS = ("urgent", "asap", "emergency", "critical", "important", "deadline")
+MEDIUM_PRIORITY_KEYWORDS = ("meeting", "call", "schedule", "request", "question")
+
+class PriorityScorer:
+    """Score email priority with one compiled pattern and a bounded memo.
+
+    Args:
+        high: Keywords that make an email high priority
+        medium: Keywords that make an email medium priority
+        cache_size: Memoized results kept (least recently used are dropped)
+    """
+
+    def __init__(
+        self,
+        high: Sequence[str] = HIGH_PRIORITY_KEYWORDS,
+        medium: Sequence[str] = MEDIUM_PRIORITY_KEYWORDS,
+        cache_size: int = 10000,
+    ):
+        def alternation(keywords: Sequence[str]) -> str:
+            # Longest first so a keyword is not shadowed by its own prefix
+            return "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+
+        # A zero-width lookahead tries every position, so keywords may overlap
+        # ("schedulemergency" holds both "schedule" and "emergency")
+        self._pattern = re.compile(
+            f"(?=(?P<high>{alternation(high)})|(?P<medium>{alternation(medium)}))", re.IGNORECASE
+        )
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, bytes], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scan(self, subject: str, body: str) -> str:
+        level = "low"
+        # The separator keeps keywords from matching across subject and body
+        for match in self._pattern.finditer(f"{subject}\n{body}"):
+            if match.lastgroup == "high":
+                return "high"
+            level = "medium"
+        return level
+
+    def score(self, subject: str, body: str, thread_id: Optional[str] = None) -> str:
+        """Return ``high``, ``medium`` or ``low`` for an email.
+
+        Args:
+            subject: Email subject
+            body: Email body
+            thread_id: Memoize the result under this ID (and the content hash)
+        """
+        subject, body = subject or "", body or ""
+        if thread_id is None:
+            return self._scan(subject, body)
+
+        key = (thread_id, hashlib.blake2b(f"{subject}\0{body}".encode(), digest_size=16).digest())
+        with self._lock:
+            level = self._cache.get(key)
+            if level is not None:
+                self._cache.move_to_end(key)
+                return level
+        level = self._scan(subject, body)
+        with self._lock:
+            self._cache[key] = level
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return level
+
+    def score_batch(self, emails: Iterable[Tuple[Optional[str], str, str]]) -> List[str]:
+        """Score (thread id, subject, body) triples in one pass, in order."""
+        return [self.score(subject, body, thread_id) for thread_id, subject, body in emails]
+
+_scorer: Optional[PriorityScorer] = None
+
+def get_priority_scorer() -> PriorityScorer:
+    """Return the process-wide scorer (shared memo)."""
+    global _scorer
+    if _scorer is None:
+        _scorer = PriorityScorer()
+    return _scorer
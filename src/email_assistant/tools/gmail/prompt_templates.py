@@ -5,9 +5,10 @@ GMAIL_TOOLS_PROMPT = """
 1. fetch_emails_tool(email_address, minutes_since) - Fetch recent emails from Gmail
 2. send_email_tool(email_id, response_text, email_address, additional_recipients) - Send a reply to an email thread
 3. check_calendar_tool(dates) - Check Google Calendar availability for specific dates
-4. schedule_meeting_tool(attendees, title, start_time, end_time, organizer_email, timezone) - Schedule a meeting and send invites
-5. triage_email(ignore, notify, respond) - Triage emails into one of three categories
-6. Done - E-mail has been sent
+4. find_meeting_slots_tool(attendees, dates, duration_minutes) - Find slots that are free for all attendees (use this before scheduling a meeting with several attendees)
+5. schedule_meeting_tool(attendees, title, start_time, end_time, organizer_email, timezone) - Schedule a meeting and send invites
+6. triage_email(ignore, notify, respond) - Triage emails into one of three categories
+7. Done - E-mail has been sent
 """
 
 # Combined tools prompt (default + Gmail) for full integration
@@ -15,9 +16,10 @@ COMBINED_TOOLS_PROMPT = """
 1. fetch_emails_tool(email_address, minutes_since) - Fetch recent emails from Gmail
 2. send_email_tool(email_id, response_text, email_address, additional_recipients) - Send a reply to an email thread
 3. check_calendar_tool(dates) - Check Google Calendar availability for specific dates
-4. schedule_meeting_tool(attendees, title, start_time, end_time, organizer_email, timezone) - Schedule a meeting and send invites
-5. write_email(to, subject, content) - Draft emails to specified recipients
-6. triage_email(ignore, notify, respond) - Triage emails into one of three categories
-7. check_calendar_availability(day) - Check available time slots for a given day
-8. Done - E-mail has been sent
+4. find_meeting_slots_tool(attendees, dates, duration_minutes) - Find slots that are free for all attendees
+5. schedule_meeting_tool(attendees, title, start_time, end_time, organizer_email, timezone) - Schedule a meeting and send invites
+6. write_email(to, subject, content) - Draft emails to specified recipients
+7. triage_email(ignore, notify, respond) - Triage emails into one of three categories
+8. check_calendar_availability(day) - Check available time slots for a given day
+9. Done - E-mail has been sent
 """
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Build Gmail search queries for ingestion from a declarative config.
+
+``fetch_group_emails`` used to search ``(to:X OR from:X)``, download the user's own
+sent messages and their threads, and only then drop them. The planner pushes such
+filters into the query so Gmail never returns those messages:
+
+- ``-from:me`` drops mail the user sent (each dropped result saves a
+  ``messages.get`` and a ``threads.get``)
+- ``in:inbox`` drops archived mail
+- ``category:(...)`` / ``-category:...`` keep or drop Gmail's inbox categories
+- ``is:unread`` and the assistant's triage labels (see triage_labels.py)
+
+The savings report lists how many results each option removes from the baseline
+query, measured against the live mailbox.
+
+Usage:
+    python -m email_assistant.tools.gmail.query_planner --email you@example.com --minutes-since 1440 --inbox-only --exclude-category promotions
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from email_assistant.tools.gmail.triage_labels import triage_exclusion_query
+
+GMAIL_CATEGORIES = ("primary", "social", "promotions", "updates", "forums", "reservations", "purchases")
+
+# API calls fetch_group_emails makes per listed message (messages.get + threads.get)
+FETCHES_PER_RESULT = 2
+
+@dataclass(frozen=True)
+class IngestQueryConfig:
+    """What to ingest; turned into a Gmail search query by build_gmail_query."""
+
+    email_address: str
+    # Only messages newer than this (0 = no time limit)
+    minutes_since: int = 60
+    include_read: bool = False
+    include_triaged: bool = False
+    # Drop mail the user sent (-from:me)
+    exclude_self: bool = True
+    # Drop archived mail (in:inbox)
+    inbox_only: bool = False
+    # Keep only these categories, e.g. ("primary", "updates")
+    categories: Tuple[str, ...] = ()
+    # Drop these categories, e.g. ("promotions", "social")
+    exclude_categories: Tuple[str, ...] = ()
+
+    def __post_init__(self):
+        for category in self.categories + self.exclude_categories:
+            if category not in GMAIL_CATEGORIES:
+                raise ValueError(f"Unknown Gmail category: {category}")
+
+def query_terms(config: IngestQueryConfig, now: Optional[float] = None) -> List[Tuple[str, str]]:
+    """Return the (option, search term) pairs of a config, in query order."""
+    terms = [("address", f"(to:{config.email_address} OR from:{config.email_address})")]
+    if config.minutes_since > 0:
+        after = int((now if now is not None else time.time()) - config.minutes_since * 60)
+        terms.append(("minutes_since", f"after:{after}"))
+    if not config.include_read:
+        terms.append(("unread", "is:unread"))
+    if not config.include_triaged:
+        terms.append(("exclude_triaged", triage_exclusion_query()))
+    if config.exclude_self:
+        terms.append(("exclude_self", "-from:me"))
+    if config.inbox_only:
+        terms.append(("inbox_only", "in:inbox"))
+    if config.categories:
+        terms.append(("categories", f"category:({' OR '.join(config.categories)})"))
+    for category in config.exclude_categories:
+        terms.append(("exclude_categories", f"-category:{category}"))
+    return terms
+
+def build_gmail_query(config: IngestQueryConfig, now: Optional[float] = None) -> str:
+    """Build the Gmail search query for an ingest config.
+
+    Args:
+        config: What to ingest
+        now: Reference UNIX time for ``minutes_since`` (default: current time)
+
+    Returns:
+        Gmail search query string
+    """
+    return " ".join(term for _, term in query_terms(config, now))
+
+def _count_results(service, query: str, limit: int) -> int:
+    """Count messages.list results for a query (ids only), stopping at ``limit``."""
+    count = 0
+    page_token = None
+    while count < limit:
+        response = service.users().messages().list(
+            userId="me", q=query, pageToken=page_token, maxResults=min(500, limit - count)
+        ).execute()
+        count += len(response.get("messages", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    return count
+
+def savings_report(service, config: IngestQueryConfig, limit: int = 2000) -> List[Dict[str, object]]:
+    """Measure how many list results and fetches each optional filter saves.
+
+    The baseline is the config without the server-side filters the planner adds
+    (exclude_self, inbox_only, categories, exclude_categories). Each option is then
+    measured on its own on top of the baseline, and all of them together.
+
+    Args:
+        service: Gmail v1 service
+        config: Ingest config to evaluate
+        limit: Stop counting a query's results at this many
+
+    Returns:
+        One row per query with its results and the list results / fetches saved
+    """
+    now = time.time()
+    baseline = replace(config, exclude_self=False, inbox_only=False, categories=(), exclude_categories=())
+    variants = [("baseline", baseline)]
+    if config.exclude_self:
+        variants.append(("-from:me", replace(baseline, exclude_self=True)))
+    if config.inbox_only:
+        variants.append(("in:inbox", replace(baseline, inbox_only=True)))
+    if config.categories:
+        variants.append((f"category:({' OR '.join(config.categories)})", replace(baseline, categories=config.categories)))
+    if config.exclude_categories:
+        variants.append((" ".join(f"-category:{c}" for c in config.exclude_categories), replace(baseline, exclude_categories=config.exclude_categories)))
+    if len(variants) > 2:
+        variants.append(("all options", config))
+
+    rows = []
+    baseline_results = None
+    for name, variant in variants:
+        query = build_gmail_query(variant, now)
+        results = _count_results(service, query, limit)
+        if baseline_results is None:
+            baseline_results = results
+        saved = baseline_results - results
+        rows.append({
+            "option": name,
+            "query": query,
+            "results": results,
+            "list_results_saved": saved,
+            "fetches_saved": saved * FETCHES_PER_RESULT,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the Gmail ingest query and what each filter saves")
+    parser.add_argument("--email", required=True, help="Email address to fetch messages for")
+    parser.add_argument("--minutes-since", type=int, default=60, help="Only messages newer than this (0 = all)")
+    parser.add_argument("--include-read", action="store_true", help="Include read emails")
+    parser.add_argument("--include-triaged", action="store_true", help="Include emails the assistant already triaged")
+    parser.add_argument("--include-self", action="store_true", help="Include emails you sent")
+    parser.add_argument("--inbox-only", action="store_true", help="Only emails in the inbox")
+    parser.add_argument("--category", action="append", default=[], choices=GMAIL_CATEGORIES, help="Only this category (repeatable)")
+    parser.add_argument("--exclude-category", action="append", default=[], choices=GMAIL_CATEGORIES, help="Drop this category (repeatable)")
+    parser.add_argument("--limit", type=int, default=2000, help="Stop counting a query's results at this many")
+    args = parser.parse_args()
+
+    config = IngestQueryConfig(
+        email_address=args.email,
+        minutes_since=args.minutes_since,
+        include_read=args.include_read,
+        include_triaged=args.include_triaged,
+        exclude_self=not args.include_self,
+        inbox_only=args.inbox_only,
+        categories=tuple(args.category),
+        exclude_categories=tuple(args.exclude_category),
+    )
+    print(f"Query: {build_gmail_query(config)}\n")
+
+    # Imported here: credentials come from the Gmail service pool
+    from email_assistant.tools.gmail.service_pool import get_service
+
+    rows = savings_report(get_service("gmail", "v1"), config, args.limit)
+    print(f"{'option':<40}{'results':>10}{'list saved':>12}{'fetches saved':>15}")
+    for row in rows:
+        print(f"{row['option']:<40}{row['results']:>10}{row['list_results_saved']:>12}{row['fetches_saved']:>15}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,266 @@
+"""
+Event-driven status counters for the dashboards.
+
+The parsers used to recount statuses by scanning every thread or run on each
+request. Counters are now updated when an item (a run, thread or email) changes
+status, and the dashboards read the aggregates:
+
+- each source ("graph", "langsmith", "agent_inbox:<id>", ...) keeps
+  the current status of every item it has seen, so replaying an event is a no-op
+  and a status change moves the item from one bucket to another
+- counters are kept per day (the day the item was first seen) and in a running
+  total, so ``totals`` reads a handful of rows whatever the history size
+- tags (e.g. ``scheduled_meetings``) are counted once, when an item first appears
+
+The email assistant graph records ``waiting_action`` when it starts on an email,
+``hitl`` while it waits on Agent Inbox, and ``processed``/``ignored`` when it
+finishes (``GRAPH_SOURCE``). These events only reach the counters of the host the
+graph runs on, so the Agent Inbox and LangGraph Platform dashboards, which usually
+watch a remote deployment, keep their own source: each refresh reconciles it with
+the thread list they fetched (``reconcile``), writing only what changed.
+
+Usage:
+    python -m email_assistant.tools.gmail.run_counters graph --days 7
+"""
+
+import argparse
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from email_assistant.db import ThreadLocalConnection, default_db_path
+
+STATUS_BUCKETS = ("processed", "hitl", "ignored", "waiting_action")
+
+# Source the email assistant graph records its runs in; the dashboards read it
+GRAPH_SOURCE = "graph"
+
+# Day key of the running totals
+TOTAL_DAY = "*"
+
+# Counter row counting every item of a source
+TOTAL_KEY = "total"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counter_items (
+    source TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    day TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, item_id)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    source TEXT NOT NULL,
+    day TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (source, day, name)
+);
+"""
+
+# (item id, status, when it was first seen, tags)
+Event = Tuple[str, str, Optional[Union[str, float, datetime]], Sequence[str]]
+
+def day_of(at: Optional[Union[str, float, datetime]]) -> str:
+    """Return the UTC day (YYYY-MM-DD) of an ISO timestamp, UNIX time or datetime (default: today)."""
+    if at is None or at == "":
+        return datetime.now(timezone.utc).date().isoformat()
+    if isinstance(at, (int, float)):
+        return datetime.fromtimestamp(at, timezone.utc).date().isoformat()
+    if isinstance(at, datetime):
+        return (at.astimezone(timezone.utc) if at.tzinfo else at).date().isoformat()
+    try:
+        parsed = datetime.fromisoformat(at.replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.now(timezone.utc).date().isoformat()
+    return (parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed).date().isoformat()
+
+class RunCounters:
+    """SQLite store of per-source status counters.
+
+    Args:
+        path: Database file. Defaults to ``run_counters.sqlite`` in the data directory.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = str(path or default_db_path("run_counters.sqlite"))
+        self._conn = ThreadLocalConnection(self.path, _SCHEMA)
+
+    def record(
+        self,
+        source: str,
+        item_id: str,
+        status: str,
+        at: Optional[Union[str, float, datetime]] = None,
+        tags: Sequence[str] = (),
+    ) -> bool:
+        """Record the current status of an item.
+
+        Args:
+            source: Counter namespace
+            item_id: Run, thread or email ID
+            status: Bucket the item is in now
+            at: When the item started (its day bucket); used the first time only
+            tags: Extra counters for the item, counted when it is first seen
+
+        Returns:
+            Whether any counter changed
+        """
+        return self.record_many(source, [(item_id, status, at, tags)]) > 0
+
+    def record_many(self, source: str, events: Iterable[Event]) -> int:
+        """Record the status of many items in one transaction.
+
+        Returns:
+            Number of items that were new or changed status
+        """
+        with self._conn.transaction() as conn:
+            return self._record(conn, source, events)
+
+    def _record(self, conn, source: str, events: Iterable[Event]) -> int:
+        changed = 0
+        now = time.time()
+        for item_id, status, at, tags in events:
+            row = conn.execute(
+                "SELECT status, day FROM counter_items WHERE source = ? AND item_id = ?", (source, item_id)
+            ).fetchone()
+            if row is not None and row["status"] == status:
+                continue
+            changed += 1
+            if row is None:
+                day = day_of(at)
+                conn.execute(
+                    "INSERT INTO counter_items (source, item_id, status, day, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (source, item_id, status, day, now),
+                )
+                self._add(conn, source, day, [TOTAL_KEY, *tags], 1)
+            else:
+                day = row["day"]
+                conn.execute(
+                    "UPDATE counter_items SET status = ?, updated_at = ? WHERE source = ? AND item_id = ?",
+                    (status, now, source, item_id),
+                )
+                self._add(conn, source, day, [row["status"]], -1)
+            self._add(conn, source, day, [status], 1)
+        return changed
+
+    def reconcile(self, source: str, items: Iterable[Tuple[str, str, Optional[Union[str, float, datetime]]]]) -> int:
+        """Make a polled source's items exactly ``items`` ((item id, status, when first seen)).
+
+        Dashboards that poll a list (the Agent Inbox or LangGraph Platform threads)
+        record it on each refresh: items whose status changed move buckets and items
+        no longer listed leave the counters. Nothing is written while the list is
+        unchanged, so a refresh usually costs one read.
+
+        Returns:
+            Number of items added, changed or removed
+        """
+        wanted = {item_id: (status, at) for item_id, status, at in items}
+        current = {
+            row["item_id"]: row["status"]
+            for row in self._conn.get().execute("SELECT item_id, status FROM counter_items WHERE source = ?", (source,))
+        }
+        events = [(item_id, status, at, ()) for item_id, (status, at) in wanted.items() if current.get(item_id) != status]
+        gone = [item_id for item_id in current if item_id not in wanted]
+        if not events and not gone:
+            return 0
+        with self._conn.transaction() as conn:
+            return self._record(conn, source, events) + self._forget(conn, source, gone)
+
+    @staticmethod
+    def _add(conn, source: str, day: str, names: Iterable[str], amount: int) -> None:
+        conn.executemany(
+            "INSERT INTO counters (source, day, name, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(source, day, name) DO UPDATE SET count = count + excluded.count",
+            [(source, bucket, name, amount) for name in names for bucket in (day, TOTAL_DAY)],
+        )
+
+    def totals(self, source: str) -> Dict[str, int]:
+        """Return the running totals of a source (``total``, each status and tag)."""
+        rows = self._conn.get().execute(
+            "SELECT name, count FROM counters WHERE source = ? AND day = ?", (source, TOTAL_DAY)
+        ).fetchall()
+        return {row["name"]: row["count"] for row in rows}
+
+    def daily(self, source: str, since: Optional[Union[str, date]] = None) -> Dict[str, Dict[str, int]]:
+        """Return the counters of each day (by first-seen day), oldest first.
+
+        Args:
+            source: Counter namespace
+            since: First day to include (YYYY-MM-DD or date)
+        """
+        query = "SELECT day, name, count FROM counters WHERE source = ? AND day != ?"
+        params: List[object] = [source, TOTAL_DAY]
+        if since is not None:
+            query += " AND day >= ?"
+            params.append(str(since))
+        days: Dict[str, Dict[str, int]] = {}
+        for row in self._conn.get().execute(query + " ORDER BY day", params):
+            days.setdefault(row["day"], {})[row["name"]] = row["count"]
+        return days
+
+    def forget(self, source: str, item_ids: Iterable[str]) -> int:
+        """Remove items from a source's counters (e.g. a run that was never created).
+
+        Tags counted for the items are not taken back.
+
+        Returns:
+            Number of items removed
+        """
+        with self._conn.transaction() as conn:
+            return self._forget(conn, source, item_ids)
+
+    def _forget(self, conn, source: str, item_ids: Iterable[str]) -> int:
+        removed = 0
+        for item_id in item_ids:
+            row = conn.execute(
+                "SELECT status, day FROM counter_items WHERE source = ? AND item_id = ?", (source, item_id)
+            ).fetchone()
+            if row is None:
+                continue
+            removed += 1
+            conn.execute("DELETE FROM counter_items WHERE source = ? AND item_id = ?", (source, item_id))
+            self._add(conn, source, row["day"], [TOTAL_KEY, row["status"]], -1)
+        return removed
+
+    def items(self, source: str) -> int:
+        """Return how many items a source has recorded."""
+        return self.totals(source).get(TOTAL_KEY, 0)
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        self._conn.close()
+
+def status_statistics(totals: Dict[str, int], tags: Sequence[str] = ()) -> Dict[str, int]:
+    """Turn counter totals into the dashboards' statistics dict."""
+    statistics = {"total_emails": totals.get(TOTAL_KEY, 0)}
+    statistics.update({status: totals.get(status, 0) for status in STATUS_BUCKETS})
+    statistics.update({tag: totals.get(tag, 0) for tag in tags})
+    return statistics
+
+_counters: Optional[RunCounters] = None
+
+def get_run_counters() -> RunCounters:
+    """Return the process-wide counter store."""
+    global _counters
+    if _counters is None:
+        _counters = RunCounters()
+    return _counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the dashboard status counters")
+    parser.add_argument("source", help="Counter source, e.g. graph, agent_inbox, langsmith")
+    parser.add_argument("--days", type=int, default=7, help="Per-day counters for this many days")
+    args = parser.parse_args()
+
+    counters = get_run_counters()
+    print(f"Totals: {counters.totals(args.source)}")
+    since = date.fromordinal(date.today().toordinal() - args.days + 1)
+    for day, day_counters in counters.daily(args.source, since).items():
+        print(f"{day}: {day_counters}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -13,12 +13,18 @@ import hashlib
 import asyncio
 import argparse
 import os
+import time
 from pathlib import Path
-from datetime import datetime
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from email_assistant.tools.gmail.discovery import build_service
 from langgraph_sdk import get_client
 from dotenv import load_dotenv
+from email_assistant.email_bodies import BODY_NAMESPACE, body_digest, body_preview
+from email_assistant.lease import LEASE_HELD, hold_lease
+from email_assistant.tools.gmail.ingest_ledger import get_ingest_ledger
+from email_assistant.tools.gmail.mailbox_registry import Mailbox, mailbox_run_config, parse_shard
+from email_assistant.tools.gmail.query_planner import GMAIL_CATEGORIES, IngestQueryConfig, build_gmail_query
+from email_assistant.tools.gmail.run_counters import GRAPH_SOURCE, get_run_counters
 
 load_dotenv()
 
@@ -27,6 +33,10 @@ _ROOT = Path(__file__).parent.absolute()
 _SECRETS_DIR = _ROOT / ".secrets"
 TOKEN_PATH = _SECRETS_DIR / "token.json"
 
+def ingest_lease_name(email_address):
+    """Name of the lease that keeps ingestion runs for a mailbox from overlapping."""
+    return f"ingest:{email_address.lower()}"
+
 def extract_message_part(payload):
     """Extract content from a message part."""
     # If this is multipart, process with preference for text/plain
@@ -138,10 +148,22 @@ def extract_email_data(message):
     
     return email_data
 
-async def ingest_email_to_langgraph(email_data, graph_name, url="http://127.0.0.1:2024"):
-    """Ingest an email to LangGraph."""
+async def ingest_email_to_langgraph(email_data, graph_name, url="http://127.0.0.1:2024", client=None, mailbox=None):
+    """Ingest an email to LangGraph.
+    
+    Args:
+        email_data: Email dict from extract_email_data
+        graph_name: Name of the LangGraph to run
+        url: URL of the LangGraph deployment (used when no client is passed)
+        client: LangGraph SDK client to reuse (the ingest daemon keeps one open)
+        mailbox: Mailbox the email came from; the run's Gmail tools act on it
+            (default: the server's GMAIL_TOKEN / token file account)
+    """
+    # Identity and token source only: the token itself never goes into the run
+    mailbox_config = mailbox_run_config(mailbox) if mailbox is not None else {}
+    
     # Connect to LangGraph server
-    client = get_client(url=url)
+    client = client or get_client(url=url)
     
     # Create a consistent UUID for the thread
     raw_thread_id = email_data["thread_id"]
@@ -179,119 +201,277 @@ async def ingest_email_to_langgraph(email_data, graph_name, url="http://127.0.0.
             print(f"Error listing/deleting runs: {str(e)}")
     
     # Update thread metadata with current email ID
-    await client.threads.update(thread_id, metadata={"email_id": email_data["id"]})
+    await client.threads.update(
+        thread_id, metadata={"email_id": email_data["id"], "gmail_account": mailbox_config.get("gmail_account")}
+    )
     
-    # Create a fresh run for this email
+    # Store the body once in the LangGraph store (content-addressed) and pass only its
+    # digest, so the body is not written into every checkpoint of the run. The short
+    # preview is for readers of the run inputs that cannot resolve the digest.
+    body_ref = body_digest(email_data["page_content"])
+    await client.store.put_item(
+        list(BODY_NAMESPACE),
+        key=body_ref,
+        value={"body": email_data["page_content"]},
+    )
+    
+    # Create a fresh run for this email; counted before the graph can move it on
     print(f"Creating run for thread {thread_id} with graph {graph_name}")
+    counted = get_run_counters().record(GRAPH_SOURCE, email_data["id"], "waiting_action")
     
-    run = await client.runs.create(
-        thread_id,
-        graph_name,
-        input={"email_input": {
-            "from": email_data["from_email"],
-            "to": email_data["to_email"],
-            "subject": email_data["subject"],
-            "body": email_data["page_content"],
-            "id": email_data["id"]
-        }},
-        multitask_strategy="rollback",
-    )
+    try:
+        run = await client.runs.create(
+            thread_id,
+            graph_name,
+            input={"email_input": {
+                "from": email_data["from_email"],
+                "to": email_data["to_email"],
+                "subject": email_data["subject"],
+                "body_ref": body_ref,
+                "preview": body_preview(email_data["page_content"]),
+                "id": email_data["id"],
+                "thread_id": email_data["thread_id"]
+            }},
+            config={"configurable": mailbox_config},
+            metadata={"gmail_account": mailbox_config.get("gmail_account")},
+            multitask_strategy="rollback",
+        )
+    except Exception:
+        # No run will move this email on, so do not leave it counted as waiting
+        if counted:
+            get_run_counters().forget(GRAPH_SOURCE, [email_data["id"]])
+        raise
     
     print(f"Run created successfully with thread ID: {thread_id}")
     
     return thread_id, run
 
-async def fetch_and_process_emails(args):
-    """Fetch emails from Gmail and process them through LangGraph."""
-    # Load Gmail credentials
-    credentials = load_gmail_credentials()
-    if not credentials:
-        print("Failed to load Gmail credentials")
-        return 1
+def latest_message_per_thread(service, messages):
+    """Coalesce search results to the latest matching message of each Gmail thread.
+    
+    Several new replies in one thread would otherwise start one run each, and with
+    multitask_strategy="rollback" every run cancels the previous one after it has
+    already spent LLM calls.
+    
+    Args:
+        service: Gmail v1 service
+        messages: messages.list results ({"id", "threadId"})
+        
+    Returns:
+        One {"id", "threadId", "coalesced"} entry per thread, in search order, with
+        the message's "internalDate" when the thread had to be fetched
+    """
+    by_thread = {}
+    for message in messages:
+        by_thread.setdefault(message["threadId"], []).append(message["id"])
+    
+    latest = []
+    for thread_id, message_ids in by_thread.items():
+        entry = {"id": message_ids[0], "threadId": thread_id, "coalesced": len(message_ids)}
+        if len(message_ids) > 1:
+            # One lightweight thread fetch gives the internalDate of every message
+            thread = service.users().threads().get(userId="me", id=thread_id, format="minimal").execute()
+            matched = [m for m in thread.get("messages", []) if m["id"] in message_ids]
+            if matched:
+                newest = max(matched, key=lambda m: int(m.get("internalDate", 0)))
+                entry["id"] = newest["id"]
+                if "internalDate" in newest:
+                    entry["internalDate"] = newest["internalDate"]
+        latest.append(entry)
+    return latest
+
+def ingest_query_config(args) -> IngestQueryConfig:
+    """Translate the CLI / cron arguments into a Gmail query config."""
+    return IngestQueryConfig(
+        email_address=args.email,
+        minutes_since=args.minutes_since,
+        include_read=args.include_read,
+        include_triaged=getattr(args, "include_triaged", False),
+        # With skip_filters the user's own sent messages are ingested too
+        exclude_self=not getattr(args, "skip_filters", False),
+        inbox_only=getattr(args, "inbox_only", False),
+        categories=tuple(getattr(args, "category", None) or ()),
+        exclude_categories=tuple(getattr(args, "exclude_category", None) or ()),
+    )
+
+async def ingest_new_emails(service, args, client=None, lease=None):
+    """Search Gmail once and submit one run per matching thread.
+    
+    Args:
+        service: Gmail v1 service
+        args: CLI / cron arguments (see parse_args)
+        client: LangGraph SDK client to reuse; a new one is made per email otherwise
+        lease: Ingest lease held by the caller; processing stops if it is lost
         
-    # Build Gmail service
-    service = build("gmail", "v1", credentials=credentials)
+    ``args.max_threads`` (optional) caps the threads submitted by one call, so the
+    mailbox pool can give every mailbox a turn before a busy one continues.
     
-    # Process emails
+    Messages that already have a run (see ingest_ledger.py) are skipped unless
+    ``args.rerun`` is set, so the overlapping search windows of consecutive polls do
+    not submit the same email twice. A message enters the ledger only once its run
+    was created, so a failed submission is retried by the next poll.
+        
+    Returns:
+        (new threads found, emails processed). New threads are those whose latest
+        message has no run yet, including the ones deferred or left for the next
+        turn; the pollers shorten their interval only while there are some.
+        Errors are raised to the caller.
+    """
     processed_count = 0
     
-    try:
-        # Get messages from the specified email address
-        email_address = args.email
+    # Construct Gmail search query (see query_planner for the available filters)
+    query = build_gmail_query(ingest_query_config(args))
         
-        # Construct Gmail search query
-        query = f"to:{email_address} OR from:{email_address}"
+    print(f"Gmail search query: {query}")
+    
+    # Execute the search
+    results = service.users().messages().list(userId="me", q=query).execute()
+    messages = results.get("messages", [])
+    
+    if not messages:
+        print("No emails found matching the criteria")
+        return 0, 0
         
-        # Add time constraint if specified
-        if args.minutes_since > 0:
-            # Calculate timestamp for filtering
-            from datetime import timedelta
-            after = int((datetime.now() - timedelta(minutes=args.minutes_since)).timestamp())
-            query += f" after:{after}"
-            
-        # Only include unread emails unless include_read is True
-        if not args.include_read:
-            query += " is:unread"
-            
-        print(f"Gmail search query: {query}")
+    print(f"Found {len(messages)} emails")
+    
+    # Submit one run per thread, carrying the thread's latest message
+    threads = latest_message_per_thread(service, messages)
+    if len(threads) < len(messages):
+        print(f"Coalesced {len(messages)} emails into {len(threads)} threads")
+    # The mailbox pool passes the registry entry (with its token source) along
+    mailbox = getattr(args, "mailbox", None) or Mailbox(email=args.email)
+    ledger = get_ingest_ledger()
+    if not args.rerun:
+        seen = ledger.seen(mailbox.email, [thread["id"] for thread in threads])
+        if seen:
+            print(f"Skipping {len(seen)} emails that already have a run")
+            threads = [thread for thread in threads if thread["id"] not in seen]
+    debounce_seconds = getattr(args, "debounce_seconds", 0)
+    max_threads = getattr(args, "max_threads", 0)
+    
+    # Process each email
+    for i, message_info in enumerate(threads):
+        # Stop early if requested
+        if args.early and processed_count > 0:
+            print(f"Early stop after processing {processed_count} emails")
+            break
         
-        # Execute the search
-        results = service.users().messages().list(userId="me", q=query).execute()
-        messages = results.get("messages", [])
+        # End this mailbox's turn; the remaining threads are found again on its next poll
+        if max_threads and processed_count >= max_threads:
+            print(f"Turn limit reached after {processed_count} emails")
+            break
         
-        if not messages:
-            print("No emails found matching the criteria")
-            return 0
+        # Another run took the mailbox over (our heartbeat stalled): leave the rest to it
+        if lease is not None and lease.lost:
+            print(f"Lease lost, stopping after {processed_count} emails")
+            break
             
-        print(f"Found {len(messages)} emails")
+        # Leave threads that are still active for a later poll, so a burst of replies becomes one run.
+        # Decided before the full fetch: coalesced threads already carry the date, others
+        # get it from a minimal fetch without the payload.
+        if debounce_seconds:
+            internal_date = message_info.get("internalDate")
+            if internal_date is None:
+                internal_date = service.users().messages().get(
+                    userId="me", id=message_info["id"], format="minimal"
+                ).execute().get("internalDate", 0)
+            age_seconds = time.time() - int(internal_date) / 1000
+            if age_seconds < debounce_seconds:
+                print(f"\nDeferring thread {message_info['threadId']}: latest message is only {age_seconds:.0f}s old")
+                continue
         
-        # Process each email
-        for i, message_info in enumerate(messages):
-            # Stop early if requested
-            if args.early and i > 0:
-                print(f"Early stop after processing {i} emails")
-                break
-                
-            # Check if we should reprocess this email
-            if not args.rerun:
-                # TODO: Add check for already processed emails
-                pass
-                
-            # Get the full message
-            message = service.users().messages().get(userId="me", id=message_info["id"]).execute()
-            
-            # Extract email data
-            email_data = extract_email_data(message)
-            
-            print(f"\nProcessing email {i+1}/{len(messages)}:")
-            print(f"From: {email_data['from_email']}")
-            print(f"Subject: {email_data['subject']}")
-            
-            # Ingest to LangGraph
-            thread_id, run = await ingest_email_to_langgraph(
-                email_data, 
-                args.graph_name,
-                url=args.url
-            )
-            
-            processed_count += 1
+        # Get the full message
+        message = service.users().messages().get(userId="me", id=message_info["id"]).execute()
+        
+        # Extract email data
+        email_data = extract_email_data(message)
+        
+        print(f"\nProcessing email {i+1}/{len(threads)}:")
+        print(f"From: {email_data['from_email']}")
+        print(f"Subject: {email_data['subject']}")
+        
+        # Ingest to LangGraph
+        thread_id, run = await ingest_email_to_langgraph(
+            email_data, 
+            args.graph_name,
+            url=args.url,
+            client=client,
+            mailbox=mailbox
+        )
+        ledger.record(mailbox.email, email_data["id"], email_data["thread_id"], run.get("run_id") if run else None)
+        
+        processed_count += 1
+        
+    print(f"\nProcessed {processed_count} emails successfully")
+    return len(threads), processed_count
+
+async def fetch_and_process_emails(args):
+    """Fetch emails from Gmail and process them through LangGraph.
+    
+    Returns:
+        0 on success, 1 on error, LEASE_HELD if another run is ingesting this mailbox
+    """
+    if getattr(args, "registry", None):
+        # Imported here to avoid a cycle: the mailbox pool builds on this module
+        from email_assistant.tools.gmail.mailbox_pool import ingest_registry
+        
+        return await ingest_registry(args)
+    
+    with hold_lease(ingest_lease_name(args.email)) as lease:
+        if lease is None:
+            print(f"Another ingestion run holds the lease for {args.email}, skipping")
+            return LEASE_HELD
+        
+        # Load Gmail credentials
+        credentials = load_gmail_credentials()
+        if not credentials:
+            print("Failed to load Gmail credentials")
+            return 1
             
-        print(f"\nProcessed {processed_count} emails successfully")
-        return 0
+        # Build Gmail service
+        service = build_service("gmail", "v1", credentials=credentials)
         
-    except Exception as e:
-        print(f"Error processing emails: {str(e)}")
-        return 1
+        try:
+            await ingest_new_emails(service, args, lease=lease)
+            return 0
+            
+        except Exception as e:
+            print(f"Error processing emails: {str(e)}")
+            return 1
 
-def parse_args():
-    """Parse command line arguments."""
-    parser = argparse.ArgumentParser(description="Simple Gmail ingestion for LangGraph with reliable tracing")
+def build_arg_parser(add_help=True):
+    """Return the ingestion argument parser (the ingest daemon extends it)."""
+    parser = argparse.ArgumentParser(
+        description="Simple Gmail ingestion for LangGraph with reliable tracing",
+        add_help=add_help
+    )
     
     parser.add_argument(
         "--email", 
         type=str, 
-        required=True,
-        help="Email address to fetch messages for"
+        help="Email address to fetch messages for (required unless --registry is given)"
+    )
+    parser.add_argument(
+        "--registry",
+        type=str,
+        help="Mailbox registry JSON: ingest every mailbox in it (see mailbox_registry.py)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="With --registry: mailboxes polled in parallel"
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="With --registry: only ingest the mailboxes of shard INDEX/COUNT (e.g. 0/4)"
+    )
+    parser.add_argument(
+        "--max-threads",
+        type=int,
+        default=0,
+        help="Threads submitted per mailbox turn before other mailboxes get theirs (0 = no limit)"
     )
     parser.add_argument(
         "--minutes-since", 
@@ -321,6 +501,35 @@ def parse_args():
         action="store_true",
         help="Include emails that have already been read"
     )
+    parser.add_argument(
+        "--include-triaged",
+        action="store_true",
+        help="Include emails the assistant already triaged"
+    )
+    parser.add_argument(
+        "--inbox-only",
+        action="store_true",
+        help="Only fetch emails that are in the inbox (not archived)"
+    )
+    parser.add_argument(
+        "--category",
+        action="append",
+        choices=GMAIL_CATEGORIES,
+        help="Only fetch emails in this Gmail category (repeatable)"
+    )
+    parser.add_argument(
+        "--exclude-category",
+        action="append",
+        choices=GMAIL_CATEGORIES,
+        help="Skip emails in this Gmail category (repeatable)"
+    )
+    parser.add_argument(
+        "--debounce-seconds",
+        type=int,
+        default=0,
+        help="Defer threads whose latest message is newer than this to a later poll (0 = off). "
+             "Keep it below --minutes-since so deferred threads are found again"
+    )
     parser.add_argument(
         "--rerun", 
         action="store_true",
@@ -331,7 +540,15 @@ def parse_args():
         action="store_true",
         help="Skip filtering of emails"
     )
-    return parser.parse_args()
+    return parser
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    if not args.email and not args.registry:
+        parser.error("--email or --registry is required")
+    return args
 
 if __name__ == "__main__":
     # Get command line arguments
@@ -17,7 +17,8 @@ import requests
 from pathlib import Path
 from datetime import datetime, timedelta
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from email_assistant.lease import LEASE_HELD, hold_lease
+from email_assistant.tools.gmail.discovery import build_service
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -190,7 +191,18 @@ async def send_email_to_agent_inbox(email_data):
         return False
 
 async def fetch_and_process_emails(args):
-    """Fetch emails from Gmail and process them through Agent Inbox."""
+    """Fetch emails from Gmail and process them through Agent Inbox.
+    
+    Returns:
+        0 on success, 1 on error, LEASE_HELD if another run is ingesting this mailbox
+    """
+    with hold_lease(f"agentinbox_ingest:{args.email.lower()}") as lease:
+        if lease is None:
+            print(f"Another ingestion run holds the lease for {args.email}, skipping")
+            return LEASE_HELD
+        return await _fetch_and_process_emails(args)
+
+async def _fetch_and_process_emails(args):
     # Load Gmail credentials
     credentials = load_gmail_credentials()
     if not credentials:
@@ -198,7 +210,7 @@ async def fetch_and_process_emails(args):
         return 1
         
     # Build Gmail service
-    service = build("gmail", "v1", credentials=credentials)
+    service = build_service("gmail", "v1", credentials=credentials)
     
     # Process emails
     processed_count = 0
@@ -0,0 +1,156 @@
+"""
+Process-wide pool of Google API credentials and service clients.
+
+Building a client used to re-read the token and parse the API's discovery document
+on every send, calendar check and mark-as-read. The pool keeps:
+
+- one Credentials object per token source (passed token, GMAIL_TOKEN or the local
+  token file), refreshed proactively shortly before it expires
+- one Gmail v1 / Calendar v3 client per credential *and thread*: httplib2 is not
+  thread-safe, so every thread gets its own ``AuthorizedHttp`` transport. Clients
+  are built from the once-parsed discovery documents (see discovery.py)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import google_auth_httplib2
+import httplib2
+from google.auth.transport.requests import Request
+
+from email_assistant.tools.gmail.discovery import build_service
+
+logger = logging.getLogger(__name__)
+
+_SECRETS_DIR = Path(__file__).parent.absolute() / ".secrets"
+
+# Refresh access tokens this long before they expire
+REFRESH_MARGIN = timedelta(minutes=5)
+
+def _fingerprint(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+def token_source(gmail_token: Optional[str] = None) -> str:
+    """Identify where get_credentials would load the token from, without parsing it.
+
+    The result names one account's credentials, so it also keys per-account caches.
+    """
+    if gmail_token:
+        return f"param:{_fingerprint(gmail_token)}"
+    env_token = os.getenv("GMAIL_TOKEN")
+    if env_token:
+        return f"env:{_fingerprint(env_token)}"
+    token_path = _SECRETS_DIR / "token.json"
+    try:
+        # A rewritten token file (e.g. after setup_gmail.py) gets a new entry
+        return f"file:{token_path}:{token_path.stat().st_mtime_ns}"
+    except OSError:
+        return "none"
+
+class ServicePool:
+    """Caches credentials per token source and API clients per credential and thread."""
+
+    def __init__(self, refresh_margin: timedelta = REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._credentials: Dict[str, Any] = {}
+        self._refresh_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _needs_refresh(self, creds) -> bool:
+        if not getattr(creds, "refresh_token", None):
+            return False
+        if not creds.token:
+            return True
+        # google-auth stores expiry as a naive UTC datetime
+        expiry = getattr(creds, "expiry", None)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return expiry is not None and expiry - now < self.refresh_margin
+
+    def credentials(self, gmail_token: Optional[str] = None, gmail_secret: Optional[str] = None):
+        """Return cached credentials for a token source, refreshing them if they expire soon.
+
+        Args:
+            gmail_token: Optional JSON string containing token data
+            gmail_secret: Optional JSON string containing credentials
+
+        Returns:
+            Google OAuth2 Credentials object, or None if no token could be loaded
+        """
+        key = token_source(gmail_token)
+        with self._lock:
+            creds = self._credentials.get(key)
+            if creds is None:
+                # Imported here to avoid a cycle: gmail_tools imports the pool
+                from email_assistant.tools.gmail.gmail_tools import get_credentials
+
+                creds = get_credentials(gmail_token, gmail_secret)
+                if creds is None:
+                    return None
+                self._credentials[key] = creds
+                self._refresh_locks[key] = threading.Lock()
+            refresh_lock = self._refresh_locks[key]
+
+        if self._needs_refresh(creds):
+            with refresh_lock:
+                # Another thread may have refreshed while we waited
+                if self._needs_refresh(creds):
+                    logger.info("Refreshing Google API access token")
+                    creds.refresh(Request())
+        return creds
+
+    def service(
+        self,
+        api: str,
+        version: str,
+        gmail_token: Optional[str] = None,
+        gmail_secret: Optional[str] = None,
+    ):
+        """Return this thread's client for an API, building it on first use.
+
+        Args:
+            api: API name, e.g. "gmail" or "calendar"
+            version: API version, e.g. "v1" or "v3"
+            gmail_token: Optional JSON string containing token data
+            gmail_secret: Optional JSON string containing credentials
+
+        Returns:
+            googleapiclient Resource bound to a thread-local authorized transport
+        """
+        creds = self.credentials(gmail_token, gmail_secret)
+        if creds is None:
+            raise ValueError("No Gmail API credentials found. Set GMAIL_TOKEN or run setup_gmail.py")
+
+        services: Dict[Tuple[int, str, str], Any] = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        key = (id(creds), api, version)
+        if key not in services:
+            http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            services[key] = build_service(api, version, http=http)
+        return services[key]
+
+    def clear(self) -> None:
+        """Forget all credentials and this thread's clients."""
+        with self._lock:
+            self._credentials.clear()
+            self._refresh_locks.clear()
+        self._local.services = {}
+
+_pool = ServicePool()
+
+def get_service(api: str, version: str, gmail_token: Optional[str] = None, gmail_secret: Optional[str] = None):
+    """Return a pooled Google API client (see ServicePool.service)."""
+    return _pool.service(api, version, gmail_token, gmail_secret)
+
+def get_pooled_credentials(gmail_token: Optional[str] = None, gmail_secret: Optional[str] = None):
+    """Return pooled, proactively refreshed credentials (see ServicePool.credentials)."""
+    return _pool.credentials(gmail_token, gmail_secret)
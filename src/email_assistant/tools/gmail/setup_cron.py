@@ -3,11 +3,15 @@
 Setup cron job for email ingestion in LangGraph.
 
 This script creates a scheduled cron job in LangGraph that periodically
-runs the email ingestion graph to process new emails.
+runs the email ingestion graph to process new emails. With ``--daemon`` it
+instead writes a launcher for the resident ingest daemon (see ingest_daemon.py),
+which runs the same ingestion on your own machine with adaptive polling.
 """
 
 import argparse
 import asyncio
+import shlex
+from pathlib import Path
 from typing import Optional
 from langgraph_sdk import get_client
 from dotenv import load_dotenv
@@ -56,6 +60,58 @@ async def main(
     
     return cron
 
+def setup_ingest_daemon(
+    email: str,
+    url: str,
+    minutes_since: int = 60,
+    graph_name: str = "email_assistant_hitl_memory_gmail",
+    include_read: bool = False,
+    min_interval: int = 30,
+    max_interval: int = 900,
+    status_port: Optional[int] = None,
+) -> Path:
+    """Write a launcher script for the resident ingest daemon instead of a cron job.
+    
+    The daemon keeps its Gmail and LangGraph clients warm and adapts its polling
+    interval to the mailbox, so no process is started per run.
+    
+    Returns:
+        Path: The launcher script
+    """
+    project_root = Path(__file__).resolve().parents[4]
+    daemon_args = [
+        "uv", "run", "python", "-m", "email_assistant.tools.gmail.ingest_daemon", "run",
+        "--email", email,
+        "--url", url,
+        "--minutes-since", str(minutes_since),
+        "--graph-name", graph_name,
+        "--min-interval", str(min_interval),
+        "--max-interval", str(max_interval),
+    ]
+    if include_read:
+        daemon_args.append("--include-read")
+    if status_port:
+        daemon_args += ["--status-port", str(status_port)]
+    
+    launcher_path = Path.home() / "email_ingest_daemon.sh"
+    launcher_path.write_text(
+        "#!/bin/sh\n"
+        "# Resident Gmail ingestion daemon (adaptive polling)\n"
+        f"cd {shlex.quote(str(project_root))}\n"
+        f"exec {shlex.join(daemon_args)}\n"
+    )
+    launcher_path.chmod(0o755)
+    
+    print(f"Daemon launcher created at: {launcher_path}")
+    print("To start the daemon, run:")
+    print(f"  {launcher_path}")
+    print("\nOr to run it in the background:")
+    print(f"  nohup {launcher_path} > ingest_daemon.log 2>&1 &")
+    print("\nTo check on it:")
+    print("  uv run python -m email_assistant.tools.gmail.ingest_daemon status")
+    
+    return launcher_path
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Set up a cron job for email ingestion in LangGraph")
     
@@ -94,9 +150,44 @@ if __name__ == "__main__":
         action="store_true",
         help="Include emails that have already been read",
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Write a launcher for the resident ingest daemon instead of creating a LangGraph cron",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=int,
+        default=30,
+        help="Daemon: seconds between polls while mail is arriving",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=int,
+        default=900,
+        help="Daemon: longest polling interval when the mailbox is idle",
+    )
+    parser.add_argument(
+        "--status-port",
+        type=int,
+        help="Daemon: serve its status as JSON on this local port",
+    )
     
     args = parser.parse_args()
     
+    if args.daemon:
+        setup_ingest_daemon(
+            email=args.email,
+            url=args.url,
+            minutes_since=args.minutes_since,
+            graph_name=args.graph_name,
+            include_read=args.include_read,
+            min_interval=args.min_interval,
+            max_interval=args.max_interval,
+            status_port=args.status_port,
+        )
+        raise SystemExit(0)
+    
     asyncio.run(
         main(
             email=args.email,
@@ -0,0 +1,240 @@
+"""
+Multi-attendee meeting slot finder.
+
+Pulls free/busy information for every attendee with a single Calendar
+``freebusy.query`` call, represents each day as a bitmap of 15-minute slots,
+ANDs the attendees' free bitmaps together with the organizer's working hours and
+returns ranked candidate slots that work for everyone.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from email_assistant.tools.gmail.availability import Interval, WorkingHours
+
+# Bitmap resolution
+SLOT_MINUTES = 15
+
+# freebusy.query accepts at most this many calendars per request
+FREEBUSY_MAX_ITEMS = 50
+
+# Free slots before/after a candidate that still count towards its ranking (1 hour)
+MAX_BUFFER_SLOTS = 4
+
+@dataclass(frozen=True)
+class CandidateSlot:
+    """A meeting slot that is free for every attendee."""
+
+    start: datetime
+    end: datetime
+    # Free 15-minute slots directly before and after the meeting (capped at one hour each)
+    buffer_before: int
+    buffer_after: int
+
+    @property
+    def score(self) -> int:
+        return min(self.buffer_before, MAX_BUFFER_SLOTS) + min(self.buffer_after, MAX_BUFFER_SLOTS)
+
+def day_slots(day: date, hours: WorkingHours) -> Tuple[datetime, int]:
+    """Return the UTC start of ``day`` and its number of 15-minute slots.
+
+    A day is 23 or 25 hours long when daylight saving time starts or ends, so
+    slots are counted on the UTC timeline rather than the local wall clock.
+    """
+    day_start, day_end = hours.day_bounds(day)
+    start_utc = day_start.astimezone(timezone.utc)
+    minutes = (day_end.astimezone(timezone.utc) - start_utc).total_seconds() / 60
+    return start_utc, round(minutes / SLOT_MINUTES)
+
+def _slot_index(moment: datetime, start_utc: datetime, slots: int, round_up: bool) -> int:
+    # Subtracting aware datetimes of the same ZoneInfo compares wall clocks; UTC does not
+    minutes = (moment.astimezone(timezone.utc) - start_utc).total_seconds() / 60
+    index = math.ceil(minutes / SLOT_MINUTES) if round_up else math.floor(minutes / SLOT_MINUTES)
+    return max(0, min(slots, index))
+
+def busy_bitmap(busy: Iterable[Interval], day: date, hours: WorkingHours) -> np.ndarray:
+    """Mark every 15-minute slot of ``day`` touched by a busy interval.
+
+    Args:
+        busy: Busy intervals (tz-aware, any order)
+        day: Day in the user's time zone
+        hours: Provides the user's time zone
+
+    Returns:
+        Boolean array with one entry per slot of the day (see day_slots), True where busy
+    """
+    day_start, day_end = hours.day_bounds(day)
+    start_utc, slots = day_slots(day, hours)
+    bitmap = np.zeros(slots, dtype=bool)
+    for start, end in busy:
+        if end <= day_start or start >= day_end:
+            continue
+        # Partially covered slots count as busy
+        bitmap[_slot_index(start, start_utc, slots, False):_slot_index(end, start_utc, slots, True)] = True
+    return bitmap
+
+def working_bitmap(day: date, hours: WorkingHours) -> np.ndarray:
+    """Return a bitmap of the 15-minute slots inside working hours on ``day``."""
+    start_utc, slots = day_slots(day, hours)
+    bitmap = np.zeros(slots, dtype=bool)
+    window = hours.window(day)
+    if window is not None:
+        # Only whole slots inside the working window are usable
+        bitmap[_slot_index(window[0], start_utc, slots, True):_slot_index(window[1], start_utc, slots, False)] = True
+    return bitmap
+
+def _run_length(free: np.ndarray, index: int, step: int) -> int:
+    length = 0
+    while 0 <= index < len(free) and free[index]:
+        length += 1
+        index += step
+    return length
+
+def find_common_slots(
+    busy_by_attendee: Dict[str, List[Interval]],
+    days: Sequence[date],
+    duration_minutes: int,
+    hours: WorkingHours,
+    max_candidates: int = 5,
+) -> List[CandidateSlot]:
+    """Find slots that are free for every attendee within working hours.
+
+    Args:
+        busy_by_attendee: Busy intervals per attendee
+        days: Days to search, in the user's time zone
+        duration_minutes: Meeting length
+        hours: The organizer's working hours and time zone
+        max_candidates: Maximum number of slots to return
+
+    Returns:
+        Non-overlapping candidate slots, best first. Slots with free time around them
+        rank higher (so meetings are not stacked back to back), then earlier slots.
+    """
+    needed = max(1, math.ceil(duration_minutes / SLOT_MINUTES))
+    candidates = []
+    for day in sorted(set(days)):
+        free = working_bitmap(day, hours)
+        for busy in busy_by_attendee.values():
+            free &= ~busy_bitmap(busy, day, hours)
+        if free.sum() < needed:
+            continue
+
+        # Start indices where `needed` consecutive slots are all free
+        window_sums = np.convolve(free.astype(np.int32), np.ones(needed, dtype=np.int32), mode="valid")
+        start_utc, _ = day_slots(day, hours)
+        for index in np.flatnonzero(window_sums == needed):
+            index = int(index)
+            start = start_utc + timedelta(minutes=index * SLOT_MINUTES)
+            candidates.append(CandidateSlot(
+                start=start.astimezone(hours.tzinfo),
+                end=(start + timedelta(minutes=duration_minutes)).astimezone(hours.tzinfo),
+                buffer_before=_run_length(free, index - 1, -1),
+                buffer_after=_run_length(free, index + needed, 1),
+            ))
+
+    # Rank, then greedily keep the best non-overlapping slots
+    candidates.sort(key=lambda slot: (-slot.score, slot.start))
+    chosen: List[CandidateSlot] = []
+    for slot in candidates:
+        if all(slot.end <= other.start or slot.start >= other.end for other in chosen):
+            chosen.append(slot)
+            if len(chosen) == max_candidates:
+                break
+    return chosen
+
+def query_free_busy(
+    service,
+    calendars: Sequence[str],
+    time_min: datetime,
+    time_max: datetime,
+    timezone: str,
+) -> Tuple[Dict[str, List[Interval]], Dict[str, Any]]:
+    """Fetch busy intervals for several calendars with freebusy.query.
+
+    All calendars go into one request (split only above the API's per-request limit).
+
+    Args:
+        service: Calendar v3 service
+        calendars: Calendar IDs / attendee email addresses
+        time_min: Start of the range
+        time_max: End of the range
+        timezone: Time zone for the response
+
+    Returns:
+        Tuple of busy intervals per calendar and errors per calendar (e.g. calendars
+        whose free/busy information is not shared with the user)
+    """
+    busy: Dict[str, List[Interval]] = {}
+    errors: Dict[str, Any] = {}
+    for offset in range(0, len(calendars), FREEBUSY_MAX_ITEMS):
+        chunk = calendars[offset:offset + FREEBUSY_MAX_ITEMS]
+        response = service.freebusy().query(body={
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "timeZone": timezone,
+            "items": [{"id": calendar} for calendar in chunk],
+        }).execute()
+        for calendar_id, info in response.get("calendars", {}).items():
+            if info.get("errors"):
+                errors[calendar_id] = info["errors"]
+                continue
+            busy[calendar_id] = [
+                (
+                    datetime.fromisoformat(period["start"].replace("Z", "+00:00")),
+                    datetime.fromisoformat(period["end"].replace("Z", "+00:00")),
+                )
+                for period in info.get("busy", [])
+            ]
+    return busy, errors
+
+def find_meeting_slots(
+    service,
+    attendees: Sequence[str],
+    days: Sequence[date],
+    duration_minutes: int,
+    hours: WorkingHours,
+    max_candidates: int = 5,
+    include_self: bool = True,
+) -> Tuple[List[CandidateSlot], Dict[str, Any]]:
+    """Find candidate meeting slots for a group of attendees.
+
+    Args:
+        service: Calendar v3 service
+        attendees: Attendee email addresses
+        days: Days to search, in the organizer's time zone
+        duration_minutes: Meeting length
+        hours: The organizer's working hours and time zone
+        max_candidates: Maximum number of slots to return
+        include_self: Also respect the organizer's own (primary) calendar
+
+    Returns:
+        Tuple of ranked candidate slots and free/busy errors per calendar
+    """
+    calendars = list(dict.fromkeys((["primary"] if include_self else []) + list(attendees)))
+    range_start, _ = hours.day_bounds(min(days))
+    _, range_end = hours.day_bounds(max(days))
+    busy, errors = query_free_busy(service, calendars, range_start, range_end, hours.timezone)
+    return find_common_slots(busy, days, duration_minutes, hours, max_candidates), errors
+
+def format_candidate_slots(
+    slots: List[CandidateSlot],
+    errors: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Format candidate slots for the agent, with ISO times usable by schedule_meeting_tool."""
+    if not slots:
+        result = "No common free slot found for all attendees on the requested dates.\n"
+    else:
+        result = "Candidate meeting slots (best first):\n"
+        for i, slot in enumerate(slots, 1):
+            result += (
+                f"{i}. {slot.start.strftime('%A %d-%m-%Y %I:%M %p')} - {slot.end.strftime('%I:%M %p')}"
+                f" (start_time: {slot.start.strftime('%Y-%m-%dT%H:%M:%S')},"
+                f" end_time: {slot.end.strftime('%Y-%m-%dT%H:%M:%S')})\n"
+            )
+    if errors:
+        result += "Free/busy not available for: " + ", ".join(sorted(errors)) + "\n"
+    return result
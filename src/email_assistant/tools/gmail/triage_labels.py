@@ -0,0 +1,68 @@
+"""
+Gmail labels that record the assistant's triage decision.
+
+Without them only ``is:unread`` kept a message from being fetched again, and
+``ignore`` / ``notify`` emails are never marked as read, so every poll re-fetched
+them. The graph now labels each triaged message ``assistant/triaged-<decision>``
+(through the batched label queue) and the ingest queries exclude those labels, so
+Gmail filters processed mail on the server.
+
+Gmail search has no label wildcards and does not match parent labels for messages
+that only carry a nested label, so each label is excluded explicitly. In queries
+the "/" of nested label names is written as "-".
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+TRIAGE_DECISIONS = ("ignore", "notify", "respond")
+TRIAGE_LABEL_PREFIX = "assistant/triaged-"
+
+# Account -> label name -> Gmail label ID, resolved once per process and account
+_label_ids: Dict[str, Dict[str, str]] = {}
+_label_ids_lock = threading.Lock()
+
+def triage_label_name(decision: str) -> str:
+    """Return the label name for a triage decision, e.g. ``assistant/triaged-ignore``."""
+    if decision not in TRIAGE_DECISIONS:
+        raise ValueError(f"Invalid triage decision: {decision}")
+    return f"{TRIAGE_LABEL_PREFIX}{decision}"
+
+def triage_exclusion_query() -> str:
+    """Return the search terms that drop already triaged messages."""
+    return " ".join(f"-label:{triage_label_name(decision).replace('/', '-')}" for decision in TRIAGE_DECISIONS)
+
+def resolve_label_ids(service, names: Iterable[str], account: str = "") -> Dict[str, str]:
+    """Return the IDs of user labels by name, creating labels that do not exist yet.
+
+    Args:
+        service: Gmail v1 service of the account
+        names: Label names (nested labels use "/")
+        account: Mailbox the service belongs to (see service_pool.token_source);
+            label IDs differ between mailboxes
+
+    Returns:
+        Dict mapping each name to its label ID
+    """
+    names = list(names)
+    with _label_ids_lock:
+        label_ids = _label_ids.setdefault(account, {})
+        missing = [name for name in names if name not in label_ids]
+        if missing:
+            labels = service.users().labels().list(userId="me").execute().get("labels", [])
+            label_ids.update({label["name"]: label["id"] for label in labels})
+            # Create parents ("assistant") before nested labels so Gmail shows them nested
+            parents = ["/".join(name.split("/")[:i]) for name in missing for i in range(1, name.count("/") + 1)]
+            for name in dict.fromkeys(parents + missing):
+                if name in label_ids:
+                    continue
+                label = service.users().labels().create(
+                    userId="me",
+                    body={"name": name, "labelListVisibility": "labelShow", "messageListVisibility": "show"},
+                ).execute()
+                logger.info(f"Created Gmail label {name}")
+                label_ids[name] = label["id"]
+        return {name: label_ids[name] for name in names}
@@ -2,6 +2,8 @@ from typing import List, Any
 import json
 import html2text
 
+from email_assistant.email_bodies import expand_body_markers, has_body_marker, resolve_body
+
 def format_email_markdown(subject, author, to, email_thread, email_id=None):
     """Format email details into a nicely formatted markdown string for display
     
@@ -39,15 +41,7 @@ def format_gmail_markdown(subject, author, to, email_thread, email_id=None):
     id_section = f"\n**ID**: {email_id}" if email_id else ""
     
     # Check if email_thread is HTML content and convert to text if needed
-    if email_thread and (email_thread.strip().startswith("<!DOCTYPE") or 
-                          email_thread.strip().startswith("<html") or
-                          "<body" in email_thread):
-        # Convert HTML to markdown text
-        h = html2text.HTML2Text()
-        h.ignore_links = False
-        h.ignore_images = True
-        h.body_width = 0  # Don't wrap text
-        email_thread = h.handle(email_thread)
+    email_thread = html_to_text(email_thread)
     
     return f"""
 
@@ -60,6 +54,49 @@ def format_gmail_markdown(subject, author, to, email_thread, email_id=None):
 ---
 """
 
+def html_to_text(email_thread):
+    """Convert an HTML email body to markdown text, leaving plain text untouched
+    
+    Args:
+        email_thread: Email content (possibly HTML)
+    """
+    if email_thread and (email_thread.strip().startswith("<!DOCTYPE") or 
+                          email_thread.strip().startswith("<html") or
+                          "<body" in email_thread):
+        # Convert HTML to markdown text
+        h = html2text.HTML2Text()
+        h.ignore_links = False
+        h.ignore_images = True
+        h.body_width = 0  # Don't wrap text
+        email_thread = h.handle(email_thread)
+    return email_thread
+
+def hydrate_email_bodies(messages, store):
+    """Expand email body placeholders in messages before they are sent to an LLM
+    
+    Messages in state carry a placeholder instead of the email body (see
+    email_assistant.email_bodies) so the body is not persisted in every checkpoint.
+    
+    Args:
+        messages: List of messages (dicts or message objects)
+        store: LangGraph BaseStore instance holding the email bodies
+        
+    Returns:
+        List of messages with the bodies filled in
+    """
+    hydrated = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else message.content
+        if not has_body_marker(content):
+            hydrated.append(message)
+            continue
+        content = expand_body_markers(content, store, render=html_to_text)
+        if isinstance(message, dict):
+            hydrated.append({**message, "content": content})
+        else:
+            hydrated.append(message.model_copy(update={"content": content}))
+    return hydrated
+
 def format_for_display(tool_call):
     """Format content for display in Agent Inbox
     
@@ -129,7 +166,7 @@ def parse_email(email_input: dict) -> dict:
         email_input["email_thread"],
     )
 
-def parse_gmail(email_input: dict) -> tuple[str, str, str, str, str]:
+def parse_gmail(email_input: dict, store=None) -> tuple[str, str, str, str, str]:
     """Parse an email input dictionary for Gmail, including the email ID.
     
     This function extends parse_email by also returning the email ID,
@@ -141,8 +178,9 @@ def parse_gmail(email_input: dict) -> tuple[str, str, str, str, str]:
                 - From: Sender's email
                 - To: Recipient's email
                 - Subject: Email subject line
-                - Body: Full email content
+                - Body: Full email content (or Body_ref: digest of the body in the store)
                 - Id: Gmail message ID
+        store: LangGraph BaseStore instance, needed to resolve a body_ref
             
     Returns:
         tuple[str, str, str, str, str]: Tuple containing:
@@ -161,7 +199,7 @@ def parse_gmail(email_input: dict) -> tuple[str, str, str, str, str]:
         email_input["from"],
         email_input["to"],
         email_input["subject"],
-        email_input["body"],
+        resolve_body(email_input, store),
         email_input["id"],
     )
     
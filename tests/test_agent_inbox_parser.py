@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import httpx
+
+from email_assistant.tools.gmail.agent_inbox_parser import AgentInboxParser
+from email_assistant.tools.gmail.run_counters import GRAPH_SOURCE, RunCounters
+
+THREADS = [
+    {"thread_id": "t1", "status": "hitl", "subject": "Re: Budget", "timestamp": "2025-01-02T10:00:00", "body": "Please review"},
+    {"thread_id": "t2", "status": "processed", "subject": "Lunch", "timestamp": "2025-01-01T10:00:00", "last_updated": "2025-01-03T10:00:00"},
+]
+
+class FakeAgentInbox:
+    """httpx.MockTransport handler serving /api/threads and recording each request."""
+
+    def __init__(self):
+        self.urls = []
+        self.fail = False
+        self.threads = list(THREADS)
+
+    def __call__(self, request):
+        self.urls.append(str(request.url))
+        if self.fail:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"threads": self.threads})
+
+def make_parser(tmp_path, cache_ttl):
+    counters = RunCounters(tmp_path / "counters.sqlite")
+    # Events of a graph running on this host do not leak into the polled statistics
+    counters.record(GRAPH_SOURCE, "msg-1", "processed")
+    inbox = FakeAgentInbox()
+    parser = AgentInboxParser(cache_ttl=cache_ttl, counters=counters, transport=httpx.MockTransport(inbox))
+    return parser, inbox
+
+def test_dashboard_is_built_from_one_cached_fetch(tmp_path):
+    parser, inbox = make_parser(tmp_path, cache_ttl=60)
+    data = parser.get_dashboard_data()
+    assert parser._get_statistics()["hitl"] == 1
+    assert parser._get_email_threads()[0]["id"] == "t1"
+    assert len(inbox.urls) == 1
+    assert data["statistics"]["total_emails"] == 2
+    assert data["recent_activity"][0]["thread_id"] == "t2"
+
+def test_refresh_failure_serves_the_last_snapshot(tmp_path):
+    parser, inbox = make_parser(tmp_path, cache_ttl=0)
+    parser.get_dashboard_data()
+    inbox.fail = True
+    data = parser.get_dashboard_data()
+    assert data["stale"] is True
+    assert data["statistics"]["processed"] == 1
+    assert len(inbox.urls) == 2
+
+def test_statistics_follow_the_polled_threads(tmp_path):
+    parser, inbox = make_parser(tmp_path, cache_ttl=0)
+    parser.get_dashboard_data()
+    # Unchanged snapshots write nothing
+    assert parser.counters.reconcile(parser.counter_source, [
+        ("t1", "hitl", None), ("t2", "processed", None),
+    ]) == 0
+
+    inbox.threads = [{**THREADS[0], "status": "processed"}]
+    statistics = parser.get_dashboard_data()["statistics"]
+    # t1 moved to processed and t2 is gone from the inbox
+    assert (statistics["total_emails"], statistics["processed"], statistics["hitl"]) == (1, 1, 0)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from email_assistant.tools.gmail.availability import (
+    WorkingHours,
+    day_availability,
+    free_intervals,
+    merge_intervals,
+)
+
+TZ = ZoneInfo("America/Los_Angeles")
+HOURS = WorkingHours(timezone="America/Los_Angeles")
+MONDAY = date(2025, 5, 5)
+
+def at(hour, minute=0, day=MONDAY, tz=TZ):
+    return datetime.combine(day, time(hour, minute), tzinfo=tz)
+
+def timed_event(start, end, summary="Meeting"):
+    return {"summary": summary, "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}}
+
+def test_merge_intervals_handles_unsorted_and_touching():
+    merged = merge_intervals([(at(13), at(14)), (at(9), at(10)), (at(9, 30), at(11)), (at(11), at(12))])
+    assert merged == [(at(9), at(12)), (at(13), at(14))]
+
+def test_free_intervals_clips_to_window():
+    free = free_intervals([(at(8), at(10)), (at(12), at(13)), (at(16), at(18))], at(9), at(17))
+    assert free == [(at(10), at(12)), (at(13), at(16))]
+
+def test_free_intervals_min_duration():
+    free = free_intervals([(at(10), at(12)), (at(12, 15), at(17))], at(9), at(17), timedelta(minutes=30))
+    assert free == [(at(9), at(10))]
+
+def test_day_availability_converts_utc_events_to_user_timezone():
+    # 16:00-17:00 UTC is 09:00-10:00 in Los Angeles (PDT)
+    utc = ZoneInfo("UTC")
+    events = [timed_event(at(16, tz=utc), at(17, tz=utc), "Standup")]
+    availability = day_availability(events, MONDAY, HOURS)
+    assert [(start.hour, end.hour, summary) for start, end, summary, _ in availability.events] == [(9, 10, "Standup")]
+    assert availability.free == [(at(10), at(17))]
+
+def test_day_availability_all_day_event_blocks_day():
+    events = [{"summary": "Offsite", "start": {"date": "2025-05-05"}, "end": {"date": "2025-05-06"}}]
+    availability = day_availability(events, MONDAY, HOURS)
+    assert availability.has_all_day_event
+    assert availability.free == []
+    # The all-day event does not leak into the next day
+    assert day_availability(events, MONDAY + timedelta(days=1), HOURS).events == []
+
+def test_custom_working_hours_and_weekends():
+    hours = WorkingHours(timezone="Europe/Berlin", start=time(8, 0), end=time(12, 0), days=(0, 1, 2, 3))
+    berlin = ZoneInfo("Europe/Berlin")
+    availability = day_availability([], MONDAY, hours)
+    assert availability.free == [(at(8, tz=berlin), at(12, tz=berlin))]
+
+    friday = day_availability([], date(2025, 5, 9), hours)
+    assert not friday.working_day
+    assert friday.free == []
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+from datetime import datetime, timedelta, timezone
+
+from email_assistant.tools.gmail.calendar_cache import CalendarEventCache, get_calendar_cache
+
+NOW = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+def event(event_id, hours_from_now, status="confirmed"):
+    start = NOW + timedelta(hours=hours_from_now)
+    return {
+        "id": event_id,
+        "status": status,
+        "summary": event_id,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+    }
+
+class Gone(Exception):
+    class resp:
+        status = 410
+
+class FakeCalendar:
+    """Minimal events().list() stand-in that serves queued responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.requests.append(params)
+        return self
+
+    def execute(self):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def test_incremental_sync_applies_changes():
+    service = FakeCalendar(
+        {"items": [event("a", 1), event("b", 3)], "nextSyncToken": "t1"},
+        {"items": [event("b", 3, status="cancelled"), event("c", 5)], "nextSyncToken": "t2"},
+    )
+    cache = CalendarEventCache(max_staleness=0)
+    window = (NOW, NOW + timedelta(days=1))
+
+    assert [e["id"] for e in cache.events_between(service, *window)] == ["a", "b"]
+    assert "timeMin" in service.requests[0] and "timeMax" in service.requests[0]
+    assert "syncToken" not in service.requests[0]
+
+    assert [e["id"] for e in cache.events_between(service, *window)] == ["a", "c"]
+    assert service.requests[1]["syncToken"] == "t1"
+
+def test_fresh_cache_is_served_from_memory():
+    service = FakeCalendar({"items": [event("a", 1)], "nextSyncToken": "t1"})
+    cache = CalendarEventCache(max_staleness=60)
+    window = (NOW, NOW + timedelta(days=1))
+    cache.events_between(service, *window)
+    cache.events_between(service, *window)
+    assert len(service.requests) == 1
+    assert cache.stats["hits"] == 1
+
+def test_expired_sync_token_triggers_full_sync():
+    service = FakeCalendar(
+        {"items": [event("a", 1)], "nextSyncToken": "t1"},
+        Gone(),
+        {"items": [event("b", 2)], "nextSyncToken": "t2"},
+    )
+    cache = CalendarEventCache(max_staleness=60)
+    window = (NOW, NOW + timedelta(days=1))
+    cache.events_between(service, *window)
+    cache.refresh(service)
+    assert [e["id"] for e in cache.events_between(service, *window)] == ["b"]
+    assert cache.stats["full_syncs"] == 2
+
+def test_range_before_synced_window_is_not_served():
+    service = FakeCalendar({"items": [], "nextSyncToken": "t1"})
+    cache = CalendarEventCache()
+    assert cache.events_between(service, NOW - timedelta(days=7), NOW) is None
+
+def test_range_past_synced_window_is_not_served():
+    service = FakeCalendar({"items": [], "nextSyncToken": "t1"})
+    cache = CalendarEventCache(lookahead=timedelta(days=7))
+    assert cache.events_between(service, NOW, NOW + timedelta(days=1)) == []
+    assert cache.events_between(service, NOW + timedelta(days=6), NOW + timedelta(days=8)) is None
+
+def test_expiring_window_triggers_full_sync():
+    service = FakeCalendar(
+        {"items": [event("a", 1)], "nextSyncToken": "t1"},
+        {"items": [event("b", 2)], "nextSyncToken": "t2"},
+    )
+    cache = CalendarEventCache(max_staleness=0)
+    cache.refresh(service)
+    # Pretend the window was synced long ago: less than half the look-ahead is left
+    cache._synced_until = NOW + cache.lookahead / 4
+    cache.refresh(service)
+    assert "syncToken" not in service.requests[1]
+    assert cache.stats["full_syncs"] == 2
+
+def test_caches_are_per_account():
+    assert get_calendar_cache("env:alice") is get_calendar_cache("env:alice")
+    assert get_calendar_cache("env:alice") is not get_calendar_cache("env:bob")
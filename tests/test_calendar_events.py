@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+from email_assistant.tools.gmail import gmail_tools
+from email_assistant.tools.gmail.availability import WorkingHours
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+class FakeCalendar:
+    """events().list stand-in serving pages keyed by pageToken."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def events(self):
+        return self
+
+    def list(self, **kwargs):
+        self.requests.append(kwargs)
+        return FakeRequest(self.pages[kwargs.get("pageToken")])
+
+class NoCache:
+    """Calendar cache that never covers the range, so the live query is used."""
+
+    def events_between(self, *args, **kwargs):
+        return None
+
+PAGES = {
+    None: {
+        "items": [
+            {"summary": "Offsite", "start": {"dateTime": "2025-01-06T16:00:00Z"}, "end": {"dateTime": "2025-01-07T10:00:00Z"}},
+        ],
+        "nextPageToken": "page-2",
+    },
+    "page-2": {
+        "items": [
+            {"summary": "Standup", "start": {"dateTime": "2025-01-06T09:00:00Z"}, "end": {"dateTime": "2025-01-06T09:30:00Z"}},
+            {"summary": "Holiday", "start": {"date": "2025-01-07"}, "end": {"date": "2025-01-08"}},
+        ],
+    },
+}
+
+def test_one_paginated_range_query_bucketed_per_day(monkeypatch):
+    calendar = FakeCalendar(PAGES)
+    monkeypatch.setattr(gmail_tools, "get_service", lambda *args: calendar)
+    monkeypatch.setattr(gmail_tools, "get_calendar_cache", lambda *args, **kwargs: NoCache())
+
+    result = gmail_tools.get_calendar_events(["06-01-2025", "07-01-2025"], WorkingHours(timezone="UTC"))
+
+    # One query over both days, following nextPageToken
+    assert [request.get("pageToken") for request in calendar.requests] == [None, "page-2"]
+    assert {(r["timeMin"], r["timeMax"]) for r in calendar.requests} == {
+        ("2025-01-06T00:00:00+00:00", "2025-01-08T00:00:00+00:00")
+    }
+
+    monday, tuesday = result.split("Events for ")[1:]
+    assert monday.splitlines() == [
+        "06-01-2025:",
+        "  - 09:00 AM - 09:30 AM: Standup",
+        "  - 04:00 PM - Jan 07 10:00 AM: Offsite",
+        "  Available: 09:30 AM - 04:00 PM",
+        "",
+    ]
+    # The multi-day event shows on both days; the all-day event blocks Tuesday
+    assert tuesday.splitlines()[:4] == [
+        "07-01-2025:",
+        "  - Jan 06 04:00 PM - 10:00 AM: Offsite",
+        "  - All day: Holiday",
+        "  Available: No availability (all-day events)",
+    ]
+
+def test_day_without_events(monkeypatch):
+    monkeypatch.setattr(gmail_tools, "get_service", lambda *args: FakeCalendar({None: {"items": []}}))
+    monkeypatch.setattr(gmail_tools, "get_calendar_cache", lambda *args, **kwargs: NoCache())
+
+    result = gmail_tools.get_calendar_events(["11-01-2025"], WorkingHours(timezone="UTC"))
+
+    assert "Events for 11-01-2025:\n  No events found for this day\n  Available all day\n" in result
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import asyncio
+import time
+
+import httpx
+
+from email_assistant.tools.gmail.dashboard_aggregator import DashboardAggregator, DashboardSource, langsmith_source
+from email_assistant.tools.gmail.langsmith_parser import LangSmithParser, LangSmithRunStore
+from email_assistant.tools.gmail.run_counters import RunCounters
+
+def make_source(name, delays, deadline=0.2):
+    """Source returning how often it was fetched, after the next delay in ``delays``."""
+    calls = []
+
+    async def fetch(client):
+        calls.append(name)
+        await asyncio.sleep(delays[len(calls) - 1])
+        return {"fetches": len(calls)}
+
+    return DashboardSource(name, fetch, deadline)
+
+def test_slow_source_is_served_stale_while_it_refreshes():
+    aggregator = DashboardAggregator([make_source("fast", [0, 0, 0]), make_source("slow", [0, 0.5, 0])], max_age=0)
+    first = aggregator.get_dashboard_data()["sources"]
+    assert first["slow"] == {"status": "fresh", "data": {"fetches": 1}, "age": 0.0, "elapsed": first["slow"]["elapsed"]}
+
+    started = time.monotonic()
+    second = aggregator.get_dashboard_data()["sources"]
+    # Bounded by the deadline, not by the slow refresh
+    assert time.monotonic() - started < 0.45
+    assert second["fast"]["data"] == {"fetches": 2}
+    assert second["slow"]["status"] == "stale"
+    assert second["slow"]["data"] == {"fetches": 1}
+
+    # The late refresh filled the cache in the background
+    time.sleep(0.5)
+    assert aggregator._cache["slow"][0] == {"fetches": 2}
+    aggregator.close()
+
+def test_failing_source_without_cache_is_unavailable():
+    async def fail(client):
+        raise ConnectionError("down")
+
+    aggregator = DashboardAggregator([DashboardSource("broken", fail, 1.0), make_source("ok", [0])])
+    sources = aggregator.get_dashboard_data()["sources"]
+    assert sources["broken"] == {"status": "unavailable", "data": None, "error": "down"}
+    assert sources["ok"]["status"] == "fresh"
+    aggregator.close()
+
+def test_langsmith_sync_runs_over_the_async_client(tmp_path):
+    def handler(request):
+        return httpx.Response(200, json={"runs": [{"id": "run-1", "status": "interrupted", "start_time": "2025-01-01T00:00:00"}]})
+
+    parser = LangSmithParser(store=LangSmithRunStore(tmp_path / "runs.sqlite"), counters=RunCounters(tmp_path / "counters.sqlite"))
+    aggregator = DashboardAggregator([langsmith_source(parser)], transport=httpx.MockTransport(handler))
+    data = aggregator.get_dashboard_data()["sources"]["langsmith"]["data"]
+    assert data["statistics"]["hitl"] == 1
+    assert data["emails"][0]["id"] == "run-1"
+    aggregator.close()
+
+def test_platform_fetcher_goes_through_the_aggregator(tmp_path, monkeypatch):
+    from email_assistant.tools.gmail.langgraph_platform_fetcher import LangGraphPlatformFetcher
+
+    monkeypatch.setenv("LANGSMITH_API_KEY", "test-key")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503) if len(requests) > 1 else httpx.Response(200, json={"threads": THREADS})
+
+    THREADS = [{"thread_id": "t1", "status": "done"}, {"thread_id": "t2", "status": "meeting_scheduled"}]
+    fetcher = LangGraphPlatformFetcher(counters=RunCounters(tmp_path / "counters.sqlite"), transport=httpx.MockTransport(handler))
+    data = fetcher.get_dashboard_data()
+    # The remote graph's thread statuses are the statistics
+    assert (data["total_emails"], data["processed"], data["scheduled_meetings"]) == (2, 1, 1)
+    assert data["threads"] == THREADS
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+
+    # A failed refresh serves the last threads instead of a connection failure
+    fetcher.aggregator.max_age = 0
+    assert fetcher.get_dashboard_data()["stale"] is True
+    fetcher.aggregator.close()
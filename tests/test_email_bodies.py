@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+from email_assistant import email_bodies
+from email_assistant.email_bodies import (
+    BODY_NAMESPACE,
+    body_digest,
+    body_marker,
+    expand_body_markers,
+    has_body_marker,
+    load_body,
+    put_body,
+    resolve_body,
+    slim_email_input,
+)
+from email_assistant.utils import hydrate_email_bodies, parse_gmail
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    # Resolve from the store, not from bodies remembered by earlier tests
+    email_bodies._cache.clear()
+    yield
+    email_bodies._cache.clear()
+
+def test_body_is_stored_once_under_its_digest():
+    store = InMemoryStore()
+    digest = put_body(store, "Hello")
+
+    assert digest == body_digest("Hello")
+    assert put_body(store, "Hello") == digest
+    assert len(store.search(BODY_NAMESPACE)) == 1
+    assert store.get(BODY_NAMESPACE, digest).value == {"body": "Hello"}
+
+def test_slim_input_carries_only_the_reference_and_resolves_from_the_store():
+    store = InMemoryStore()
+    email_input = {"from": "a@example.com", "subject": "Hi", "id": "m1", "body": "Long body"}
+
+    slim = slim_email_input(email_input, store)
+    assert "body" not in slim
+    assert slim["body_ref"] == body_digest("Long body")
+    assert slim["preview"] == "Long body"
+
+    email_bodies._cache.clear()
+    assert resolve_body(slim, store) == "Long body"
+    # Inline bodies keep working without a store
+    assert resolve_body(email_input) == "Long body"
+
+def test_missing_body_or_store_is_an_error():
+    with pytest.raises(KeyError):
+        load_body(body_digest("never stored"), InMemoryStore())
+    with pytest.raises(ValueError):
+        load_body(body_digest("never stored"), None)
+
+def test_markers_expand_with_the_rendered_body():
+    store = InMemoryStore()
+    digest = put_body(store, "<html><body><p>Hi there</p></body></html>")
+    marker = body_marker({"body_ref": digest})
+
+    assert body_marker({"body": "inline"}) is None
+    assert has_body_marker(f"**Subject**: x\n\n{marker}")
+    assert not has_body_marker(None)
+
+    email_bodies._cache.clear()
+    assert expand_body_markers(f"Before {marker} after", store, render=str.upper) == (
+        "Before <HTML><BODY><P>HI THERE</P></BODY></HTML> after"
+    )
+
+def test_hydrate_email_bodies_fills_dicts_and_message_objects():
+    store = InMemoryStore()
+    marker = body_marker({"body_ref": put_body(store, "<html><body><p>Quarterly numbers</p></body></html>")})
+    messages = [
+        {"role": "user", "content": f"Respond to:\n{marker}"},
+        HumanMessage(content=f"Email:\n{marker}"),
+        {"role": "assistant", "content": "No marker here"},
+    ]
+
+    email_bodies._cache.clear()
+    hydrated = hydrate_email_bodies(messages, store)
+
+    assert "Quarterly numbers" in hydrated[0]["content"]
+    assert "<html>" not in hydrated[0]["content"]
+    assert "Quarterly numbers" in hydrated[1].content
+    assert hydrated[2] is messages[2]
+    # The state's messages keep the placeholder
+    assert marker in messages[0]["content"]
+
+def test_parse_gmail_resolves_the_body_reference():
+    store = InMemoryStore()
+    email_input = {"from": "a@example.com", "to": "b@example.com", "subject": "Hi", "id": "m1",
+                   "body_ref": put_body(store, "Body text")}
+
+    email_bodies._cache.clear()
+    assert parse_gmail(email_input, store) == ("a@example.com", "b@example.com", "Hi", "Body text", "m1")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+from email_assistant.tools.gmail.run_ingest import latest_message_per_thread
+
+class FakeGmail:
+    """threads().get(format="minimal") stand-in that records requested threads."""
+
+    def __init__(self, threads):
+        self.threads_by_id = threads
+        self.requested = []
+
+    def users(self):
+        return self
+
+    def threads(self):
+        return self
+
+    def get(self, userId, id, format):
+        self.requested.append((id, format))
+        self._response = {"messages": self.threads_by_id[id]}
+        return self
+
+    def execute(self):
+        return self._response
+
+def test_one_entry_per_thread_with_latest_message():
+    service = FakeGmail({
+        "t1": [
+            {"id": "a", "internalDate": "1000"},
+            {"id": "c", "internalDate": "3000"},
+            {"id": "b", "internalDate": "2000"},
+        ],
+    })
+    messages = [
+        {"id": "b", "threadId": "t1"},
+        {"id": "x", "threadId": "t2"},
+        {"id": "c", "threadId": "t1"},
+        {"id": "a", "threadId": "t1"},
+    ]
+    assert latest_message_per_thread(service, messages) == [
+        {"id": "c", "threadId": "t1", "coalesced": 3, "internalDate": "3000"},
+        {"id": "x", "threadId": "t2", "coalesced": 1},
+    ]
+    # Single-message threads need no extra request
+    assert service.requested == [("t1", "minimal")]
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from email_assistant.lease import LeaseStore
+from email_assistant.tools.gmail.ingest_daemon import AdaptiveInterval, IngestDaemon
+from email_assistant.tools.gmail import run_ingest
+from email_assistant.tools.gmail.ingest_ledger import IngestLedger
+from email_assistant.tools.gmail.run_counters import GRAPH_SOURCE, RunCounters
+from email_assistant.tools.gmail.mailbox_registry import Mailbox
+from email_assistant.tools.gmail.run_ingest import build_arg_parser, ingest_email_to_langgraph
+
+class FakeGmail:
+    """messages().list stand-in returning queued search results."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.queries = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q):
+        self.queries.append(q)
+        self._response = self.results.pop(0)
+        return self
+
+    def execute(self):
+        if isinstance(self._response, Exception):
+            raise self._response
+        return self._response
+
+class FakeMailbox:
+    """messages().list/get stand-in over a fixed set of one-message threads."""
+
+    def __init__(self, message_ids, dates=None):
+        self.message_ids = message_ids
+        self.dates = dates or {}
+        self.fetched = []
+        self.minimal = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q):
+        self._response = {"messages": [{"id": id, "threadId": f"t-{id}"} for id in self.message_ids]}
+        return self
+
+    def get(self, userId, id, format="full"):
+        (self.minimal if format == "minimal" else self.fetched).append(id)
+        self._response = {"id": id, "threadId": f"t-{id}", "internalDate": self.dates.get(id, "0"), "payload": {"headers": []}}
+        return self
+
+    def execute(self):
+        return self._response
+
+def make_args(*extra):
+    return build_arg_parser().parse_args(["--email", "me@example.com", "--minutes-since", "5", *extra])
+
+def test_interval_backs_off_when_idle_and_resets_on_mail():
+    interval = AdaptiveInterval(min_interval=10, max_interval=60, backoff=2)
+
+    assert [interval.update(0) for _ in range(4)] == [20, 40, 60, 60]
+    assert interval.update(3) == 10
+    assert interval.update(0) == 20
+
+    with pytest.raises(ValueError):
+        AdaptiveInterval(min_interval=60, max_interval=10)
+
+def test_poll_backs_off_counts_errors_and_writes_status(tmp_path):
+    service = FakeGmail([{}, RuntimeError("quota exceeded"), {}])
+    daemon = IngestDaemon(
+        make_args(),
+        interval=AdaptiveInterval(min_interval=10, max_interval=100, backoff=3),
+        status_path=tmp_path / "status.json",
+        service=service,
+        client=object(),
+        leases=LeaseStore(tmp_path / "leases.sqlite"),
+    )
+
+    assert asyncio.run(daemon.poll_once()) == 30
+    assert asyncio.run(daemon.poll_once()) == 90
+    assert asyncio.run(daemon.poll_once()) == 100
+
+    status = json.loads((tmp_path / "status.json").read_text())
+    assert status["state"] == "sleeping"
+    assert status["polls"] == 3
+    assert status["errors"] == 1
+    assert status["last_error"] == "quota exceeded"
+    assert status["interval"] == 100
+    assert len(service.queries) == 3
+
+def test_poll_window_reaches_back_to_last_success():
+    daemon = IngestDaemon(make_args(), service=FakeGmail([]), client=object())
+
+    assert daemon.poll_args(now=1000.0).minutes_since == 5
+    daemon._last_success = 1000.0
+    assert daemon.poll_args(now=1000.0 + 15 * 60).minutes_since == 16
+    assert daemon.poll_args(now=1060.0).minutes_since == 5
+    # The daemon's own arguments are not changed
+    assert daemon.args.minutes_since == 5
+
+def test_second_daemon_stands_by_while_the_leader_holds_the_lease(tmp_path):
+    leases = LeaseStore(tmp_path / "leases.sqlite")
+    leader = IngestDaemon(make_args(), service=FakeGmail([{}]), client=object(), leases=leases, lease_ttl=60)
+    standby_service = FakeGmail([{}])
+    standby = IngestDaemon(make_args(), service=standby_service, client=object(), leases=leases, lease_ttl=60)
+
+    asyncio.run(leader.poll_once())
+    assert asyncio.run(standby.poll_once()) == standby.interval.min_interval
+    assert standby.status()["state"] == "standby"
+    assert standby.status()["lease_holder"] == leader.lease.owner
+    assert standby_service.queries == []
+
+    leader.lease.release()
+    asyncio.run(standby.poll_once())
+    assert standby.status()["state"] == "sleeping"
+    assert len(standby_service.queries) == 1
+    standby.lease.release()
+
+def test_polls_skip_emails_that_already_have_a_run(tmp_path, monkeypatch):
+    submitted = []
+
+    async def submit(email_data, graph_name, url=None, client=None, mailbox=None):
+        submitted.append(email_data["id"])
+        return email_data["thread_id"], {"run_id": f"run-{email_data['id']}"}
+
+    monkeypatch.setattr(run_ingest, "get_ingest_ledger", lambda: IngestLedger(tmp_path / "ledger.sqlite"))
+    monkeypatch.setattr(run_ingest, "ingest_email_to_langgraph", submit)
+    monkeypatch.setattr(run_ingest, "extract_message_part", lambda payload: "")
+
+    service = FakeMailbox(["a", "b"])
+    daemon = IngestDaemon(
+        make_args(),
+        interval=AdaptiveInterval(min_interval=10, max_interval=100, backoff=2),
+        service=service,
+        client=object(),
+        leases=LeaseStore(tmp_path / "leases.sqlite"),
+    )
+    assert asyncio.run(daemon.poll_once()) == 10
+    assert submitted == ["a", "b"]
+
+    # The next search window still matches both emails: nothing is submitted and the daemon backs off
+    assert asyncio.run(daemon.poll_once()) == 20
+    assert submitted == ["a", "b"]
+    assert service.fetched == ["a", "b"]
+    assert daemon.status()["last_found"] == 0
+
+    service.message_ids = ["a", "b", "c"]
+    assert asyncio.run(daemon.poll_once()) == 10
+    assert submitted == ["a", "b", "c"]
+
+    # --rerun submits them again
+    daemon.args = make_args("--rerun")
+    asyncio.run(daemon.poll_once())
+    assert submitted == ["a", "b", "c", "a", "b", "c"]
+    daemon.lease.release()
+
+class FakeLangGraph:
+    """LangGraph SDK client stand-in recording the runs it creates."""
+
+    def __init__(self):
+        self.threads = self
+        self.runs = self
+        self.store = self
+        self.created = []
+        self.fail_creates = 0
+
+    async def get(self, thread_id):
+        raise LookupError(thread_id)
+
+    async def create(self, thread_id, assistant_id=None, **kwargs):
+        if assistant_id is not None:
+            if self.fail_creates:
+                self.fail_creates -= 1
+                raise ConnectionError("run create failed")
+            self.created.append(kwargs)
+            return {"run_id": f"run-{len(self.created)}", "thread_id": thread_id}
+        return {"thread_id": thread_id}
+
+    async def update(self, thread_id, metadata):
+        self.metadata = metadata
+
+    async def put_item(self, namespace, key, value):
+        pass
+
+def test_runs_carry_their_mailbox_but_not_its_token(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_ingest, "get_run_counters", lambda: RunCounters(tmp_path / "counters.sqlite"))
+    monkeypatch.setenv("BOB_TOKEN", '{"token": "secret"}')
+    client = FakeLangGraph()
+    email_data = {"id": "m1", "thread_id": "t1", "from_email": "a@example.com", "to_email": "bob@example.com",
+                  "subject": "Hi", "page_content": "Hello"}
+
+    asyncio.run(ingest_email_to_langgraph(email_data, "graph", client=client, mailbox=Mailbox("bob@example.com", token_env="BOB_TOKEN")))
+    run = client.created[0]
+    assert run["config"] == {"configurable": {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN"}}
+    assert run["metadata"] == {"gmail_account": "bob@example.com"}
+    assert client.metadata["gmail_account"] == "bob@example.com"
+    assert "secret" not in json.dumps(run)
+
+def test_failed_run_creation_is_retried_by_the_next_poll(tmp_path, monkeypatch):
+    counters = RunCounters(tmp_path / "counters.sqlite")
+    ledger = IngestLedger(tmp_path / "ledger.sqlite")
+    monkeypatch.setattr(run_ingest, "get_run_counters", lambda: counters)
+    monkeypatch.setattr(run_ingest, "get_ingest_ledger", lambda: ledger)
+    monkeypatch.setattr(run_ingest, "extract_message_part", lambda payload: "Hello")
+    client = FakeLangGraph()
+    client.fail_creates = 1
+    service = FakeMailbox(["a"])
+    args = make_args()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(run_ingest.ingest_new_emails(service, args, client))
+    assert ledger.seen("me@example.com", ["a"]) == set()
+    # The email is not left counted as waiting on a run that does not exist
+    assert counters.totals(GRAPH_SOURCE).get("total", 0) == 0
+
+    assert asyncio.run(run_ingest.ingest_new_emails(service, args, client)) == (1, 1)
+    assert len(client.created) == 1
+    assert ledger.seen("me@example.com", ["a"]) == {"a"}
+    assert counters.totals(GRAPH_SOURCE)["waiting_action"] == 1
+    assert asyncio.run(run_ingest.ingest_new_emails(service, args, client)) == (0, 0)
+
+def test_active_threads_are_deferred_before_the_full_fetch(tmp_path, monkeypatch):
+    submitted = []
+
+    async def submit(email_data, graph_name, url=None, client=None, mailbox=None):
+        submitted.append(email_data["id"])
+        return email_data["thread_id"], {"run_id": f"run-{email_data['id']}"}
+
+    monkeypatch.setattr(run_ingest, "get_ingest_ledger", lambda: IngestLedger(tmp_path / "ledger.sqlite"))
+    monkeypatch.setattr(run_ingest, "ingest_email_to_langgraph", submit)
+    monkeypatch.setattr(run_ingest, "extract_message_part", lambda payload: "")
+    service = FakeMailbox(["old", "fresh"], dates={"fresh": str(int(time.time() * 1000))})
+
+    assert asyncio.run(run_ingest.ingest_new_emails(service, make_args("--debounce-seconds", "60"))) == (2, 1)
+    assert submitted == ["old"]
+    assert service.minimal == ["old", "fresh"]
+    # The fresh message's payload is not downloaded until it settles
+    assert service.fetched == ["old"]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+import pytest
+
+from email_assistant.tools.gmail import gmail_tools
+from email_assistant.tools.gmail.label_queue import BATCH_MODIFY_MAX_IDS, LabelFlusher, LabelQueue
+
+class FakeHttpError(Exception):
+    """Stand-in for googleapiclient's HttpError (only ``resp.status`` is read)."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Resp", (), {"status": status})()
+
+class FakeGmail:
+    """Records users().messages().batchModify() calls, optionally failing some."""
+
+    def __init__(self, fail_after=None, bad_ids=(), bad_id_status=None):
+        self.bodies = []
+        self.calls = 0
+        self.fail_after = fail_after
+        self.bad_ids = set(bad_ids)
+        self.bad_id_status = bad_id_status
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def batchModify(self, userId, body):
+        self.calls += 1
+        if self.fail_after is not None and len(self.bodies) >= self.fail_after:
+            raise ConnectionError("connection reset")
+        if self.bad_ids & set(body["ids"]):
+            raise FakeHttpError(self.bad_id_status) if self.bad_id_status else ValueError("invalid id")
+        self.bodies.append(body)
+        return self
+
+    def execute(self):
+        return {}
+
+def test_flush_groups_by_label_set(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite")
+    queue.enqueue(["m1", "m2"], remove=["UNREAD"])
+    queue.enqueue(["m3"], remove=["UNREAD"])
+    queue.enqueue(["m1"], remove=["UNREAD"])
+    queue.enqueue(["m4"], add=["Label_1"])
+    service = FakeGmail()
+    assert queue.flush(service) == 2
+    assert {"ids": ["m1", "m2", "m3"], "removeLabelIds": ["UNREAD"]} in service.bodies
+    assert {"ids": ["m4"], "addLabelIds": ["Label_1"]} in service.bodies
+    assert queue.pending() == 0
+
+def test_flush_chunks_large_batches(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite")
+    queue.enqueue([f"m{i}" for i in range(BATCH_MODIFY_MAX_IDS + 5)], remove=["UNREAD"])
+    service = FakeGmail()
+    assert queue.flush(service) == 2
+    assert [len(body["ids"]) for body in service.bodies] == [BATCH_MODIFY_MAX_IDS, 5]
+
+def test_failed_flush_keeps_unsent_changes(tmp_path):
+    path = tmp_path / "labels.sqlite"
+    queue = LabelQueue(path, base_delay=0)
+    queue.enqueue([f"m{i}" for i in range(BATCH_MODIFY_MAX_IDS + 5)], remove=["UNREAD"])
+    with pytest.raises(ConnectionError):
+        queue.flush(FakeGmail(fail_after=1))
+    # The accepted batch is gone, the rest survives (also for a new process)
+    reopened = LabelQueue(path, base_delay=0)
+    assert reopened.pending() == 5
+    service = FakeGmail()
+    reopened.flush(service)
+    assert [len(body["ids"]) for body in service.bodies] == [5]
+
+def test_failing_batch_backs_off_and_is_dead_lettered(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite", max_attempts=2, base_delay=0)
+    queue.enqueue(["bad"], remove=["UNREAD"])
+    queue.enqueue(["m1"], add=["Label_1"])
+    service = FakeGmail(bad_ids=["bad"])
+
+    with pytest.raises(ValueError):
+        queue.flush(service)
+    # The other label set went out despite the failure
+    assert service.bodies == [{"ids": ["m1"], "addLabelIds": ["Label_1"]}]
+    assert queue.pending() == 1
+
+    with pytest.raises(ValueError):
+        queue.flush(service)
+    assert queue.pending() == 0
+    assert queue.dead_lettered() == 1
+    assert queue.failed()[0]["message_id"] == "bad"
+    assert queue.flush(service) == 0
+
+def test_rejected_batch_is_split_so_only_the_bad_id_backs_off(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite", max_attempts=1)
+    queue.enqueue([f"m{i}" for i in range(7)] + ["bad"], remove=["UNREAD"])
+    service = FakeGmail(bad_ids=["bad"], bad_id_status=400)
+
+    with pytest.raises(FakeHttpError):
+        queue.flush(service)
+    assert sorted(message_id for body in service.bodies for message_id in body["ids"]) == [f"m{i}" for i in range(7)]
+    assert queue.pending() == 0
+    assert [row["message_id"] for row in queue.failed()] == ["bad"]
+
+def test_rate_limited_batch_is_not_split(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite", base_delay=60)
+    queue.enqueue(["m1", "m2"], remove=["UNREAD"])
+    service = FakeGmail(bad_ids=["m1"], bad_id_status=429)
+    with pytest.raises(FakeHttpError):
+        queue.flush(service)
+    assert service.calls == 1
+    assert queue.pending() == 2
+
+def test_failed_rows_wait_for_their_backoff(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite", base_delay=60)
+    queue.enqueue(["m1"], remove=["UNREAD"])
+    with pytest.raises(ConnectionError):
+        queue.flush(FakeGmail(fail_after=0))
+    service = FakeGmail()
+    assert queue.flush(service) == 0
+    assert service.bodies == []
+    assert queue.pending() == 1
+
+def test_accounts_are_flushed_with_their_own_service(tmp_path):
+    queue = LabelQueue(tmp_path / "labels.sqlite")
+    queue.enqueue(["a1"], remove=["UNREAD"], account="env:alice")
+    queue.enqueue(["b1"], remove=["UNREAD"], account="param:bob")
+    queue.enqueue(["c1"], remove=["UNREAD"], account="param:carol")
+    services = {"env:alice": FakeGmail(), "param:bob": FakeGmail()}
+
+    LabelFlusher(queue, services.get).flush_all()
+
+    assert [body["ids"] for body in services["env:alice"].bodies] == [["a1"]]
+    assert [body["ids"] for body in services["param:bob"].bodies] == [["b1"]]
+    # No credentials for carol in this process: her change waits
+    assert queue.accounts() == ["param:carol"]
+
+@pytest.fixture
+def tool_queue(tmp_path, monkeypatch):
+    queue = LabelQueue(tmp_path / "labels.sqlite")
+    monkeypatch.setattr(gmail_tools, "get_label_queue", lambda: queue)
+    monkeypatch.setattr(gmail_tools, "_label_flusher", LabelFlusher(queue, lambda account: None))
+    monkeypatch.setattr(gmail_tools, "_label_credentials", {})
+    return queue
+
+def test_queued_rows_name_their_mailbox_so_a_restart_can_flush_them(tool_queue, monkeypatch):
+    tokens = []
+    monkeypatch.setattr(gmail_tools, "get_service", lambda api, version, token=None, secret=None: tokens.append(token) or FakeGmail())
+    monkeypatch.setenv("BOB_TOKEN", '{"token": "b"}')
+    mailbox = {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN"}
+
+    gmail_tools.mark_as_read("m1", mailbox=mailbox)
+    [account] = tool_queue.accounts()
+    assert tool_queue.mailbox(account) == mailbox
+
+    # A new process knows no credentials, only what the rows recorded
+    gmail_tools._label_credentials.clear()
+    LabelFlusher(tool_queue, gmail_tools.label_queue_service).flush_all()
+    assert tokens == ['{"token": "b"}']
+    assert tool_queue.pending() == 0
+
+def test_nothing_is_queued_without_gmail(tool_queue, monkeypatch):
+    monkeypatch.setattr(gmail_tools, "GMAIL_API_AVAILABLE", False)
+    gmail_tools.mark_as_read("m1")
+    assert tool_queue.pending() == 0
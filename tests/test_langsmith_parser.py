@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+import json
+
+import httpx
+
+from email_assistant.tools.gmail.langsmith_parser import PAGE_SIZE, LangSmithParser, LangSmithRunStore
+from email_assistant.tools.gmail.run_counters import RunCounters
+
+def make_run(i, status="completed"):
+    return {
+        "id": f"run-{i:04d}",
+        "status": status,
+        "start_time": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}",
+        "inputs": {"email_input": {"subject": "Team meeting" if i % 10 == 0 else f"Email {i}", "body": "Hello"}},
+    }
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+class FakeLangSmith:
+    """Stand-in for requests.Session (and an httpx transport) serving /runs/search newest first, with cursors."""
+
+    def __init__(self, runs):
+        self.runs = {run["id"]: run for run in runs}
+        self.bodies = []
+
+    def post(self, url, json, timeout):
+        self.bodies.append(json)
+        runs = sorted(self.runs.values(), key=lambda run: run["start_time"], reverse=True)
+        if "id" in json:
+            runs = [run for run in runs if run["id"] in json["id"]]
+        if "filter" in json:
+            watermark = json["filter"].split('"')[1]
+            runs = [run for run in runs if run["start_time"] >= watermark]
+        offset = int(json.get("cursor") or 0)
+        page = runs[offset:offset + json["limit"]]
+        next_cursor = str(offset + json["limit"]) if offset + json["limit"] < len(runs) else None
+        return FakeResponse({"runs": page, "cursors": {"next": next_cursor}})
+
+    def handle(self, request):
+        return httpx.Response(200, json=self.post(str(request.url), json.loads(request.content), None).payload)
+
+def make_parser(tmp_path, runs):
+    langsmith = FakeLangSmith(runs)
+    parser = LangSmithParser(
+        store=LangSmithRunStore(tmp_path / "runs.sqlite"),
+        counters=RunCounters(tmp_path / "counters.sqlite"),
+        transport=httpx.MockTransport(langsmith.handle),
+    )
+    parser.session = langsmith
+    return parser
+
+def test_statistics_cover_every_page(tmp_path):
+    parser = make_parser(tmp_path, [make_run(i) for i in range(250)])
+    data = parser.get_dashboard_data()
+    assert data["statistics"]["total_emails"] == 250
+    assert data["statistics"]["processed"] == 250
+    assert data["statistics"]["scheduled_meetings"] == 25
+    assert len(data["emails"]) == 50
+    assert data["emails"][0]["id"] == "run-0249"
+    assert len(parser.session.bodies) == 3
+
+def test_later_syncs_only_pull_new_and_open_runs(tmp_path):
+    parser = make_parser(tmp_path, [make_run(i) for i in range(PAGE_SIZE)] + [make_run(PAGE_SIZE, "running")])
+    assert parser.sync() == PAGE_SIZE + 1
+
+    parser.session.runs["run-0100"]["status"] = "completed"
+    parser.session.runs["run-0101"] = make_run(PAGE_SIZE + 1, "interrupted")
+    parser.session.bodies.clear()
+    # Only the run at the watermark and the new one
+    assert parser.sync() == 2
+    assert parser.session.bodies[0]["filter"] == 'gte(start_time, "2025-01-01T00:01:40")'
+
+    statistics = parser._get_statistics()
+    assert statistics["total_emails"] == PAGE_SIZE + 2
+    assert statistics["processed"] == PAGE_SIZE + 1
+    assert statistics["hitl"] == 1
+    assert statistics["waiting_action"] == 0
+
+def test_runs_ingested_by_reference_are_read_from_the_preview(tmp_path):
+    run = make_run(0)
+    run["inputs"]["email_input"] = {"subject": "Quick question", "body_ref": "0" * 64,
+                                    "preview": "Can we set up a meeting on Friday?"}
+    parser = make_parser(tmp_path, [run])
+    data = parser.get_dashboard_data()
+    assert data["emails"][0]["content_preview"] == "Can we set up a meeting on Friday?"
+    assert data["statistics"]["scheduled_meetings"] == 1
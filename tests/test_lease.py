@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+import asyncio
+import time
+
+from email_assistant.lease import LEASE_HELD, LeaseStore, hold_lease
+from email_assistant.tools.gmail import run_ingest
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    store = LeaseStore(tmp_path / "leases.sqlite")
+
+    first = store.acquire("ingest:me@example.com", ttl=60)
+    assert first is not None
+    assert store.acquire("ingest:me@example.com", ttl=60) is None
+    assert store.holder("ingest:me@example.com")["owner"] == first.owner
+
+    first.release()
+    assert store.holder("ingest:me@example.com") is None
+    assert store.acquire("ingest:me@example.com", ttl=60) is not None
+
+def test_expired_lease_is_taken_over_and_the_old_holder_loses_it(tmp_path):
+    store = LeaseStore(tmp_path / "leases.sqlite")
+    stalled = store.acquire("ingest:me@example.com", ttl=0.05)
+    time.sleep(0.1)
+
+    successor = store.acquire("ingest:me@example.com", ttl=60)
+    assert successor is not None
+    assert successor.token == stalled.token + 1
+    assert not stalled.renew()
+    assert stalled.lost
+
+    # A late release of the old holder does not free the successor's lease
+    stalled.release()
+    assert store.holder("ingest:me@example.com")["owner"] == successor.owner
+
+def test_heartbeat_keeps_the_lease_past_its_ttl(tmp_path):
+    store = LeaseStore(tmp_path / "leases.sqlite")
+    with hold_lease("ingest:me@example.com", ttl=0.3, store=store) as lease:
+        time.sleep(0.5)
+        assert store.acquire("ingest:me@example.com", ttl=60) is None
+        assert not lease.lost
+    assert store.holder("ingest:me@example.com") is None
+
+def test_overlapping_ingest_run_is_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr("email_assistant.lease._store", LeaseStore(tmp_path / "leases.sqlite"))
+    args = run_ingest.build_arg_parser().parse_args(["--email", "Me@example.com"])
+
+    with hold_lease(run_ingest.ingest_lease_name("me@example.com")):
+        assert asyncio.run(run_ingest.fetch_and_process_emails(args)) == LEASE_HELD
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+import asyncio
+import json
+
+import pytest
+
+from email_assistant.cron import JobKickoff
+from email_assistant.cron import main as cron_job
+from email_assistant.lease import LeaseStore
+from email_assistant.tools.gmail.mailbox_pool import MailboxPool, MailboxScheduler, MailboxState
+from email_assistant.tools.gmail.mailbox_registry import (
+    Mailbox,
+    MailboxQuota,
+    MeteredService,
+    in_shard,
+    load_registry,
+    mailbox_from_config,
+    mailbox_run_config,
+)
+from email_assistant.tools.gmail.ingest_daemon import AdaptiveInterval
+from email_assistant.tools.gmail.run_ingest import build_arg_parser
+
+class FakeRequest:
+    def execute(self):
+        return {}
+
+class FakeGmail:
+    """messages().list stand-in that answers every search with no messages."""
+
+    def __init__(self, email, searches):
+        self.email = email
+        self.searches = searches
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q):
+        self.searches.append((self.email, q))
+        return FakeRequest()
+
+def write_registry(tmp_path, registry):
+    path = tmp_path / "mailboxes.json"
+    path.write_text(json.dumps(registry))
+    return path
+
+def test_registry_applies_defaults_and_resolves_token_files(tmp_path):
+    (tmp_path / "alice.json").write_text('{"token": "a"}')
+    path = write_registry(tmp_path, {
+        "defaults": {"minutes_since": 10, "daily_quota_units": 500},
+        "mailboxes": [
+            {"email": "alice@example.com", "token_file": "alice.json"},
+            {"email": "bob@example.com", "token_env": "BOB_TOKEN", "minutes_since": 30, "include_read": True},
+        ],
+    })
+
+    alice, bob = load_registry(path)
+    assert alice.token() == '{"token": "a"}'
+    assert alice.options == {"minutes_since": 10}
+    assert bob.options == {"minutes_since": 30, "include_read": True}
+    assert bob.daily_quota_units == 500
+    with pytest.raises(ValueError):
+        bob.token()
+
+def test_registry_rejects_unknown_options_and_duplicates(tmp_path):
+    with pytest.raises(ValueError, match="Unknown options"):
+        load_registry(write_registry(tmp_path, {"mailboxes": [{"email": "a@example.com", "minutes": 5}]}))
+    with pytest.raises(ValueError, match="twice"):
+        load_registry(write_registry(tmp_path, {"mailboxes": [{"email": "a@example.com"}, {"email": "A@example.com"}]}))
+
+def test_runs_name_their_mailbox_and_token_source_but_not_the_token(tmp_path, monkeypatch):
+    (tmp_path / "alice.json").write_text('{"token": "a"}')
+    monkeypatch.setenv("BOB_TOKEN", '{"token": "b"}')
+    alice, bob, carol = load_registry(write_registry(tmp_path, {"mailboxes": [
+        {"email": "alice@example.com", "token_file": "alice.json"},
+        {"email": "bob@example.com", "token_env": "BOB_TOKEN"},
+        {"email": "carol@example.com"},
+    ]}))
+
+    configs = [mailbox_run_config(mailbox) for mailbox in (alice, bob, carol)]
+    assert configs[0] == {"gmail_account": "alice@example.com", "gmail_token_file": str((tmp_path / "alice.json").resolve())}
+    assert configs[1] == {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN"}
+    assert configs[2] == {"gmail_account": "carol@example.com"}
+    assert "token" not in json.dumps(configs).replace("gmail_token", "")
+
+    # The graph resolves each run's token from its config
+    tokens = [mailbox_from_config({"configurable": {**config, "timezone": "UTC"}}).token() for config in configs]
+    assert tokens == ['{"token": "a"}', '{"token": "b"}', None]
+    assert mailbox_from_config({"configurable": {}}) is None
+    assert mailbox_from_config(None) is None
+
+def test_shards_split_mailboxes_exactly_once():
+    emails = [f"user{i}@example.com" for i in range(50)]
+    shards = [[email for email in emails if in_shard(email, (index, 3))] for index in range(3)]
+    assert sorted(sum(shards, [])) == sorted(emails)
+    assert all(shards)
+
+def test_metered_service_charges_units_per_method():
+    service = MeteredService(FakeGmail("a@example.com", []))
+    service.users().messages().list(userId="me", q="").execute()
+    service.users().messages().list(userId="me", q="").execute()
+    assert (service.units, service.calls) == (10, 2)
+
+def test_scheduler_serves_due_mailboxes_in_turn():
+    states = [MailboxState(Mailbox(f"{name}@example.com"), AdaptiveInterval()) for name in "abc"]
+    scheduler = MailboxScheduler(states)
+
+    first = scheduler.take()
+    scheduler.done(first, 0)
+    # The mailbox that just had its turn goes behind the others
+    assert [scheduler.take().mailbox.email for _ in range(3)] == ["b@example.com", "c@example.com", "a@example.com"]
+
+def test_one_pass_polls_each_mailbox_and_books_quota(tmp_path):
+    searches = []
+    quota = MailboxQuota(tmp_path / "quota.sqlite")
+    mailboxes = [
+        Mailbox("alice@example.com", options={"minutes_since": 30}),
+        Mailbox("bob@example.com"),
+        Mailbox("carol@example.com", daily_quota_units=5),
+    ]
+    quota.record("carol@example.com", units=5, calls=1)
+    args = build_arg_parser().parse_args(["--registry", "mailboxes.json", "--minutes-since", "5"])
+    pool = MailboxPool(
+        mailboxes,
+        args,
+        workers=2,
+        quota=quota,
+        leases=LeaseStore(tmp_path / "leases.sqlite"),
+        service_factory=lambda mailbox: FakeGmail(mailbox.email, searches),
+        client_factory=lambda url: object(),
+    )
+
+    pool.run(repeat=False)
+
+    assert sorted(email for email, _ in searches) == ["alice@example.com", "bob@example.com"]
+    assert any("to:alice@example.com" in query for _, query in searches)
+    status = pool.status()
+    assert status["alice@example.com"]["state"] == "ok"
+    assert status["carol@example.com"]["state"] == "over_quota"
+    assert quota.used("alice@example.com") == 5
+    assert quota.used("carol@example.com") == 5
+    assert {row["email"] for row in quota.usage()} == {"alice@example.com", "bob@example.com", "carol@example.com"}
+    # Runs are submitted for the registry entry, so the graph acts on that mailbox
+    assert pool.mailbox_args(pool.states[0], now=0).mailbox is mailboxes[0]
+
+def test_cron_job_without_email_or_registry_fails():
+    assert asyncio.run(cron_job(JobKickoff()))["status"] == "error"
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from email_assistant.tools.gmail import gmail_tools
+from email_assistant.tools.gmail.message_metadata import MessageMetadataStore
+
+class FakeGmail:
+    """Stand-in for service.users().messages().get(...).execute()."""
+
+    def __init__(self, status=None):
+        self.status = status
+        self.requests = []
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def get(self, **params):
+        self.requests.append(params)
+        return self
+
+    def execute(self):
+        if self.status:
+            raise HttpError(httplib2.Response({"status": self.status}), b"")
+        return {
+            "threadId": "thread-1",
+            "payload": {"headers": [{"name": "Subject", "value": "Lunch"}, {"name": "from", "value": "Bob <bob@example.com>"}]},
+        }
+
+def test_recorded_headers_skip_the_api(tmp_path):
+    store = MessageMetadataStore(tmp_path / "metadata.sqlite")
+    store.remember("msg-1", subject="Hello", from_email="alice@example.com", thread_id="thread-1")
+    service = FakeGmail()
+    assert store.reply_metadata(service, "msg-1")["from_email"] == "alice@example.com"
+    assert service.requests == []
+
+def test_miss_fetches_metadata_only(tmp_path):
+    store = MessageMetadataStore(tmp_path / "metadata.sqlite")
+    # Older ingests did not carry the thread id
+    store.remember("msg-1", subject="Lunch", from_email="bob@example.com")
+    service = FakeGmail()
+    record = store.reply_metadata(service, "msg-1")
+    assert record["thread_id"] == "thread-1"
+    assert service.requests == [{"userId": "me", "id": "msg-1", "format": "metadata", "metadataHeaders": ["Subject", "From"]}]
+
+    # Later replies are served locally
+    store.reply_metadata(service, "msg-1")
+    assert len(service.requests) == 1
+
+def test_reply_body_only_falls_back_for_unknown_messages(tmp_path, monkeypatch):
+    store = MessageMetadataStore(tmp_path / "metadata.sqlite")
+    monkeypatch.setattr(gmail_tools, "get_metadata_store", lambda: store)
+
+    body = gmail_tools._build_reply_body(FakeGmail(status=404), "gone", "Hi", "me@example.com")
+    assert "threadId" not in body
+
+    # A transient failure must not turn the reply into an email to a placeholder address
+    with pytest.raises(HttpError):
+        gmail_tools._build_reply_body(FakeGmail(status=503), "msg-1", "Hi", "me@example.com")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from email_assistant.tools.gmail import gmail_tools
+from email_assistant.tools.gmail.outbox import FAILED, QUEUED, SENDING, SENT, Outbox, OutboxWorker, PermanentSendError
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(tmp_path / "outbox.sqlite", claim_timeout=60)
+
+def worker(outbox, send, **kwargs):
+    kwargs.setdefault("base_delay", 0)
+    return OutboxWorker(outbox, send, rate_per_minute=6000, burst=100, **kwargs)
+
+def test_enqueue_is_idempotent(outbox):
+    first = outbox.enqueue("msg-1", "Sounds good", "me@example.com", cc=["b@example.com", "a@example.com"])
+    again = outbox.enqueue("msg-1", "Sounds good", "me@example.com", cc=["a@example.com", "b@example.com"])
+    assert first["id"] == again["id"]
+    assert outbox.counts() == {QUEUED: 1}
+    assert outbox.enqueue("msg-1", "Sounds great", "me@example.com")["id"] != first["id"]
+
+def test_transient_failures_are_retried(outbox):
+    row = outbox.enqueue("msg-1", "Sounds good", "me@example.com")
+    calls = []
+
+    def send(claimed):
+        calls.append(claimed["attempts"])
+        if len(calls) < 3:
+            raise ConnectionError("timed out")
+        return "gmail-1"
+
+    w = worker(outbox, send)
+    while w.process_one():
+        pass
+    assert calls == [1, 2, 3]
+    assert outbox.get(row["id"])["status"] == SENT
+    assert outbox.get(row["id"])["gmail_id"] == "gmail-1"
+
+def test_backoff_delays_retries(outbox):
+    row = outbox.enqueue("msg-1", "Sounds good", "me@example.com")
+    w = worker(outbox, lambda claimed: (_ for _ in ()).throw(ConnectionError("down")), base_delay=30)
+    assert w.process_one()
+    retried = outbox.get(row["id"])
+    assert retried["status"] == QUEUED
+    assert retried["next_attempt_at"] > time.time() + 20
+    # Not due yet
+    assert not w.process_one()
+
+def test_permanent_and_exhausted_failures(outbox):
+    bad = outbox.enqueue("msg-1", "Hello", "me@example.com")
+    w = worker(outbox, lambda claimed: (_ for _ in ()).throw(PermanentSendError("invalid recipient")))
+    w.process_one()
+    assert outbox.get(bad["id"])["status"] == FAILED
+
+    flaky = outbox.enqueue("msg-2", "Hello", "me@example.com")
+    w = worker(outbox, lambda claimed: (_ for _ in ()).throw(ConnectionError("down")), max_attempts=2)
+    while w.process_one():
+        pass
+    assert outbox.get(flaky["id"])["status"] == FAILED
+    assert outbox.get(flaky["id"])["attempts"] == 2
+
+    # Re-submitting the same draft queues it again
+    assert outbox.enqueue("msg-2", "Hello", "me@example.com")["status"] == QUEUED
+
+def test_stale_sending_rows_are_reclaimed(outbox):
+    row = outbox.enqueue("msg-1", "Sounds good", "me@example.com")
+    claimed = outbox.claim_next()
+    assert claimed["status"] == SENDING
+    # A worker that is still within the claim timeout keeps its row
+    assert outbox.claim_next() is None
+
+    outbox.claim_timeout = 0
+    reclaimed = outbox.claim_next()
+    assert reclaimed["id"] == row["id"]
+    # attempts > 1 tells the sender to look for an earlier delivery first
+    assert reclaimed["attempts"] == 2
+
+def test_drafts_keep_their_mailbox(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.sqlite")
+    assert outbox.get(outbox.enqueue("msg-0", "Hi", "me@example.com")["id"])["mailbox"] == {}
+    mailbox = {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN"}
+    row = outbox.enqueue("msg-1", "Sounds good", "bob@example.com", mailbox=mailbox)
+    assert outbox.get(row["id"])["mailbox"] == mailbox
+
+class FakeGmail:
+    """messages().send stand-in."""
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        return self
+
+    def execute(self):
+        return {"id": "gmail-1"}
+
+def test_drafts_are_sent_from_the_mailbox_of_their_run(tmp_path, monkeypatch):
+    outbox = Outbox(tmp_path / "outbox.sqlite")
+    tokens = []
+    monkeypatch.setattr(gmail_tools, "get_outbox", lambda: outbox)
+    monkeypatch.setattr(gmail_tools, "ensure_outbox_worker", lambda: None)
+    monkeypatch.setattr(gmail_tools, "_build_reply_body", lambda *args: {})
+    monkeypatch.setattr(gmail_tools, "get_service", lambda api, version, token, secret: tokens.append(token) or FakeGmail())
+    monkeypatch.setenv("BOB_TOKEN", '{"token": "b"}')
+    config = {"configurable": {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN", "timezone": "UTC"}}
+
+    # Like a graph node, the tool call inherits the run's config
+    send = RunnableLambda(lambda args: gmail_tools.send_email_tool.invoke(args))
+    send.invoke({"email_id": "msg-1", "response_text": "Sounds good", "email_address": "bob@example.com"}, config)
+    row = outbox.claim_next()
+    assert row["mailbox"] == {"gmail_account": "bob@example.com", "gmail_token_env": "BOB_TOKEN"}
+
+    assert gmail_tools.deliver_outbox_message(row) == "gmail-1"
+    assert tokens == ['{"token": "b"}']
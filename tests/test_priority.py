@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+
+from email_assistant.tools.gmail.priority import PriorityScorer
+
+def test_keyword_levels_match_substrings_case_insensitively():
+    scorer = PriorityScorer()
+    assert scorer.score("Lunch?", "Can we RECALL the plan") == "medium"
+    assert scorer.score("Quick question", "This is URGENT") == "high"
+    assert scorer.score("Hello", "Nothing to see") == "low"
+    # Overlapping keywords are all seen: "schedule" does not hide "emergency"
+    assert scorer.score("", "schedulemergency") == "high"
+    assert scorer.score_batch([("t1", "Meeting", ""), ("t2", "", "deadline friday"), (None, "", "")]) == ["medium", "high", "low"]
+
+def test_results_are_memoized_by_thread_and_content():
+    scorer = PriorityScorer(cache_size=2)
+    scans = []
+    scan = scorer._scan
+    scorer._scan = lambda subject, body: scans.append(subject) or scan(subject, body)
+
+    scorer.score("Meeting", "", "t1")
+    scorer.score("Meeting", "", "t1")
+    assert scans == ["Meeting"]
+    # Changed content is scanned again
+    assert scorer.score("Urgent meeting", "", "t1") == "high"
+    assert scans == ["Meeting", "Urgent meeting"]
+    scorer.score("Other", "", "t2")
+    assert len(scorer._cache) == 2
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+# The Flask apps import their helpers as top-level modules
+public_interface = str(Path(__file__).parent.parent / "public_interface")
+if public_interface not in sys.path:
+    sys.path.append(public_interface)
+
+from snapshot import DashboardSnapshot
+
+def email(number, status="pending", priority="low", tool_called="none"):
+    return {
+        "id": f"e{number}",
+        "subject": f"Subject {number}",
+        "from": "alice@example.com",
+        "status": status,
+        "priority": priority,
+        "tool_called": tool_called,
+        "timestamp": f"2025-08-11T10:{number:02d}:00Z",
+        "body": "x" * 100,
+    }
+
+@pytest.fixture
+def dashboard():
+    data = {
+        "emails": [
+            email(1, status="done", priority="high"),
+            email(2, status="pending", priority="high"),
+            email(3, status="done", tool_called="send_email"),
+            email(4, status="pending"),
+            email(5, status="error", priority="high"),
+        ],
+        "statistics": {"total": 5, "pending": 2},
+        "last_updated": "now",
+    }
+    app = Flask(__name__)
+    snapshot = DashboardSnapshot(app, lambda: json.loads(json.dumps(data)), {"index": lambda d: "<html></html>"}, interval=3600)
+    app.add_url_rule("/api/emails", "emails", snapshot.emails_response)
+    app.add_url_rule("/api/events", "events", snapshot.event_response)
+    snapshot.refresh()
+    yield data, snapshot, app.test_client()
+    snapshot.stop()
+
+def ids(response):
+    return [row["id"] for row in response.get_json()["emails"]]
+
+def test_cursor_pages_survive_a_rebuild(dashboard):
+    data, snapshot, client = dashboard
+    first = client.get("/api/emails?limit=2")
+    assert ids(first) == ["e5", "e4"]
+
+    # New mail arrives between two page requests
+    data["emails"].append(email(9))
+    snapshot.refresh()
+    second = client.get(f"/api/emails?limit=2&cursor={first.get_json()['next_cursor']}")
+    assert ids(second) == ["e3", "e2"]
+    last = client.get(f"/api/emails?limit=2&cursor={second.get_json()['next_cursor']}")
+    assert ids(last) == ["e1"]
+    assert last.get_json()["next_cursor"] is None
+
+def test_facets_time_range_and_fields(dashboard):
+    _, _, client = dashboard
+    assert ids(client.get("/api/emails?status=done,error")) == ["e5", "e3", "e1"]
+    assert ids(client.get("/api/emails?status=done,error&priority=high")) == ["e5", "e1"]
+    assert ids(client.get("/api/emails?tool_called=send_email")) == ["e3"]
+    assert ids(client.get("/api/emails?since=2025-08-11T10:02:00Z&until=2025-08-11T10:04:00Z")) == ["e4", "e3", "e2"]
+
+    response = client.get("/api/emails?fields=id,subject&limit=1").get_json()
+    assert response["emails"] == [{"id": "e5", "subject": "Subject 5"}]
+    # The rest of the data dict comes along unchanged
+    assert response["statistics"] == {"total": 5, "pending": 2}
+    assert "body" in client.get("/api/emails?fields=*&limit=1").get_json()["emails"][0]
+    assert "body" not in client.get("/api/emails?limit=1").get_json()["emails"][0]
+
+def test_bad_requests_get_400(dashboard):
+    _, _, client = dashboard
+    assert client.get("/api/emails?cursor=not-a-cursor").status_code == 400
+    assert client.get("/api/emails?limit=many").status_code == 400
+
+def test_etag_revalidation_and_gzip(dashboard):
+    data, snapshot, client = dashboard
+    response = client.get("/api/emails?fields=*")
+    etag = response.headers["ETag"]
+    assert client.get("/api/emails?fields=*", headers={"If-None-Match": etag}).status_code == 304
+    # Another query is another representation
+    assert client.get("/api/emails?limit=1", headers={"If-None-Match": etag}).status_code == 200
+
+    compressed = client.get("/api/emails?fields=*", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] != etag
+    assert json.loads(gzip.decompress(compressed.data))["emails"][0]["id"] == "e5"
+
+    # A rebuild with only volatile changes keeps the ETag, a data change does not
+    data["last_updated"] = "later"
+    snapshot.refresh()
+    assert client.get("/api/emails?fields=*", headers={"If-None-Match": etag}).status_code == 304
+    data["emails"].pop()
+    snapshot.refresh()
+    assert client.get("/api/emails?fields=*", headers={"If-None-Match": etag}).status_code == 200
+
+def first_event(client, **headers):
+    response = client.get("/api/events", headers=headers)
+    stream = iter(response.response)
+    assert next(stream).startswith(b"retry: ")
+    return response, stream, next(stream)
+
+def test_events_reset_unknown_clients_and_send_deltas(dashboard):
+    data, snapshot, client = dashboard
+    response, _, event = first_event(client)
+    assert response.mimetype == "text/event-stream"
+    assert event.startswith(b"event: reset")
+    assert f"id: {snapshot.current().etag}".encode() in event
+
+    # A client that already shows the current snapshot only gets what changes next
+    _, stream, event = first_event(client, **{"Last-Event-ID": snapshot.current().etag})
+    assert event == b": connected\n\n"
+
+    data["emails"] = [row for row in data["emails"] if row["id"] != "e1"]
+    data["emails"][0]["status"] = "done"
+    data["statistics"]["pending"] = 1
+    snapshot.refresh()
+    delta = next(stream).decode()
+    assert delta.startswith("event: delta")
+    payload = json.loads(delta.split("data: ", 1)[1])
+    assert payload["removed"] == ["e1"]
+    assert [row["id"] for row in payload["upserted"]] == ["e2"]
+    assert payload["statistics"] == {"pending": {"value": 1, "delta": -1}}
+
+def test_event_streams_end_after_their_lifetime(dashboard):
+    _, snapshot, _ = dashboard
+    stream = snapshot.event_stream(snapshot.current().etag, heartbeat=0.01, lifetime=0.05)
+    events = list(stream)
+    assert events[0] == "retry: 3000\n\n"
+    assert events[1] == ": connected\n\n"
+    assert set(events[2:]) <= {": keep-alive\n\n"}
+    assert snapshot._subscribers == []
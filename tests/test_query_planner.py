@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import pytest
+
+from email_assistant.tools.gmail.query_planner import IngestQueryConfig, build_gmail_query, savings_report
+
+NOW = 1_750_000_000
+
+def test_default_query_excludes_self_and_triaged():
+    query = build_gmail_query(IngestQueryConfig(email_address="me@example.com", minutes_since=60), NOW)
+    assert query.startswith(f"(to:me@example.com OR from:me@example.com) after:{NOW - 3600} is:unread")
+    assert "-label:assistant-triaged-ignore" in query
+    assert query.endswith("-from:me")
+
+def test_optional_filters():
+    config = IngestQueryConfig(
+        email_address="me@example.com",
+        minutes_since=0,
+        include_read=True,
+        include_triaged=True,
+        exclude_self=False,
+        inbox_only=True,
+        categories=("primary", "updates"),
+        exclude_categories=("promotions",),
+    )
+    assert build_gmail_query(config) == (
+        "(to:me@example.com OR from:me@example.com) in:inbox category:(primary OR updates) -category:promotions"
+    )
+    with pytest.raises(ValueError):
+        IngestQueryConfig(email_address="me@example.com", categories=("newsletters",))
+
+class FakeGmail:
+    """messages.list stand-in whose result count depends on the query."""
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, q, pageToken, maxResults):
+        count = 10
+        if "-from:me" in q:
+            count -= 4
+        if "in:inbox" in q:
+            count -= 3
+        self._response = {"messages": [{"id": str(i)} for i in range(count)]}
+        return self
+
+    def execute(self):
+        return self._response
+
+def test_savings_report():
+    config = IngestQueryConfig(email_address="me@example.com", inbox_only=True)
+    rows = {row["option"]: row for row in savings_report(FakeGmail(), config)}
+    assert rows["baseline"]["results"] == 10
+    assert rows["-from:me"]["list_results_saved"] == 4
+    assert rows["-from:me"]["fetches_saved"] == 8
+    assert rows["in:inbox"]["list_results_saved"] == 3
+    assert rows["all options"]["results"] == 3
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+from email_assistant.tools.gmail.run_counters import RunCounters, day_of, status_statistics
+
+def test_status_changes_move_items_between_buckets(tmp_path):
+    counters = RunCounters(tmp_path / "counters.sqlite")
+    assert counters.record("graph", "msg-1", "waiting_action", at="2025-01-01T09:00:00Z")
+    assert counters.record("graph", "msg-2", "waiting_action", at="2025-01-02T09:00:00Z", tags=["scheduled_meetings"])
+    assert counters.record("graph", "msg-1", "hitl")
+    # Replaying the current status changes nothing
+    assert not counters.record("graph", "msg-1", "hitl")
+    assert counters.record("graph", "msg-1", "processed")
+
+    totals = counters.totals("graph")
+    assert status_statistics(totals, tags=["scheduled_meetings"]) == {
+        "total_emails": 2, "processed": 1, "hitl": 0, "ignored": 0, "waiting_action": 1, "scheduled_meetings": 1,
+    }
+    daily = counters.daily("graph")
+    assert daily["2025-01-01"] == {"total": 1, "processed": 1, "hitl": 0, "waiting_action": 0}
+    assert daily["2025-01-02"] == {"total": 1, "waiting_action": 1, "scheduled_meetings": 1}
+    assert list(counters.daily("graph", since="2025-01-02")) == ["2025-01-02"]
+    assert counters.totals("langsmith") == {}
+
+def test_forget_removes_items_from_the_counters(tmp_path):
+    counters = RunCounters(tmp_path / "counters.sqlite")
+    counters.record("graph", "msg-1", "waiting_action", at="2025-01-01T09:00:00Z")
+    counters.record("graph", "msg-2", "processed", at="2025-01-01T09:00:00Z")
+    assert counters.forget("graph", ["msg-1", "missing"]) == 1
+    assert counters.totals("graph") == {"total": 1, "waiting_action": 0, "processed": 1}
+    assert counters.daily("graph")["2025-01-01"]["total"] == 1
+
+def test_day_of_accepts_timestamps():
+    assert day_of("2025-03-01T23:30:00-02:00") == "2025-03-02"
+    assert day_of(0) == "1970-01-01"
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from email_assistant.tools.gmail.service_pool import ServicePool
+
+TOKEN = json.dumps({"token": "access", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret"})
+
+def test_services_are_reused_per_thread():
+    pool = ServicePool()
+    gmail = pool.service("gmail", "v1", TOKEN)
+    assert pool.service("gmail", "v1", TOKEN) is gmail
+    assert pool.credentials(TOKEN) is pool.credentials(TOKEN)
+
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(pool.service("gmail", "v1", TOKEN)))
+    thread.start()
+    thread.join()
+    # Each thread gets its own transport, but shares the credentials
+    assert other_thread[0] is not gmail
+    assert other_thread[0]._http.credentials is gmail._http.credentials
+
+def test_credentials_refresh_shortly_before_expiry():
+    pool = ServicePool(refresh_margin=timedelta(minutes=5))
+    creds = pool.credentials(TOKEN)
+    refreshed = []
+    creds.refresh = lambda request: refreshed.append(request)
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    creds.expiry = now + timedelta(hours=1)
+    pool.credentials(TOKEN)
+    assert refreshed == []
+
+    creds.expiry = now + timedelta(minutes=2)
+    pool.credentials(TOKEN)
+    assert len(refreshed) == 1
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+from datetime import date, datetime, time
+
+from email_assistant.tools.gmail.availability import WorkingHours
+from email_assistant.tools.gmail.slot_finder import busy_bitmap, find_common_slots, working_bitmap
+
+HOURS = WorkingHours(timezone="America/Los_Angeles")
+MONDAY = date(2025, 5, 5)
+
+def at(hour, minute=0, day=MONDAY):
+    return datetime.combine(day, time(hour, minute), tzinfo=HOURS.tzinfo)
+
+def test_bitmaps_round_partial_slots():
+    busy = busy_bitmap([(at(9, 10), at(9, 50))], MONDAY, HOURS)
+    # 09:10-09:50 touches the 09:00, 09:15, 09:30 and 09:45 slots
+    assert busy.nonzero()[0].tolist() == [36, 37, 38, 39]
+    assert working_bitmap(MONDAY, HOURS).sum() == 32
+    assert working_bitmap(date(2025, 5, 10), HOURS).sum() == 0
+
+def test_find_common_slots_respects_every_attendee():
+    busy = {
+        "primary": [(at(9), at(12))],
+        "bob@example.com": [(at(13), at(15))],
+        "carol@example.com": [(at(15, 30), at(17))],
+    }
+    slots = find_common_slots(busy, [MONDAY], 30, HOURS)
+    # Only 12:00-13:00 and 15:00-15:30 are free for everyone
+    assert [(slot.start, slot.end) for slot in slots] == [(at(12), at(12, 30)), (at(12, 30), at(13)), (at(15), at(15, 30))]
+
+def test_find_common_slots_prefers_buffered_slots():
+    slots = find_common_slots({"primary": [(at(9), at(10))]}, [MONDAY], 60, HOURS, max_candidates=2)
+    # Slots away from the 09:00-10:00 meeting rank ahead of the back-to-back 10:00 slot
+    assert at(10) not in [slot.start for slot in slots]
+    assert all(slot.buffer_before >= 4 and slot.buffer_after >= 4 for slot in slots)
+
+def test_bitmaps_follow_dst_transitions():
+    # Both transitions fall on a Sunday
+    hours = WorkingHours(timezone="America/Los_Angeles", days=tuple(range(7)))
+    spring, fall = date(2025, 3, 9), date(2025, 11, 2)
+    for day, slots in ((spring, 92), (fall, 100)):
+        busy = busy_bitmap([(at(9, day=day), at(10, day=day))], day, hours)
+        working = working_bitmap(day, hours)
+        assert len(busy) == len(working) == slots
+        # The 09:00-10:00 meeting is the first working hour, whatever the day's length
+        assert busy.nonzero()[0].tolist() == working.nonzero()[0].tolist()[:4]
+
+    slots = find_common_slots({"primary": [(at(9, day=spring), at(16, day=spring))]}, [spring], 60, hours)
+    assert [(slot.start, slot.end) for slot in slots] == [(at(16, day=spring), at(17, day=spring))]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from email_assistant.sqlite_store import SQLiteStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteStore(tmp_path / "store.sqlite")
+    yield store
+    store.close()
+
+def test_get_put_roundtrip(store):
+    namespace = ("email_assistant", "triage_preferences")
+    assert store.get(namespace, "user_preferences") is None
+
+    # The memory graphs store plain strings as values
+    store.put(namespace, "user_preferences", "Ignore marketing emails")
+    item = store.get(namespace, "user_preferences")
+    assert item.value == "Ignore marketing emails"
+    assert item.namespace == namespace
+
+    store.put(namespace, "user_preferences", "Respond to everything")
+    assert store.get(namespace, "user_preferences").value == "Respond to everything"
+
+    store.delete(namespace, "user_preferences")
+    assert store.get(namespace, "user_preferences") is None
+
+def test_persists_across_instances(tmp_path):
+    path = tmp_path / "store.sqlite"
+    SQLiteStore(path).put(("email_assistant", "cal_preferences"), "user_preferences", {"length": 30})
+    assert SQLiteStore(path).get(("email_assistant", "cal_preferences"), "user_preferences").value == {"length": 30}
+
+def test_search_is_scoped_to_namespace_prefix(store):
+    store.put(("email_assistant", "a"), "k", {"n": 1})
+    store.put(("email_assistant", "b"), "k", {"n": 2})
+    store.put(("email_assistant_other",), "k", {"n": 3})
+
+    results = store.search(("email_assistant",))
+    assert sorted(item.value["n"] for item in results) == [1, 2]
+
+    results = store.search(("email_assistant",), filter={"n": {"$gt": 1}})
+    assert [item.value["n"] for item in results] == [2]
+
+def test_list_namespaces(store):
+    store.put(("email_assistant", "a"), "k", {})
+    store.put(("email_assistant", "b"), "k", {})
+    store.put(("other",), "k", {})
+
+    assert store.list_namespaces(prefix=("email_assistant",)) == [("email_assistant", "a"), ("email_assistant", "b")]
+    assert store.list_namespaces(max_depth=1) == [("email_assistant",), ("other",)]
+
+def test_ttl_expiry(store):
+    store.put(("cache",), "short", {"v": 1}, ttl=0.001)
+    store.put(("cache",), "forever", {"v": 2}, ttl=None)
+    time.sleep(0.1)
+
+    assert store.get(("cache",), "short") is None
+    assert store.get(("cache",), "forever").value == {"v": 2}
+    assert store.sweep_ttl() == 1
+
+def test_concurrent_writers(store):
+    def write(i):
+        store.put(("email_assistant", "concurrent"), f"key-{i}", {"i": i})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(50)))
+
+    assert len(store.search(("email_assistant", "concurrent"), limit=100)) == 50
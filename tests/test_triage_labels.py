@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+from email_assistant.tools.gmail import triage_labels
+from email_assistant.tools.gmail.triage_labels import resolve_label_ids, triage_exclusion_query, triage_label_name
+
+class FakeLabels:
+    """Stand-in for service.users().labels() with list/create."""
+
+    def __init__(self, existing):
+        self.existing = dict(existing)
+        self.created = []
+        self._response = None
+
+    def users(self):
+        return self
+
+    def labels(self):
+        return self
+
+    def list(self, userId):
+        self._response = {"labels": [{"name": name, "id": label_id} for name, label_id in self.existing.items()]}
+        return self
+
+    def create(self, userId, body):
+        label_id = f"Label_{len(self.existing) + 1}"
+        self.existing[body["name"]] = label_id
+        self.created.append(body["name"])
+        self._response = {"id": label_id, "name": body["name"]}
+        return self
+
+    def execute(self):
+        return self._response
+
+def test_exclusion_query_names_every_label():
+    assert triage_label_name("notify") == "assistant/triaged-notify"
+    assert triage_exclusion_query() == (
+        "-label:assistant-triaged-ignore -label:assistant-triaged-notify -label:assistant-triaged-respond"
+    )
+
+def test_resolve_creates_missing_labels_once(monkeypatch):
+    monkeypatch.setattr(triage_labels, "_label_ids", {})
+    service = FakeLabels({"INBOX": "INBOX", "assistant": "Label_9"})
+    ids = resolve_label_ids(service, ["assistant/triaged-ignore"])
+    assert service.created == ["assistant/triaged-ignore"]
+    assert ids == {"assistant/triaged-ignore": service.existing["assistant/triaged-ignore"]}
+
+    # Cached afterwards: no further API calls
+    resolve_label_ids(None, ["assistant/triaged-ignore"])
+
+def test_label_ids_are_cached_per_account(monkeypatch):
+    monkeypatch.setattr(triage_labels, "_label_ids", {})
+    alice = FakeLabels({"assistant": "Label_1", "assistant/triaged-notify": "Label_2"})
+    bob = FakeLabels({"assistant": "Label_7", "assistant/triaged-notify": "Label_8"})
+    assert resolve_label_ids(alice, ["assistant/triaged-notify"], account="env:alice") == {"assistant/triaged-notify": "Label_2"}
+    assert resolve_label_ids(bob, ["assistant/triaged-notify"], account="param:bob") == {"assistant/triaged-notify": "Label_8"}